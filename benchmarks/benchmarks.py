@@ -0,0 +1,272 @@
+'''Benchmarks for fredpy. Run with airspeed velocity (asv) from the root of the repository:
+
+    asv run --python=same                   # current environment
+    asv continuous <baseline commit> HEAD   # compare against a baseline commit
+
+Every benchmark runs offline. Series are synthetic and API requests are served by fredpy.replay_server
+from payloads generated in setup. Methods named time_* report run time and methods named peakmem_*
+report peak memory.
+'''
+
+import os
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import fredpy
+
+# Business cycle dates stored in the repository so that fredpy.recessions() works offline
+cycle_dates = pd.read_csv(os.path.join(os.path.dirname(__file__),'..','business cycle dates','business_cycle_dates.csv'))
+cycle_dates['peaks'] = pd.to_datetime(cycle_dates.peaks)
+cycle_dates['troughs'] = pd.to_datetime(cycle_dates.troughs)
+fredpy.cycle_dates = cycle_dates
+
+# Requests are served by fredpy.replay_server so any key works
+fredpy.api_key = 'benchmark'
+
+frequencies = {'D':('Daily','D'),'M':('Monthly','MS'),'Q':('Quarterly','QS')}
+
+
+def make_series(years,frequency,seed=0):
+
+    '''Returns a synthetic fredpy series with the given number of years of data at frequency 'D', 'M', or 'Q'.'''
+
+    n_obs = int(years*{'D':365,'M':12,'Q':4}[frequency])
+    dates = pd.date_range('1950-01-01',periods=n_obs,freq=frequencies[frequency][1])
+
+    rng = np.random.default_rng(seed)
+    data = 100*np.exp(np.cumsum(rng.normal(0.002,0.01,n_obs)))
+
+    return fredpy.to_fred_series(data=data,dates=dates,frequency=frequencies[frequency][0],series_id='SYN'+frequency,
+                                 title='Synthetic series',units='Index',units_short='Index',source='fredpy benchmarks')
+
+
+def make_server(years,frequency,observation_date='2020-01-01'):
+
+    '''Returns a fredpy.replay_server with API payloads for a synthetic series.'''
+
+    s = make_series(years,frequency)
+    series_id = s.series_id
+    parameters = {'series_id':series_id,'realtime_start':observation_date,'realtime_end':observation_date}
+
+    server = fredpy.replay_server()
+
+    server.add('fred/series',parameters,{'seriess':[{'id':series_id,'title':s.title,'frequency':s.frequency,
+        'frequency_short':s.frequency_short,'units':s.units,'units_short':s.units_short,'seasonal_adjustment':'Not Seasonally Adjusted',
+        'seasonal_adjustment_short':'NSA','last_updated':'2020-01-01 07:45:00-06','notes':''}]})
+    server.add('fred/series/observations',parameters,{'observations':[{'realtime_start':observation_date,'realtime_end':observation_date,
+        'date':d.strftime('%Y-%m-%d'),'value':'%.3f' % v} for d,v in s.data.items()]})
+    server.add('fred/series/release',parameters,{'releases':[{'id':1,'name':'Synthetic Release'}]})
+    server.add('fred/release/sources',{'series_id':series_id,'release_id':1},{'sources':[{'id':1,'name':'fredpy benchmarks'}]})
+
+    return server
+
+
+class Fetch:
+
+    '''Downloading and parsing a series from recorded API payloads.'''
+
+    params = [[10,50],['D','M','Q']]
+    param_names = ['years','frequency']
+
+    def setup(self,years,frequency):
+
+        self.server = make_server(years,frequency)
+        self.series_id = 'SYN'+frequency
+        self.observations = self.server.get('fred/series/observations?series_id='+self.series_id
+            +'&realtime_start=2020-01-01&realtime_end=2020-01-01').json()['observations']
+
+        fredpy.transport = self.server
+
+    def teardown(self,years,frequency):
+
+        fredpy.transport = None
+
+    def time_series(self,years,frequency):
+
+        fredpy.series(self.series_id,observation_date='2020-01-01',cache=False)
+
+    def peakmem_series(self,years,frequency):
+
+        fredpy.series(self.series_id,observation_date='2020-01-01',cache=False)
+
+    def time_parse_observations(self,years,frequency):
+
+        fredpy.series()._set_observations(self.observations,{})
+
+
+class Filters:
+
+    '''Trend/cycle filters. The monthly bandpass filter needs more than 14 years of data.'''
+
+    params = [[25,50],['M','Q']]
+    param_names = ['years','frequency']
+
+    def setup(self,years,frequency):
+
+        self.series = make_series(years,frequency)
+
+    def time_hp_filter(self,years,frequency):
+
+        self.series.hp_filter()
+
+    def peakmem_hp_filter(self,years,frequency):
+
+        self.series.hp_filter()
+
+    def time_bp_filter(self,years,frequency):
+
+        self.series.bp_filter()
+
+    def time_cf_filter(self,years,frequency):
+
+        self.series.cf_filter()
+
+    def time_linear_filter(self,years,frequency):
+
+        self.series.linear_filter()
+
+    def time_diff_filter(self,years,frequency):
+
+        self.series.diff_filter()
+
+
+class OneSidedHPFilter:
+
+    '''The one-sided HP filter, which recomputes the two-sided filter once per observation.'''
+
+    params = [[10,25]]
+    param_names = ['years']
+
+    def setup(self,years):
+
+        self.series = make_series(years,'Q')
+
+    def time_hp_filter_one_sided(self,years):
+
+        self.series.hp_filter(two_sided=False)
+
+
+class Transforms:
+
+    '''Transformations of a single series.'''
+
+    params = [[10,50],['D','M','Q']]
+    param_names = ['years','frequency']
+
+    def setup(self,years,frequency):
+
+        self.series = make_series(years,frequency)
+
+    def time_pc(self,years,frequency):
+
+        self.series.pc()
+
+    def time_apc(self,years,frequency):
+
+        self.series.apc()
+
+    def time_log(self,years,frequency):
+
+        self.series.log()
+
+    def time_ma(self,years,frequency):
+
+        self.series.ma(length=4)
+
+    def time_window(self,years,frequency):
+
+        self.series.window(['1960-01-01','1970-12-31'])
+
+    def time_as_frequency(self,years,frequency):
+
+        self.series.as_frequency('A')
+
+    def peakmem_as_frequency(self,years,frequency):
+
+        self.series.as_frequency('A')
+
+
+class Arithmetic:
+
+    '''Binary operations on series with the same observation dates.'''
+
+    params = [[10,50],['D','M','Q']]
+    param_names = ['years','frequency']
+
+    def setup(self,years,frequency):
+
+        self.series1 = make_series(years,frequency,seed=1)
+        self.series2 = make_series(years,frequency,seed=2)
+
+    def time_plus(self,years,frequency):
+
+        fredpy.plus(self.series1,self.series2)
+
+    def time_minus(self,years,frequency):
+
+        fredpy.minus(self.series1,self.series2)
+
+    def time_times(self,years,frequency):
+
+        fredpy.times(self.series1,self.series2)
+
+    def time_divide(self,years,frequency):
+
+        fredpy.divide(self.series1,self.series2)
+
+    def time_plus_scalar(self,years,frequency):
+
+        fredpy.plus(self.series1,1.0)
+
+
+class WindowEqualize:
+
+    '''Restricting a collection of series to a common window.'''
+
+    params = [[10,100]]
+    param_names = ['n_series']
+
+    def setup(self,n_series):
+
+        self.series_list = [make_series(20+k % 10,'M',seed=k) for k in range(n_series)]
+
+    def time_window_equalize(self,n_series):
+
+        fredpy.window_equalize(self.series_list)
+
+    def peakmem_window_equalize(self,n_series):
+
+        fredpy.window_equalize(self.series_list)
+
+
+class Plotting:
+
+    '''Plotting a series with recession bars.'''
+
+    params = [[10,50],['D','M']]
+    param_names = ['years','frequency']
+
+    def setup(self,years,frequency):
+
+        self.series = make_series(years,frequency)
+        self.fig, self.ax = plt.subplots()
+
+    def teardown(self,years,frequency):
+
+        plt.close('all')
+
+    def time_recessions(self,years,frequency):
+
+        fredpy.recessions(start='1850-01-01',end='2020-12-31',ax=self.ax)
+
+    def time_series_recessions(self,years,frequency):
+
+        self.series.recessions(ax=self.ax)
+
+    def time_plot_and_draw(self,years,frequency):
+
+        self.series.plot(ax=self.ax)
+        self.series.recessions(ax=self.ax)
+        self.fig.canvas.draw()
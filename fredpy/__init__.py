@@ -3,11 +3,29 @@ import dateutil
 import datetime
 import os
 import matplotlib.pyplot as plt
+import matplotlib.collections
+import matplotlib.figure
+import matplotlib.backends.backend_agg
 import numpy as np
 import pandas as pd
 import warnings
 import statsmodels.api as sm
 import time
+import concurrent.futures
+import threading
+import sqlite3
+import json
+import re
+import copy
+import collections
+import functools
+import mmap
+import multiprocessing.shared_memory
+import weakref
+import email.utils
+import http.client
+import http.server
+import urllib.parse
 tsa = sm.tsa
 
 # Read recession data. First try to parse html table at nber.org
@@ -96,455 +114,2321 @@ def load_api_key(path):
                 return api_key_file.readline()
 
 
-# Initialize cache dictionary
-series_cache = {}
+class FredAPIError(Exception):
 
+    '''Raised when a request to the FRED API fails after all retries. The status_code attribute is the 
+    last status code or, for timeouts and connection errors, the name of the error.'''
 
-######################################################################################################
-# The series class and methods
+    def __init__(self,message,status_code=None):
 
-class series:
+        super().__init__(message)
+        self.status_code = status_code
 
-    '''Defines a class for downloading, storing, and manipulating data from FRED.'''
 
-    def __init__(self,series_id=None,observation_date=None,cache=True):
+class CircuitOpenError(FredAPIError):
 
-        '''Initializes an instance of the series class.
+    '''Raised when requests to the FRED API fail immediately because recent requests have failed.'''
 
-        Args:
-            series_id (string):         unique FRED series ID. If series_id equals None, an empty series 
-                                            object is created.
-            observation_date (string):  MM-DD-YYYY or YYYY-MM-DD formatted state string. Indicates the final 
-                                            date at which the series is observed. I.e., excludes revisions made
-                                            after observation_date.
-            cache (bool):               Whether to store a copy of the series for the current session to reduce 
-                                            queries to the FRED API. Default: True
 
-        Returns:
-            None
+class DeadlineExceeded(FredAPIError):
 
-        Attributes:
-            data:                       (Pandas Series) data values with dates as index.
-            date_range:                 (string) specifies the dates of the first and last observations.
-            frequency:                  (string) data frequency. 'Daily', 'Weekly', 'Monthly', 'Quarterly', 'Semiannual', or 'Annual'.
-            frequency_short:            (string) data frequency. Abbreviated. 'D', 'W', 'M', 'Q', 'SA, or 'A'.
-            last_updated:               (string) date series was last updated.
-            notes:                      (string) details about series. Not available for all series.
-            observation_date:           (string) vintage date at which data are observed. YYYY-MM-DD
-            release:                    (string) statistical release containing data.
-            seasonal_adjustment:        (string) specifies whether the data has been seasonally adjusted.
-            seasonal_adjustment_short:  (string) specifies whether the data has been seasonally adjusted. Abbreviated.
-            series_id:                  (string) unique FRED series ID code.
-            source:                     (string) original source of the data.
-            t:                          (int) number corresponding to frequency: 365 for daily, 52 for weekly, 12 for monthly, 4 for quarterly, and 1 for annual.
-            title:                      (string) title of the data series.
-            units:                      (string) units of the data series.
-            units_short:                (string) units of the data series. Abbreviated.
-        '''
+    '''Raised when a request to the FRED API and its retries would take longer than the deadline.'''
 
-        # Verify API key is stored
-        if api_key is None:
-            raise ValueError('fredpy.api_key value not assigned. You need to provide your key for the FRED API.')
 
-        # Observation date for request
-        if observation_date is None:
+# The variables below configure requests made without a fredpy.FredClient instance
 
-            observation_date = datetime.datetime.today().strftime('%Y-%m-%d')
+# Base URL of the FRED API. Change to use a FRED-compatible server like fredpy.replay_server
+base_url = 'https://api.stlouisfed.org/'
 
-        else:
+# Object with a get(url,timeout=None) method that returns a requests.models.Response. Default: None, use requests
+transport = None
 
-            observation_date = pd.to_datetime(observation_date).strftime('%Y-%m-%d')
+# Seconds to wait to connect to and to read from the FRED API
+request_timeout = (3.05,30)
 
-        if type(series_id) == str:
+# Maximum number of times that a request is retried after a status code of 429 or 504 or a timeout
+max_retries = 10
 
-            if series_id+'_'+observation_date in series_cache.keys() and cache:
+# Seconds to wait before the first retry and maximum seconds to wait before any retry. Waits double after
+# each retry with random jitter unless the FRED API sends a Retry-After header
+retry_backoff = 1
+retry_backoff_max = 60
 
+# Maximum total seconds for a request including retries. Default: None, no limit
+request_deadline = None
 
+# After circuit_breaker_threshold consecutive failed requests (status codes 500 and above or timeouts),
+# requests fail immediately with CircuitOpenError for circuit_breaker_reset seconds
+circuit_breaker_threshold = 5
+circuit_breaker_reset = 30
 
-                # self = series_cache[series_id+'_'+observation_date].copy()
+# Whether fredpy.series returns an expired cached copy of a series when requests fail immediately
+serve_stale = True
 
-                cached = series_cache[series_id+'_'+observation_date].copy()
+# Data type of the observations of downloaded series. Set to 'float32' to halve the memory used by the
+# observations. Filters are computed in float64 and their results are stored with the data type of the series
+storage_dtype = 'float64'
 
-                self.date_range = cached.date_range
-                self.data = cached.data
-                self.frequency = cached.frequency
-                self.frequency_short = cached.frequency_short
-                self.last_updated = cached.last_updated
-                self.notes = cached.notes
-                self.observation_date = cached.observation_date
-                self.release = cached.release
-                self.seasonal_adjustment = cached.seasonal_adjustment
-                self.seasonal_adjustment_short = cached.seasonal_adjustment_short
-                self.series_id = cached.series_id
-                self.source = cached.source
-                self.t = cached.t
-                self.title = cached.title
-                self.units = cached.units
-                self.units_short = cached.units_short
+# Whether to use the kernels for filters and transforms compiled with Numba when Numba is installed. The
+# numpy kernels are used otherwise
+use_numba = True
 
+# Kernels compiled with Numba. Values are None if Numba is not installed. See _kernel()
+_numba_kernels = {}
 
-            else:
+# Series with a larger fraction of missing observations are pickled with only the observed values and a 
+# bit mask of the missing ones
+compact_nan_fraction = 0.5
 
+# Upper bounds in seconds of the buckets of timing histograms in fredpy.stats()
+histogram_buckets = [0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10,float('inf')]
 
-                path = 'fred/series'
+# Counters and timing histograms. Read with fredpy.stats() and reset with fredpy.reset_stats()
+_stats = {}
+_stats_lock = threading.Lock()
 
-                parameters = {'series_id':series_id,
-                  'realtime_start':observation_date,
-                  'realtime_end':observation_date,
-                  'file_type':'json'
-                 }
+# Functions called for each recorded event. Keys are event names. See fredpy.add_hook()
+_hooks = {}
 
-                r = fred_api_request(api_key=api_key,path=path,parameters=parameters)
-                results = r.json()
+# Initialize cache dictionary
+series_cache = {}
 
-                self.series_id = series_id
-                self.title = results['seriess'][0]['title']
-                self.frequency = results['seriess'][0]['frequency']
-                self.frequency_short = results['seriess'][0]['frequency_short']
-                self.observation_date = datetime.datetime.strptime(observation_date,"%Y-%m-%d").strftime('%B %d, %Y')
-                self.units = results['seriess'][0]['units']
-                self.units_short = results['seriess'][0]['units_short']
-                self.seasonal_adjustment = results['seriess'][0]['seasonal_adjustment']
-                self.seasonal_adjustment_short = results['seriess'][0]['seasonal_adjustment_short']
-                self.last_updated = results['seriess'][0]['last_updated']
-                
-                try:
-                    self.notes = results['seriess'][0]['notes']
-                except:
-                    self.notes = ''
+# Expired entries removed from series_cache. Used when the FRED API is unavailable. See fredpy.serve_stale
+stale_cache = {}
 
-                obs_per_year = {'D':365,'W':52,'M':12,'Q':4,'SA':2,'A':1}
-                try:
-                    self.t = obs_per_year[self.frequency_short]
-                except:
-                    self.t = np.nan
+# Times at which entries in series_cache stop being valid. Series downloaded for a specific observation
+# date do not expire.
+cache_expiration = {}
 
+# Upcoming release dates for each release ID. Used to set cache expiration times
+release_calendar = {}
 
-                path = 'fred/series/observations'
+# How long a series is cached on a release day before the new data for the release are posted
+release_day_ttl = pd.Timedelta(minutes=15)
 
-                parameters = {'series_id':series_id,
-                  'realtime_start':observation_date,
-                  'realtime_end':observation_date,
-                  'file_type':'json'
-                 }
+# Memory maps of the shared memory segments of fredpy.shared_series instances created by other processes.
+# Keys are names. An entry is removed when no series or shared_series in the process uses the map
+_shared_segments = weakref.WeakValueDictionary()
+_shared_segments_lock = threading.Lock()
 
-                r = fred_api_request(api_key=api_key,path=path,parameters=parameters)
-                results = r.json()
+# Lock for creating the data of series with integer period indexes. See fredpy.series.data
+_data_lock = threading.Lock()
 
-                data = pd.DataFrame(results['observations'],columns =['date','value'])
-                data = data.replace('.', np.nan)
-                data['date'] = pd.to_datetime(data['date'])
-                
-                data = data.set_index('date')['value'].astype(float)
+# Peak and trough dates from cycle_dates as numpy arrays. Recomputed when cycle_dates changes. See _recession_intervals()
+_recession_cache = {'cycle_dates':None,'peaks':None,'troughs':None}
 
-                # Try to infer frequency:
-                try:
-                    data = data.asfreq(pd.infer_freq(data.index))
-                except:
-                    pass
+# Length of the period that starts on each observation date for each FRED frequency abbreviation
+period_lengths = {'D':pd.DateOffset(days=1),'W':pd.DateOffset(days=7),'BW':pd.DateOffset(days=14),'M':pd.DateOffset(months=1),
+                  'Q':pd.DateOffset(months=3),'SA':pd.DateOffset(months=6),'A':pd.DateOffset(years=1)}
 
-                self.data = data
-                self.date_range = 'Range: '+str(self.data.index[0])[:10]+' to '+str(self.data.index[-1])[:10]
+# Attributes of a series other than data. Used to store series metadata with the observations
+_metadata_attributes = ['date_range','frequency','frequency_short','last_updated','notes','observation_date','release',
+                        'release_id','seasonal_adjustment','seasonal_adjustment_short','series_id','source','t','title',
+                        'units','units_short']
 
+# Transformations that the FRED API can compute on the server. Values are (units, units_short, title prefix)
+# used for the downloaded series and match the metadata assigned by the equivalent fredpy methods:
+#   'pch' ~ .pc(), 'pca' ~ .pc(annualized=True), 'cch' ~ .pc(log=True), 'cca' ~ .pc(log=True,annualized=True),
+#   'pc1' ~ .apc(), 'log' ~ .log()
+fred_units = {'chg':(None,None,'Change in '),
+              'ch1':(None,None,'Change from Year Ago in '),
+              'pch':('Percent','%','Percentage Change in '),
+              'pc1':('Percent','%','Annual Percentage Change in '),
+              'pca':('Percent','%','Percentage Change in '),
+              'cch':('Percent','%','Percentage Change in '),
+              'cca':('Percent','%','Percentage Change in '),
+              'log':('Log ','Log ','Log ')
+              }
 
+# Number of observations per year for each FRED frequency abbreviation
+obs_per_year = {'D':365,'W':52,'M':12,'Q':4,'SA':2,'A':1}
 
-                path = 'fred/series/release'
+# Frequencies and aggregation methods that the FRED API can compute on the server
+fred_frequencies = {'D':'Daily','W':'Weekly','BW':'Biweekly','M':'Monthly','Q':'Quarterly','SA':'Semiannual','A':'Annual'}
+fred_aggregation_methods = {'mean':'avg','avg':'avg','sum':'sum','last':'eop','eop':'eop'}
 
-                parameters = {'series_id':series_id,
-                  'realtime_start':observation_date,
-                  'realtime_end':observation_date,
-                  'file_type':'json'
-                 }
 
-                r = fred_api_request(api_key=api_key,path=path,parameters=parameters)
-                results = r.json()
+def _histogram():
 
-                self.release = results['releases'][0]['name']
-                release_id = results['releases'][0]['id']
+    '''Returns an empty timing histogram.'''
 
+    return {'count':0,'sum':0.0,'buckets':{b:0 for b in histogram_buckets}}
 
-                path = 'fred/release/sources'
 
-                parameters = {'series_id':series_id,
-                  'release_id':release_id,
-                  'file_type':'json'
-                 }
+def _empty_stats():
 
-                r = fred_api_request(api_key=api_key,path=path,parameters=parameters)
-                results = r.json()
+    '''Returns counters and timing histograms with no recorded events.'''
 
-                self.source = results['sources'][0]['name']
+    return {'requests':{},'cache':{'hits':0,'misses':0,'evictions':0,'coalesced':0,'revalidations':0,'not_modified':0},'parse':{'observations':0,'time':_histogram()}}
 
-                if cache:
 
-                    series_cache[series_id+'_'+observation_date] = self.copy()
+def _observe(histogram,seconds):
 
-        else:
+    '''Adds a time to a timing histogram.'''
 
-            self.date_range = ''
-            self.data = pd.Series([],pd.to_datetime([]),dtype=np.float64)
-            self.frequency = ''
-            self.frequency_short = ''
-            self.last_updated = ''
-            self.notes = ''
-            self.observation_date = ''
-            self.release = ''
-            self.seasonal_adjustment = ''
-            self.seasonal_adjustment_short = ''
-            self.series_id = ''
-            self.source = ''
-            self.t = 0
-            self.title = ''
-            self.units = ''
-            self.units_short = ''
+    histogram['count']+=1
+    histogram['sum']+=seconds
+
+    for b in histogram_buckets:
+        if seconds <= b:
+            histogram['buckets'][b]+=1
+            break
+
+
+def _record_event(event,**info):
 
+    '''Updates the counters in _stats for an event and calls the hooks registered for the event.
     
-    def apc(self,log=False,backward=True):
+    Events:
+        'request':          An HTTP request to the FRED API. info: path, status_code, seconds, bytes
+        'retry':            A request that will be retried. info: path, status_code, sleep
+        'cache_hit':        A series found in series_cache. info: key
+        'cache_miss':       A series not found in series_cache. info: key
+        'cache_eviction':   An expired series removed from series_cache. info: key
+        'coalesced':        A download shared with a concurrent request for the same series. info: key
+        'revalidation':     An expired series checked with its last_updated value. info: key, modified
+        'parse':            Observations parsed into a series. info: series_id, seconds, n_obs
+    '''
 
-        '''Computes the percentage change in the data over one year.
+    with _stats_lock:
 
-        Args:
-            log (bool):      If True, computes the percentage change as 100⋅log[x(t)/x(t-k)], where k is
-                                 the number of observations per year.
-                             If False (default), compute the percentage change as 100⋅[(x(t)/x(k−1)−1].
-            backward (bool): If True (default), compute percentage change from the previous year. 
-                                 If False, compute percentage change from current to next year.
+        if len(_stats)==0:
+            _stats.update(_empty_stats())
 
-        Returns:
-            fredpy series
-        '''
+        if event in ['request','retry'] and info['path'] not in _stats['requests'].keys():
+            _stats['requests'][info['path']] = {'count':0,'bytes':0,'status_codes':{},'retries':0,'sleep':0.0,'latency':_histogram()}
 
-        new_series = self.copy()
-        
-        T = len(self.data)
-        
-        if backward==True:
-            ratio = self.data/self.data.shift(self.t)
-        else:
-            ratio = self.data.shift(-self.t)/self.data
-            
-        if log==True:
-            new_series.data = 100*np.log(ratio).dropna()
-        else:
-            new_series.data = 100*(ratio-1).dropna()
-                               
-        new_series.units = 'Percent'
-        new_series.units_short = '%'
-        new_series.title = 'Annual Percentage Change in '+self.title
-        new_series.date_range = 'Range: '+str(new_series.data.index[0])[:10]+' to '+str(new_series.data.index[-1])[:10]
+        if event == 'request':
 
-        return new_series
+            path_stats = _stats['requests'][info['path']]
+            path_stats['count']+=1
+            path_stats['bytes']+=info['bytes']
+            path_stats['status_codes'][info['status_code']] = path_stats['status_codes'].get(info['status_code'],0)+1
+            _observe(path_stats['latency'],info['seconds'])
 
-    
-    def as_frequency(self,freq=None,method='mean'):
+        elif event == 'retry':
 
-        '''Convert a fredpy series to a lower frequency.
+            path_stats = _stats['requests'][info['path']]
+            path_stats['retries']+=1
+            path_stats['sleep']+=info['sleep']
 
-        Args:
-            freq (string):      Abbreviation of desired frequency: 'D','W','M','Q','A'
-            method (string):    How to resample the data: 'first', 'last', 'mean' (default), 'median',
-                                    'min', 'max', 'sum'
-        Returns:
-            fredpy series
-        '''
+        elif event == 'cache_hit':
+            _stats['cache']['hits']+=1
 
-        new_series = self.copy()
+        elif event == 'cache_miss':
+            _stats['cache']['misses']+=1
 
-        obs_per_year = {'D':365,'W':52,'M':12,'Q':4,'A':1}
-        map_of_freqency_abbreviations = {'D':'Daily','W':'Weekly','M':'Monthly','Q':'Quarterly','A':'Annual'}
+        elif event == 'cache_eviction':
+            _stats['cache']['evictions']+=1
 
+        elif event == 'coalesced':
+            _stats['cache']['coalesced']+=1
 
-        try:
-            new_series.t = obs_per_year[freq]
-            new_series.frequency_short=freq
-            new_series.frequency=map_of_freqency_abbreviations[freq]
+        elif event == 'revalidation':
+            _stats['cache']['revalidations']+=1
+            if not info['modified']:
+                _stats['cache']['not_modified']+=1
 
-        except:
-            raise ValueError("freq must be 'D', 'W', 'M', 'Q', or 'A'")
+        elif event == 'parse':
+            _stats['parse']['observations']+=info['n_obs']
+            _observe(_stats['parse']['time'],info['seconds'])
 
-        if self.t<new_series.t:
-            warnings.warn('Warning: You are converting series to a higher frequency and this method may not behave as you expect.')
+        hooks = list(_hooks.get(event,[]))+list(_hooks.get('*',[]))
 
-        map_to_pandas_frequencies = {'D':'D','W':'W','M':'MS','Q':'QS','A':'YS'}
+    for hook in hooks:
+        hook(event,info)
 
-        if method == 'first':
 
-            new_series.data = self.data.resample(map_to_pandas_frequencies[freq]).first()
+def _attach_shared_memory(name):
 
-        elif method == 'last':
+    '''Returns a memory map of the shared memory segment with name. The map is reused while series in
+    the process are views of it. The segment itself is closed right away because the map remains valid.'''
 
-            new_series.data = self.data.resample(map_to_pandas_frequencies[freq]).last()
+    with _shared_segments_lock:
 
-        elif method == 'mean':
+        memory_map = _shared_segments.get(name)
 
-            new_series.data = self.data.resample(map_to_pandas_frequencies[freq]).mean()
+        if memory_map is None:
 
-        elif method == 'median':
+            # Only the process that created the segment may remove it (Python 3.13 and later)
+            try:
+                segment = multiprocessing.shared_memory.SharedMemory(name=name,track=False)
+            except TypeError:
+                segment = multiprocessing.shared_memory.SharedMemory(name=name)
 
-            new_series.data = self.data.resample(map_to_pandas_frequencies[freq]).median()
+            memory_map = _map_shared_memory(segment)
+            segment.close()
 
-        elif method == 'min':
+            _shared_segments[name] = memory_map
 
-            new_series.data = self.data.resample(map_to_pandas_frequencies[freq]).min()
+        return memory_map
 
-        elif method == 'max':
 
-            new_series.data = self.data.resample(map_to_pandas_frequencies[freq]).max()
+def _cache_key(series_id,observation_date=None,options=None):
 
-        elif method == 'sum':
+    '''Returns the key used to store a series in series_cache. Series downloaded with fetch options
+    are stored separately from the untransformed series. The most recent vintage of a series is 
+    stored with observation_date equal to None.'''
 
-            new_series.data = self.data.resample(map_to_pandas_frequencies[freq]).sum()
+    if observation_date is None:
+        key = series_id+'_latest'
+    else:
+        key = series_id+'_'+observation_date
 
-        new_series.date_range = 'Range: '+str(new_series.data.index[0])[:10]+' to '+str(new_series.data.index[-1])[:10]
+    if options:
+        key+= '_'+'&'.join(k+'='+options[k] for k in sorted(options.keys()))
 
-        return new_series
+    return key
 
-    
-    def bp_filter(self,low=None,high=None,K=None):
 
-        '''Computes the bandpass (Baxter-King) filter of the data. Returns two fredpy.series
-        instances containing the cyclical and trend components of the data:
+def _downsample(data,method,n_buckets=None,ax=None):
 
-            new_series_cycle,new_series_trend
+    '''Returns a Pandas Series with a subset of the observations in data that preserves the shape of
+    its plot. method is 'lttb' (largest triangle three buckets) or 'minmax' (the minimum and maximum 
+    in each bucket). The number of buckets defaults to the width of ax in pixels. Missing values are 
+    dropped.'''
 
-        .. Note: 
-            In computing the bandpass filter, K observations are lost from each end of the
-            original series to the data are 2K elements shorter than in the original series.
+    if method not in ['lttb','minmax']:
+        raise ValueError("downsample must be None, 'lttb', or 'minmax'")
 
-        Args:
-            low (int):  Minimum period for oscillations. Default: None, recommendation used.
-            high (int): Maximum period for oscillations. Default: None, recommendation used.
-            K (int):    Lead-lag length of the filter. Default: None, recommendation used.
+    if n_buckets is None:
 
-        Recommendations:
+        if ax is None:
+            ax = plt.gca()
 
-            Monthly data:   low=24, high=84, K=84
-            Quarterly data: low=6, high=32, K=12
-            Annual data:    low=1.5, high=8, K=3
+        n_buckets = int(ax.get_window_extent().width)
 
-        Returns:
-            two fredpy.series instances
-        '''
+    n_buckets = max(int(n_buckets),3)
 
-        new_series_cycle = self.copy()
-        new_series_trend = self.copy()
+    data = data[np.isfinite(data.to_numpy(dtype=float,na_value=np.nan))]
 
-        if all(v is None for v in [low, high, K]) and self.frequency_short=='M':
-            low=24
-            high=84
-            K=84
+    # Dates in days since the first observation
+    x = (data.index.values-data.index.values[:1]).astype('timedelta64[s]').astype(float)/86400
+    y = data.to_numpy(dtype=float)
 
-        elif all(v is None for v in [low, high, K]) and self.frequency_short=='Q':
-            low=6
-            high=32
-            K=12
+    if method=='lttb':
+        positions = _lttb(x,y,n_buckets)
+    else:
+        positions = _minmax(x,y,n_buckets)
 
-        elif all(v is None for v in [low, high, K]) and self.frequency_short=='A':
-            low=1.5
-            high=8
-            K=3
+    return data.iloc[positions]
 
 
+def _fetch_options(units=None,frequency=None,aggregation_method=None,observation_start=None,observation_end=None):
 
-        # if low==6 and high==32 and K==12 and self.t !=4:
-        #     print('Warning: data frequency is not quarterly!')
-        # elif low==3 and high==8 and K==1.5 and self.t !=1:
-        #     print('Warning: data frequency is not annual!')
-            
-        cycle = tsa.filters.bkfilter(self.data,low=low,high=high,K=K)
-        actual = self.data.iloc[K:-K]
-        trend = actual - cycle
-        
-        new_series_cycle.data = cycle
-        new_series_cycle.units = 'Deviation relative to trend'
-        new_series_cycle.units_short = 'Dev. rel. to trend'
-        new_series_cycle.title = self.title+' - deviation relative to trend (bandpass filtered)'
-        new_series_cycle.date_range = 'Range: '+str(new_series_cycle.data.index[0])[:10]+' to '+str(new_series_cycle.data.index[-1])[:10]
+    '''Validates options for the fred/series/observations path and returns them as a dictionary of
+    API parameters. Options equal to None are omitted.'''
 
-        new_series_trend.data = trend
-        new_series_trend.title = self.title+' - trend (bandpass filtered)'
-        new_series_trend.date_range = 'Range: '+str(new_series_trend.data.index[0])[:10]+' to '+str(new_series_trend.data.index[-1])[:10]
+    options = {}
 
-        return new_series_cycle,new_series_trend
+    if units is not None and units != 'lin':
 
+        if units not in fred_units.keys():
+            raise ValueError("units must be one of: 'lin', "+", ".join("'"+u+"'" for u in fred_units.keys()))
 
-    def cf_filter(self,low=None,high=None):
+        options['units'] = units
 
-        '''Computes the Christiano-Fitzgerald (CF) filter of the data. Returns two fredpy.series
-        instances containing the cyclical and trend components of the data:
+    if frequency is not None:
 
-            new_series_cycle,new_series_trend
+        if frequency.upper() not in fred_frequencies.keys():
+            raise ValueError("frequency must be one of: "+", ".join("'"+f+"'" for f in fred_frequencies.keys()))
 
-        Args:
-            low (int):  Minimum period for oscillations. Default: None. 18 for monthly data, 6 for quarterly 
-                        data, and 2 for annual data.
-            high (int): Maximum period for oscillations. Default: None. 96 for monthly data, 32 for quarterly 
-                        data, and 8 for annual data.
+        options['frequency'] = frequency.lower()
 
-        Recommendations:
+    if aggregation_method is not None:
 
-            Monthly data:   low=18, high=96
-            Quarterly data: low=6, high=32
-            Annual data:    low=2, high=8
+        if frequency is None:
+            raise ValueError('aggregation_method requires frequency')
 
-        Returns:
-            two fredpy.series instances
-        '''
+        try:
+            options['aggregation_method'] = fred_aggregation_methods[aggregation_method]
+        except:
+            raise ValueError("aggregation_method must be 'mean', 'sum', or 'last'")
 
-        new_series_cycle = self.copy()
-        new_series_trend = self.copy()
+    if observation_start is not None:
+        options['observation_start'] = pd.to_datetime(observation_start).strftime('%Y-%m-%d')
 
-        if all(v is None for v in [low, high]) and self.frequency_short=='M':
-            low=18
-            high=96
+    if observation_end is not None:
+        options['observation_end'] = pd.to_datetime(observation_end).strftime('%Y-%m-%d')
 
-        elif all(v is None for v in [low, high]) and self.frequency_short=='Q':
-            low=6
-            high=32
+    return options
 
-        elif all(v is None for v in [low, high]) and self.frequency_short=='A':
-            low=2
-            high=8
 
-        # if low==6 and high==32 and self.t !=4:
-        #     print('Warning: data frequency is not quarterly!')
-        # elif low==1.5 and high==8 and self.t !=4:
-        #     print('Warning: data frequency is not quarterly!')
+def _import_pyarrow():
 
-        actual = self.data
-        cycle, trend = tsa.filters.cffilter(self.data,low=low, high=high, drift=False)
+    '''Returns the pyarrow module. pyarrow is only required for Arrow and Parquet input and output.'''
 
-        new_series_cycle.data = cycle
-        new_series_cycle.units = 'Deviation relative to trend'
-        new_series_cycle.units_short = 'Dev. rel. to trend'
-        new_series_cycle.title = self.title+' - deviation relative to trend (CF filtered)'
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError('pyarrow is required for Arrow and Parquet support. Install with: pip install pyarrow')
 
-        new_series_trend.data = trend
-        new_series_trend.title = self.title+' - trend (CF filtered)'
+    return pyarrow
 
-        return new_series_cycle,new_series_trend
 
-    
-    def copy(self):
+def _lttb(x,y,n_out):
 
-        '''Returns a copy of a series object.
+    '''Returns the positions of n_out points selected from x and y with the largest triangle three 
+    buckets algorithm. The first and last points are always kept.'''
 
-        Args:
+    n_obs = len(x)
 
-        Returs:
-            fredpy series
-        '''
+    if n_obs <= n_out:
+        return np.arange(n_obs)
 
-        new_series = series()
+    # Buckets of nearly equal size between the first and last points
+    edges = (np.arange(n_out-1)*(n_obs-2)/(n_out-2)).astype(int)+1
+    edges[-1] = n_obs-1
+    counts = np.diff(edges)
 
+    x_means = np.r_[np.add.reduceat(x,edges[:-1])/counts,x[-1]]
+    y_means = np.r_[np.add.reduceat(y,edges[:-1])/counts,y[-1]]
 
-        new_series.data = self.data.copy()
-        new_series.date_range = self.date_range
-        new_series.frequency = self.frequency
-        new_series.frequency_short = self.frequency_short
-        new_series.last_updated = self.last_updated
-        new_series.notes = self.notes
-        new_series.release = self.release
+    positions = np.empty(n_out,dtype=np.int64)
+    positions[0] = 0
+    positions[-1] = n_obs-1
+
+    a = 0
+
+    for i in range(n_out-2):
+
+        x_bucket = x[edges[i]:edges[i+1]]
+        y_bucket = y[edges[i]:edges[i+1]]
+
+        areas = np.abs((x[a]-x_means[i+1])*(y_bucket-y[a])-(x[a]-x_bucket)*(y_means[i+1]-y[a]))
+        a = edges[i]+int(np.argmax(areas))
+        positions[i+1] = a
+
+    return positions
+
+
+def _map_item(function,item):
+
+    '''Returns (True, function(item)) or (False, error) so that an error for one item does not stop
+    fredpy.map_series().'''
+
+    try:
+
+        if isinstance(item,_shared_reference):
+            item = item.series()
+
+        return True, function(item)
+
+    except Exception as error:
+        return False, error
+
+
+def _map_shared_memory(segment):
+
+    '''Returns a new memory map of a shared memory segment. Arrays created from the map keep it open, so
+    unlike the buffer of the segment, the memory remains valid after the segment is closed.'''
+
+    if os.name == 'nt':
+        return mmap.mmap(-1,segment.size,tagname=segment.name)
+    else:
+        return mmap.mmap(segment._fd,segment.size)
+
+
+def _minmax(x,y,n_buckets):
+
+    '''Returns the positions of the first and last points and of the minimum and maximum of y in each 
+    of n_buckets buckets of equal width in x.'''
+
+    n_obs = len(x)
+
+    if n_obs <= 2*n_buckets:
+        return np.arange(n_obs)
+
+    buckets = np.minimum(((x-x[0])/(x[-1]-x[0])*n_buckets).astype(np.int64),n_buckets-1)
+    starts = np.flatnonzero(np.r_[True,buckets[1:]!=buckets[:-1]])
+    ends = np.r_[starts[1:],n_obs]
+
+    # Sort by y within each bucket
+    order = np.lexsort((y,buckets))
+
+    return np.unique(np.r_[0,order[starts],order[ends-1],n_obs-1])
+
+
+def _paged_results(path,parameters,key,limit=1000,index=None,client=None):
+
+    '''Generator over the records in key of a paged FRED API path. The next page is requested in a
+    background thread while the records from the current page are consumed. Records are added to
+    index if index is not None.'''
+
+    client = _client(client)
+
+    def get_page(offset):
+
+        page_parameters = dict(parameters)
+        page_parameters.update({'limit':limit,'offset':offset,'file_type':'json'})
+
+        r = client.request(path,page_parameters)
+        return r.json()
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+    try:
+
+        offset = 0
+        future = executor.submit(get_page,offset)
+
+        while future is not None:
+
+            results = future.result()
+            records = results[key]
+            offset+= len(records)
+
+            if len(records)>0 and offset < int(results['count']):
+                future = executor.submit(get_page,offset)
+            else:
+                future = None
+
+            if index is not None:
+                index.add(records)
+
+            for record in records:
+                yield record
+
+    finally:
+        executor.shutdown(wait=False,cancel_futures=True)
+
+
+def _period_dates(start,step,n_obs):
+
+    '''Returns the dates of n_obs observations that begin in month start (months since January 1970) and
+    are step months apart. The frequency of the index is inferred as for downloaded series.'''
+
+    dates = (np.datetime64(int(start),'M')+step*np.arange(n_obs)).astype('datetime64[us]')
+
+    if n_obs >= 3:
+        return pd.DatetimeIndex(dates,freq='infer')
+    else:
+        return pd.DatetimeIndex(dates)
+
+
+def _period_date_range(start,step,n_obs):
+
+    '''Returns the date_range string of a series with an integer period index.'''
+
+    if n_obs == 0:
+        return 'Range: Null'
+
+    first = np.datetime64(int(start),'M').astype('datetime64[D]')
+    last = np.datetime64(int(start+step*(n_obs-1)),'M').astype('datetime64[D]')
+
+    return 'Range: '+str(first)+' to '+str(last)
+
+
+def _period_step(index):
+
+    '''Returns the number of months between observations if index has a monthly, quarterly, or annual 
+    frequency with observations on the first day of months and None otherwise.'''
+
+    freq = index.freq
+
+    if isinstance(freq,pd.offsets.MonthBegin):
+        step = freq.n
+    elif isinstance(freq,pd.offsets.QuarterBegin):
+        step = 3*freq.n
+    elif isinstance(freq,pd.offsets.YearBegin):
+        step = 12*freq.n
+    else:
+        return None
+
+    if step < 1 or len(index) == 0 or index[0] != index[0].normalize():
+        return None
+
+    return step
+
+
+def _recession_bars(ax,recession_starts,recession_ends,color='0.5',alpha=0.5):
+
+    '''Draws recession bars from arrays of starts and ends on ax as one collection and returns it.'''
+
+    # Convert dates with the units of the x-axis, e.g., those set by Pandas plots
+    if not ax.xaxis.have_units():
+        ax.xaxis.update_units(recession_starts)
+
+    x0 = np.asarray(ax.convert_xunits(recession_starts),dtype=float)
+    x1 = np.asarray(ax.convert_xunits(recession_ends),dtype=float)
+
+    # Bars span the height of the axis: x in data coordinates and y in axis coordinates
+    vertices = np.stack([np.column_stack([x0,np.zeros(len(x0))]),np.column_stack([x0,np.ones(len(x0))]),
+                         np.column_stack([x1,np.ones(len(x0))]),np.column_stack([x1,np.zeros(len(x0))])],axis=1)
+
+    bars = matplotlib.collections.PolyCollection(vertices,transform=ax.get_xaxis_transform(),edgecolor=color,facecolor=color,alpha=alpha)
+    ax.add_collection(bars,autolim=False)
+
+    if len(x0)>0:
+        ax.update_datalim(np.column_stack([np.r_[x0,x1],np.zeros(2*len(x0))]),updatey=False)
+        ax.autoscale_view(scaley=False)
+
+    return bars
+
+
+def _recession_intervals(start=None,end=None,peaks=None,troughs=None):
+
+    '''Returns arrays of the starts and ends of the recessions in cycle_dates that overlap the window from
+    start to end, clipped to the window. Peaks and troughs are converted to arrays once for each value
+    of cycle_dates. Arrays of peaks and troughs can be given instead, e.g., in worker processes.'''
+
+    if peaks is None or troughs is None:
+
+        if _recession_cache['cycle_dates'] is not cycle_dates or len(_recession_cache['peaks']) != len(cycle_dates):
+
+            _recession_cache['cycle_dates'] = cycle_dates
+            _recession_cache['peaks'] = pd.to_datetime(cycle_dates['peaks']).values
+            _recession_cache['troughs'] = pd.to_datetime(cycle_dates['troughs']).values
+
+        peaks = _recession_cache['peaks']
+        troughs = _recession_cache['troughs']
+
+    if start is None:
+        start = peaks[0]
+
+    if end is None:
+        end = pd.Timestamp('today')
+
+    start = np.datetime64(pd.Timestamp(start),'ns')
+    end = np.datetime64(pd.Timestamp(end),'ns')
+
+    overlapping = (peaks < end) & (troughs > start)
+
+    return np.maximum(peaks[overlapping],start), np.minimum(troughs[overlapping],end)
+
+
+def _release_shared_memory(segment):
+
+    '''Removes a shared memory segment. The memory is freed when no process is attached.'''
+
+    try:
+        segment.unlink()
+    except FileNotFoundError:
+        pass
+
+    segment.close()
+
+
+def _render_chart(options,chart):
+
+    '''Renders a chart for fredpy.render() on a new Agg figure and returns the path of the file. chart is
+    a fredpy series or a dict with key 'series' and optional keys 'filename', 'title', and 'ylabel'.'''
+
+    if isinstance(chart,series):
+        chart = {'series':chart}
+
+    series_list = chart['series']
+
+    if isinstance(series_list,series):
+        series_list = [series_list]
+
+    figure = matplotlib.figure.Figure(figsize=options['figsize'],dpi=options['dpi'])
+    matplotlib.backends.backend_agg.FigureCanvasAgg(figure)
+    ax = figure.add_subplot(1,1,1)
+
+    for s in series_list:
+
+        plot_kwargs = dict(options['plot_kwargs'])
+        if len(series_list)>1:
+            plot_kwargs.setdefault('label',s.series_id)
+
+        s.plot(downsample=options['downsample'],n_buckets=options['n_buckets'],ax=ax,**plot_kwargs)
+
+    if options['recession_bars'] and len(series_list)>0:
+
+        start = min(s.data.index[0] for s in series_list)
+        end = max(s.data.index[-1] for s in series_list)
+        recession_starts, recession_ends = _recession_intervals(start,end,options['peaks'],options['troughs'])
+
+        _recession_bars(ax,recession_starts,recession_ends)
+
+    ax.set_title(chart.get('title',series_list[0].title))
+    ax.set_ylabel(chart.get('ylabel',series_list[0].units_short))
+
+    if len(series_list)>1:
+        ax.legend()
+
+    filename = chart.get('filename',series_list[0].series_id+'.'+options['file_format'])
+    path = os.path.join(options['directory'],filename)
+
+    figure.savefig(path,format=options['file_format'])
+
+    return path
+
+
+def _set_combined_data(new_series,object1,object2,function):
+
+    '''Sets the data of new_series to function applied to the data of two series with the same 
+    observation dates. The values of series with integer period indexes are combined directly.'''
+
+    periods1 = object1._periods()
+    periods2 = object2._periods()
+
+    if periods1 is not None and periods2 is not None:
+
+        with np.errstate(all='ignore'):
+            values = function(periods1[2],periods2[2])
+
+        new_series._set_periods(periods1[0],periods1[1],values)
+
+    else:
+        new_series.data = function(object1.data,object2.data)
+
+
+def _same_dates(object1,object2):
+
+    '''Returns True if two series have the same observation dates. Series with integer period indexes
+    are compared without creating their dates.'''
+
+    periods1 = object1._periods()
+    periods2 = object2._periods()
+
+    if periods1 is not None and periods2 is not None:
+        return periods1[:2] == periods2[:2] and len(periods1[2]) == len(periods2[2])
+
+    return object1.data.index.equals(object2.data.index)
+
+
+def _shared_view(memory_map,size,record):
+
+    '''Returns a series with read-only data that are views of a memory map of a shared memory segment
+    written by fredpy.shared_series.'''
+
+    start, stop = record['offset'], record['offset']+record['length']
+
+    dates = np.ndarray((size,),dtype='datetime64[ns]',buffer=memory_map)[start:stop]
+    values = np.ndarray((size,),dtype=np.float64,buffer=memory_map,offset=8*size)[start:stop]
+
+    dates.flags.writeable = False
+    values.flags.writeable = False
+
+    new_series = series()
+    new_series.data = pd.Series(values,pd.DatetimeIndex(dates,copy=False),copy=False)
+
+    for attribute in _metadata_attributes:
+        setattr(new_series,attribute,record['attributes'][attribute])
+
+    return new_series
+
+
+def _split_cache_key(key):
+
+    '''Returns the series ID and fetch options of a series_cache key for the most recent vintage of a 
+    series. The inverse of _cache_key with observation_date equal to None.'''
+
+    series_id, options = key.split('_latest',1)
+
+    if len(options)==0:
+        return series_id, {}
+
+    return series_id, dict(option.split('=',1) for option in options[1:].split('&'))
+
+
+def _today():
+
+    '''Returns the current date in St. Louis, the date used by the FRED API for real-time periods and
+    release dates. YYYY-MM-DD'''
+
+    return pd.Timestamp.now(tz='America/Chicago').strftime('%Y-%m-%d')
+
+
+######################################################################################################
+# Kernels for filters and transforms. Kernels take numpy arrays with one row for each series so that
+# batches of series are computed in one call. Kernels named _*_loop are compiled with Numba if it is
+# installed and are otherwise replaced by the equivalent _*_numpy kernel, if there is one.
+
+# Aggregation methods for fredpy.series.as_frequency() in the order of the codes used by the kernels
+_aggregation_methods = ['first','last','mean','median','min','max','sum']
+
+
+def _aggregate_loop(table,method):
+
+    '''Returns the aggregate of each row of table that is not NaN. method is an index of 
+    _aggregation_methods. Rows with no values are NaN except for the sum, which is zero.'''
+
+    n_rows, n_columns = table.shape
+    result = np.empty(n_rows)
+    observed = np.empty(n_columns)
+
+    for i in range(n_rows):
+
+        n_observed = 0
+        for j in range(n_columns):
+            if not np.isnan(table[i,j]):
+                observed[n_observed] = table[i,j]
+                n_observed+= 1
+
+        if n_observed == 0:
+            result[i] = 0.0 if method == 6 else np.nan
+        elif method == 0:
+            result[i] = observed[0]
+        elif method == 1:
+            result[i] = observed[n_observed-1]
+        elif method == 2:
+            result[i] = np.mean(observed[:n_observed])
+        elif method == 3:
+            result[i] = np.median(observed[:n_observed])
+        elif method == 4:
+            result[i] = np.min(observed[:n_observed])
+        elif method == 5:
+            result[i] = np.max(observed[:n_observed])
+        else:
+            result[i] = np.sum(observed[:n_observed])
+
+    return result
+
+
+def _aggregate_numpy(table,method):
+
+    '''Numpy version of _aggregate_loop().'''
+
+    rows = np.arange(len(table))
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore',category=RuntimeWarning)
+
+        if method == 0:
+            return table[rows,np.argmax(~np.isnan(table),axis=1)]
+        elif method == 1:
+            return table[rows,table.shape[1]-1-np.argmax(~np.isnan(table[:,::-1]),axis=1)]
+        elif method == 2:
+            return np.nanmean(table,axis=1)
+        elif method == 3:
+            return np.nanmedian(table,axis=1)
+        elif method == 4:
+            return np.nanmin(table,axis=1)
+        elif method == 5:
+            return np.nanmax(table,axis=1)
+        else:
+            return np.nansum(table,axis=1)
+
+
+def _difference_filter(values):
+
+    '''Returns the cycle and trend of the first difference filter with NaN in the first column. The cycle
+    is the first difference less its mean and the trend is the previous value.'''
+
+    trend = np.full(values.shape,np.nan)
+    trend[:,1:] = values[:,:-1]
+
+    cycle = values-trend
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore',category=RuntimeWarning)
+        cycle = cycle-np.nanmean(cycle,axis=1,keepdims=True)
+
+    return cycle, trend
+
+
+def _hp_one_sided_loop(values,lamb):
+
+    '''Returns the trend of the one-sided HP filter: the last value of the two-sided HP trend of each 
+    sample that ends at each observation. The first two values are the data.
+
+    The two-sided trend solves (I + lamb K'K) trend = y where K computes second differences. The matrix 
+    is factored as L D L' with L lower triangular with two subdiagonals (l1 and l2). The rows of the 
+    matrix for samples of different lengths are the same except for the last two, so the factorization 
+    and the forward substitution are extended by one row for each observation and only the last two 
+    rows are recomputed. The last value of the trend is the last value of the forward substitution 
+    divided by the last element of D. Arrays are offset by two so that rows before the first are zero.'''
+
+    n_series, n_obs = values.shape
+    trend = np.empty((n_series,n_obs))
+
+    for k in range(n_series):
+
+        y = values[k]
+        d = np.zeros(n_obs+2)
+        l1 = np.zeros(n_obs+3)
+        l2 = np.zeros(n_obs+4)
+        z = np.zeros(n_obs+2)
+
+        for i in range(min(2,n_obs)):
+            trend[k,i] = y[i]
+
+        for m in range(3,n_obs+1):
+
+            # Row m-3 is the same for all longer samples
+            i = m-3
+
+            a0 = 1+lamb*(1+4*min(i,1)+min(max(i-1,0),1))
+            a1 = -lamb*(2+2*min(i,1))
+
+            d[i+2] = a0 - l1[i+2]**2*d[i+1] - l2[i+2]**2*d[i]
+            z[i+2] = y[i] - l1[i+2]*z[i+1] - l2[i+2]*z[i]
+            l2[i+4] = lamb/d[i+2]
+            l1[i+3] = (a1 - l2[i+3]*l1[i+2]*d[i+1])/d[i+2]
+
+            # Last two rows of the sample of m observations
+            r = m-2
+
+            a0 = 1+lamb*(4*min(r,1)+min(max(r-1,0),1))
+            a1 = -lamb*2*min(r,1)
+
+            d_r = a0 - l1[r+2]**2*d[r+1] - l2[r+2]**2*d[r]
+            z_r = y[r] - l1[r+2]*z[r+1] - l2[r+2]*z[r]
+            l1_last = (a1 - l2[r+3]*l1[r+2]*d[r+1])/d_r
+
+            d_last = 1+lamb - l1_last**2*d_r - l2[r+3]**2*d[r+1]
+            z_last = y[m-1] - l1_last*z_r - l2[r+3]*z[r+1]
+
+            trend[k,m-1] = z_last/d_last
+
+    return trend
+
+
+def _kernel(name):
+
+    '''Returns the kernel _<name>_loop compiled with Numba if Numba is installed and fredpy.use_numba is
+    True. Otherwise returns _<name>_numpy or, if there is no numpy version, _<name>_loop.'''
+
+    kernels = globals()
+
+    if use_numba:
+
+        if name not in _numba_kernels.keys():
+
+            try:
+                import numba
+                _numba_kernels[name] = numba.njit(cache=True)(kernels['_'+name+'_loop'])
+            except ImportError:
+                _numba_kernels[name] = None
+
+        if _numba_kernels[name] is not None:
+            return _numba_kernels[name]
+
+    return kernels.get('_'+name+'_numpy',kernels['_'+name+'_loop'])
+
+
+def _percent_change(values,lag,exponent=1,log=False,backward=True):
+
+    '''Returns 100⋅[(x(t)/x(t-lag))^exponent-1] or, if log is True, 100⋅exponent⋅log[x(t)/x(t-lag)] 
+    with NaN where x(t-lag) is not available. If backward is False, x(t+lag)/x(t) is used instead.'''
+
+    ratio = np.full(values.shape,np.nan)
+
+    with np.errstate(all='ignore'):
+
+        if lag < values.shape[1]:
+            if backward:
+                ratio[:,lag:] = values[:,lag:]/values[:,:values.shape[1]-lag]
+            else:
+                ratio[:,:values.shape[1]-lag] = values[:,lag:]/values[:,:values.shape[1]-lag]
+
+        if log:
+            return 100*exponent*np.log(ratio)
+        else:
+            return 100*(ratio**exponent-1)
+
+
+def _rolling_mean_loop(values,length):
+
+    '''Returns the mean of each window of length observations ending at each observation. Windows 
+    with missing values and the first length-1 observations are NaN.'''
+
+    n_series, n_obs = values.shape
+    result = np.full((n_series,n_obs),np.nan)
+
+    for k in range(n_series):
+
+        total = 0.0
+        n_missing = 0
+
+        for i in range(n_obs):
+
+            if np.isnan(values[k,i]):
+                n_missing+= 1
+            else:
+                total+= values[k,i]
+
+            if i >= length:
+                if np.isnan(values[k,i-length]):
+                    n_missing-= 1
+                else:
+                    total-= values[k,i-length]
+
+            if i >= length-1 and n_missing == 0:
+                result[k,i] = total/length
+
+    return result
+
+
+def _rolling_mean_numpy(values,length):
+
+    '''Numpy version of _rolling_mean_loop().'''
+
+    n_series, n_obs = values.shape
+    result = np.full((n_series,n_obs),np.nan)
+
+    if length > n_obs:
+        return result
+
+    missing = np.isnan(values)
+
+    totals = np.zeros((n_series,n_obs+1))
+    totals[:,1:] = np.cumsum(np.where(missing,0,values),axis=1)
+    counts = np.zeros((n_series,n_obs+1),dtype=np.int64)
+    counts[:,1:] = np.cumsum(missing,axis=1)
+
+    window_totals = totals[:,length:]-totals[:,:-length]
+    window_missing = counts[:,length:]-counts[:,:-length]
+
+    result[:,length-1:] = np.where(window_missing==0,window_totals/length,np.nan)
+
+    return result
+
+
+######################################################################################################
+# The FredClient class and methods
+
+class FredClient:
+
+    '''Defines a class that holds an API key, HTTP session, rate limiter, cache, and configuration for
+    requests to the FRED API. Instances are safe to use from multiple threads.'''
+
+    def __init__(self,api_key=None,base_url='https://api.stlouisfed.org/',transport=None,rate_limit=None,rate_period=60,
+                 request_timeout=(3.05,30),max_retries=10,retry_backoff=1,retry_backoff_max=60,request_deadline=None,
+                 circuit_breaker_threshold=5,circuit_breaker_reset=30,serve_stale=True,release_day_ttl=pd.Timedelta(minutes=15)):
+
+        '''Initializes an instance of the FredClient class. Pass the instance as the client argument of
+        fredpy.series, fredpy.release, and other functions that query the FRED API. If client is None,
+        the default client configured by module-level variables like fredpy.api_key, fredpy.series_cache,
+        and fredpy.base_url is used.
+
+        Args:
+            api_key (string):                   32-character alpha-numeric string. Default: None
+            base_url (string):                  Base URL of the FRED API. Default: 'https://api.stlouisfed.org/'
+            transport (object):                 Object with a get(url,timeout=None) method that returns a 
+                                                    requests.models.Response, e.g., a fredpy.replay_server. timeout
+                                                    is passed as for requests.get. Default: None, use the HTTP session.
+            rate_limit (int):                   Maximum number of requests per rate_period seconds. Default: None, 
+                                                    no limit. The FRED API allows 120 requests per minute.
+            rate_period (float):                Length in seconds of the rate_limit period. Default: 60
+            request_timeout (float or tuple):   Seconds to wait to connect and to read. Default: (3.05,30)
+            max_retries (int):                  Maximum retries after status codes 429 and 504 and timeouts. Default: 10
+            retry_backoff (float):              Seconds to wait before the first retry. Default: 1
+            retry_backoff_max (float):          Maximum seconds to wait before any retry. Default: 60
+            request_deadline (float):           Maximum total seconds for a request including retries. Default: None
+            circuit_breaker_threshold (int):    Consecutive failures before requests fail immediately. Default: 5
+            circuit_breaker_reset (float):      Seconds that requests fail immediately. Default: 30
+            serve_stale (bool):                 Whether to return expired cached series while requests fail 
+                                                    immediately. Default: True
+            release_day_ttl (Timedelta):        How long a series is cached on a release day before its new data
+                                                    are posted. Default: 15 minutes
+
+        Returns:
+            None
+
+        Attributes:
+            cache_expiration:                   (dict) times at which entries in series_cache stop being valid.
+            release_calendar:                   (dict) upcoming release dates for each release ID.
+            series_cache:                       (dict) cached series.
+            session:                            (requests.Session) HTTP session.
+            stale_cache:                        (dict) expired entries removed from series_cache.
+            sync_watermark:                     (Timestamp) time of the most recent sync. See fredpy.sync()
+        '''
+
+        self.api_key = api_key
+        self.base_url = base_url
+        self.transport = transport
+        self.rate_limit = rate_limit
+        self.rate_period = rate_period
+        self.request_timeout = request_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.retry_backoff_max = retry_backoff_max
+        self.request_deadline = request_deadline
+        self.circuit_breaker_threshold = circuit_breaker_threshold
+        self.circuit_breaker_reset = circuit_breaker_reset
+        self.serve_stale = serve_stale
+        self.release_day_ttl = release_day_ttl
+
+        self.session = requests.Session()
+        self.series_cache = {}
+        self.cache_expiration = {}
+        self.stale_cache = {}
+        self.release_calendar = {}
+        self.sync_watermark = None
+
+        self._lock = threading.RLock()
+        self._circuit = {'failures':0,'opened':None}
+        self._in_flight = {}
+        self._request_times = collections.deque()
+
+
+    def _acquire(self):
+
+        '''Waits until a request is allowed by rate_limit.'''
+
+        while self.rate_limit is not None:
+
+            with self._lock:
+
+                now = time.monotonic()
+
+                while len(self._request_times)>0 and now - self._request_times[0] >= self.rate_period:
+                    self._request_times.popleft()
+
+                if len(self._request_times) < self.rate_limit:
+                    self._request_times.append(now)
+                    return
+
+                wait = self.rate_period - (now - self._request_times[0])
+
+            time.sleep(wait)
+
+
+    def _cache_expiration(self,release_id,last_updated):
+
+        '''Returns the time at which a cached series from the release release_id stops being valid. A
+        series is valid until the next scheduled date of its release. On a release day, a series that
+        has already been updated is valid until the following release date and a series that has not
+        is valid for release_day_ttl. If the release has no scheduled dates or the release dates can't be
+        downloaded, the series is valid until the end of the day.'''
+
+        now = pd.Timestamp.now(tz='America/Chicago')
+        today = now.normalize()
+
+        with self._lock:
+            calendar = self.release_calendar.get(release_id)
+
+        if calendar is None or calendar[0] != today:
+
+            path = 'fred/release/dates'
+
+            parameters = {'release_id':release_id,
+              'realtime_start':today.strftime('%Y-%m-%d'),
+              'realtime_end':'9999-12-31',
+              'include_release_dates_with_no_data':'true',
+              'sort_order':'asc',
+              'limit':3,
+              'file_type':'json'
+             }
+
+            # Only the release day and the next release date are needed. The observations are already
+            # downloaded so a failed request only shortens the expiration
+            try:
+                r = self.request(path,parameters)
+                dates = pd.to_datetime([d['date'] for d in r.json()['release_dates']]).tz_localize('America/Chicago')
+            except (requests.exceptions.RequestException,FredAPIError,KeyError,ValueError):
+                return today + pd.Timedelta(days=1)
+
+            calendar = (today,dates[dates>=today].sort_values())
+
+            with self._lock:
+                self.release_calendar[release_id] = calendar
+
+        dates = calendar[1]
+
+        if len(dates)>0 and dates[0] == today:
+
+            if pd.to_datetime(last_updated).tz_convert('America/Chicago') < today:
+                return now + self.release_day_ttl
+
+            dates = dates[1:]
+
+        if len(dates)>0:
+            return dates[0]
+        else:
+            return today + pd.Timedelta(days=1)
+
+
+    def _cache_get(self,key):
+
+        '''Returns a copy of the series stored in series_cache with key or None if there is no valid entry.
+        Expired entries are moved to stale_cache. Events are recorded after the lock is released so that
+        hooks can use the cache.'''
+
+        with self._lock:
+
+            cached = self.series_cache.get(key)
+            evicted = False
+
+            if cached is not None and key in self.cache_expiration.keys() and pd.Timestamp.now(tz='America/Chicago') >= self.cache_expiration[key]:
+
+                self.stale_cache[key] = self.series_cache.pop(key)
+                self.cache_expiration.pop(key,None)
+
+                cached = None
+                evicted = True
+
+        if evicted:
+            _record_event('cache_eviction',key=key)
+
+        if cached is None:
+            _record_event('cache_miss',key=key)
+            return None
+
+        _record_event('cache_hit',key=key)
+        return cached.copy()
+
+
+    def _cache_set(self,key,cached_series,vintage=None):
+
+        '''Stores a copy of a series in series_cache with key. If vintage is None, the entry expires at the
+        next scheduled release of the series.'''
+
+        if vintage is None:
+            expiration = self._cache_expiration(cached_series.release_id,cached_series.last_updated)
+
+        with self._lock:
+
+            self.series_cache[key] = cached_series.copy()
+            self.stale_cache.pop(key,None)
+
+            if vintage is None:
+                self.cache_expiration[key] = expiration
+            else:
+                self.cache_expiration.pop(key,None)
+
+
+    def _last_updated(self,series_id):
+
+        '''Returns the last_updated value of a series from the fred/series path.'''
+
+        parameters = {'series_id':series_id,
+          'file_type':'json'
+         }
+
+        r = self.request('fred/series',parameters)
+
+        return r.json()['seriess'][0]['last_updated']
+
+
+    def _retry_wait(self,r,request_count):
+
+        '''Returns the seconds to wait before retrying a request. Uses the Retry-After header of the response
+        r if present and otherwise exponential backoff with random jitter.'''
+
+        if r is not None and 'Retry-After' in r.headers.keys():
+
+            retry_after = r.headers['Retry-After']
+
+            try:
+                return max(float(retry_after),0)
+            except ValueError:
+                try:
+                    retry_time = email.utils.parsedate_to_datetime(retry_after)
+                    return max((retry_time - datetime.datetime.now(datetime.timezone.utc)).total_seconds(),0)
+                except (TypeError,ValueError):
+                    pass
+
+        return np.random.uniform(0.5,1)*min(self.retry_backoff*2**request_count,self.retry_backoff_max)
+
+
+    def _revalidate(self,key,last_updated):
+
+        '''Returns a copy of the expired series stored in stale_cache with key and restores it to 
+        series_cache with a new expiration time if its last_updated value equals last_updated. Otherwise
+        returns None.'''
+
+        with self._lock:
+            stale = self.stale_cache.get(key)
+
+        modified = stale is None or stale.last_updated != last_updated
+
+        _record_event('revalidation',key=key,modified=modified)
+
+        if modified:
+            return None
+
+        self._cache_set(key,stale)
+
+        return stale.copy()
+
+
+    def _single_flight(self,key,function,cache=True):
+
+        '''Calls function() and returns the result. Concurrent calls with the same key wait for the first
+        call to finish and return the same result or raise the same error. If cache is True, a valid entry
+        in series_cache with key is returned instead of calling function() so that a call that starts just
+        after another call has stored its result does not repeat it.'''
+
+        cached = None
+
+        with self._lock:
+
+            future = self._in_flight.get(key)
+            leader = future is None
+
+            if leader and cache:
+
+                cached = self.series_cache.get(key)
+
+                if cached is not None and key in self.cache_expiration.keys() and pd.Timestamp.now(tz='America/Chicago') >= self.cache_expiration[key]:
+                    cached = None
+
+            if leader and cached is None:
+                future = concurrent.futures.Future()
+                self._in_flight[key] = future
+
+        if cached is not None:
+
+            _record_event('cache_hit',key=key)
+            return cached.copy()
+
+        if not leader:
+
+            _record_event('coalesced',key=key)
+            return future.result()
+
+        try:
+
+            result = function()
+            future.set_result(result)
+
+            return result
+
+        except BaseException as error:
+
+            future.set_exception(error)
+            raise
+
+        finally:
+
+            with self._lock:
+                self._in_flight.pop(key,None)
+
+
+    def _update_circuit(self,r):
+
+        '''Updates the state of the circuit breaker after a request. r is the response or None if the request
+        timed out or could not connect.'''
+
+        with self._lock:
+
+            if r is None or r.status_code >= 500:
+
+                self._circuit['failures']+=1
+
+                if self._circuit['failures'] >= self.circuit_breaker_threshold:
+                    self._circuit['opened'] = time.monotonic()
+
+            else:
+
+                self._circuit['failures'] = 0
+                self._circuit['opened'] = None
+
+
+    def release(self,release_id,observation_date=None):
+
+        '''Equivalent to fredpy.release(release_id,observation_date,client=self).'''
+
+        return release(release_id,observation_date=observation_date,client=self)
+
+
+    def request(self,path,parameters,timeout=None,deadline=None,api_key=None):
+
+        '''Queries the FRED API. Returns a requests.models.Response object if successful, otherwise will
+        raise an error with a message that is hopefully helpful. See fredpy.fred_api_request.
+
+        Args:
+            path (string):              API path.
+            parameters (dict):          Parameters for the API query.
+            timeout (float or tuple):   Seconds to wait to connect and to read. Default: None, request_timeout
+            deadline (float):           Maximum total seconds including retries. Default: None, request_deadline
+            api_key (string):           API key for this request. Default: None, use the api_key attribute
+
+        Returns:
+            requests.models.Response
+        '''
+
+        if api_key is None:
+            api_key = self.api_key
+
+        if timeout is None:
+            timeout = self.request_timeout
+
+        if deadline is None:
+            deadline = self.request_deadline
+
+        with self._lock:
+
+            if self._circuit['opened'] is not None and time.monotonic() - self._circuit['opened'] < self.circuit_breaker_reset:
+                raise CircuitOpenError('FRED API requests are failing. Retry in '+str(round(self.circuit_breaker_reset - time.monotonic() + self._circuit['opened']))+' seconds.')
+
+        status_code = None
+        request_count = 0
+        start = time.monotonic()
+
+        # Parameter values like search text can contain characters that are reserved in URLs
+        query = [('api_key',str(api_key).strip())]+[(key,str(value)) for key,value in parameters.items()]
+        request_url = self.base_url+path+'?'+urllib.parse.urlencode(query)
+
+        while request_count <= self.max_retries:
+
+            # Do not wait past the deadline for a response
+            attempt_timeout = timeout
+            if deadline is not None:
+                remaining = max(deadline - (time.monotonic() - start),0.001)
+                if type(timeout) == tuple:
+                    attempt_timeout = (min(timeout[0],remaining),min(timeout[1],remaining))
+                else:
+                    attempt_timeout = min(timeout,remaining)
+
+            self._acquire()
+
+            start_time = time.perf_counter()
+
+            try:
+
+                if self.transport is None:
+                    r = self.session.get(request_url,timeout=attempt_timeout)
+                else:
+                    r = self.transport.get(request_url,timeout=attempt_timeout)
+
+                status_code = r.status_code
+
+                _record_event('request',path=path,status_code=status_code,seconds=time.perf_counter()-start_time,bytes=len(r.content))
+
+            except (requests.exceptions.Timeout,requests.exceptions.ConnectionError) as error:
+
+                r = None
+                status_code = type(error).__name__
+
+                _record_event('request',path=path,status_code=status_code,seconds=time.perf_counter()-start_time,bytes=0)
+
+            self._update_circuit(r)
+
+            if status_code == 200:
+                break
+
+            elif status_code == 429 or status_code == 504 or r is None:
+
+                # Wait before retrying
+                sleep = self._retry_wait(r,request_count)
+
+                if request_count == self.max_retries:
+                    break
+
+                if deadline is not None and time.monotonic() - start + sleep > deadline:
+                    raise DeadlineExceeded('FRED API error: deadline of '+str(deadline)+' seconds exceeded. Status code: '+str(status_code),status_code)
+
+                with self._lock:
+                    if self._circuit['opened'] is not None:
+                        raise CircuitOpenError('FRED API requests are failing. Status code: '+str(status_code),status_code)
+
+                # Retries are reported with the 'retry' event. See fredpy.add_hook()
+                _record_event('retry',path=path,status_code=status_code,sleep=sleep)
+                time.sleep(sleep)
+
+            else:
+                r.raise_for_status()
+
+            request_count+=1
+
+        if status_code != 200:
+
+            raise FredAPIError('FRED API error: request failed after '+str(self.max_retries)+' retries. Status code: '+str(status_code),status_code)
+
+        return r
+
+
+    def revalidate(self,series_ids=None,force=False,max_workers=8):
+
+        '''Checks the last_updated values of expired series in series_cache and stale_cache with one 
+        fred/series request per series ID. Series that have not been updated are kept with a new 
+        expiration time and only series that have been updated are downloaded again. Series cached for
+        a specific observation date never expire and are not checked.
+
+        Args:
+            series_ids (list):  unique FRED series IDs to check. Default: None, all cached series.
+            force (bool):       Whether to also check series that have not expired. Default: False
+            max_workers (int):  Number of concurrent requests. Default: 8
+
+        Returns:
+            dict with series_cache keys as keys and 'not_modified' or 'updated' as values
+        '''
+
+        now = pd.Timestamp.now(tz='America/Chicago')
+        today = _today()
+
+        evicted = []
+
+        with self._lock:
+
+            # Move expired entries to stale_cache
+            for key,expiration in list(self.cache_expiration.items()):
+                if now >= expiration and key in self.series_cache.keys():
+                    self.stale_cache[key] = self.series_cache.pop(key)
+                    self.cache_expiration.pop(key)
+                    evicted.append(key)
+
+            keys = list(self.stale_cache.keys())
+
+            if force:
+                keys+= [key for key in self.cache_expiration.keys() if key in self.series_cache.keys()]
+                for key in keys:
+                    if key in self.series_cache.keys():
+                        self.stale_cache[key] = self.series_cache[key]
+
+            previous = {key:self.stale_cache[key].last_updated for key in keys}
+
+        # Hooks are called without the lock so that they can use the cache
+        for key in evicted:
+            _record_event('cache_eviction',key=key)
+
+        if series_ids is not None:
+            keys = [key for key in keys if _split_cache_key(key)[0] in series_ids]
+
+        # One metadata request for all of the cached variants of a series
+        grouped = {}
+        for key in keys:
+            grouped.setdefault(_split_cache_key(key)[0],[]).append(key)
+
+        def check(series_id):
+
+            last_updated = self._last_updated(series_id)
+            results = {}
+
+            for key in grouped[series_id]:
+
+                def refresh():
+
+                    revalidated = self._revalidate(key,last_updated)
+
+                    if revalidated is not None:
+                        return revalidated
+
+                    new_series = series()
+                    new_series._download(series_id,today,_split_cache_key(key)[1],self)
+                    self._cache_set(key,new_series)
+
+                    return new_series
+
+                # Shares the download with concurrent requests for the same series. Forced checks keep the
+                # entry in series_cache so it is not a sign that another request has already refreshed it
+                if self._single_flight(key,refresh,cache=not force).last_updated == previous[key]:
+                    results[key] = 'not_modified'
+                else:
+                    results[key] = 'updated'
+
+            return results
+
+        revalidated = {}
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for results in executor.map(check,grouped.keys()):
+                revalidated.update(results)
+
+        return revalidated
+
+
+    def series(self,series_id=None,observation_date=None,**kwargs):
+
+        '''Equivalent to fredpy.series(series_id,observation_date,client=self,**kwargs).'''
+
+        return series(series_id,observation_date=observation_date,client=self,**kwargs)
+
+
+# Client configured by the module-level variables. See _client()
+_default_client = FredClient()
+
+# Module-level variables copied to the default client before each use
+_default_client_attributes = ['api_key','base_url','transport','request_timeout','max_retries','retry_backoff',
+                              'retry_backoff_max','request_deadline','circuit_breaker_threshold','circuit_breaker_reset',
+                              'serve_stale','release_day_ttl','series_cache','cache_expiration','stale_cache',
+                              'release_calendar','sync_watermark']
+
+
+def _client(client=None):
+
+    '''Returns client or, if client is None, the default client updated with the current values of the
+    module-level configuration variables like fredpy.api_key and fredpy.series_cache.'''
+
+    if client is not None:
+        return client
+
+    module_variables = globals()
+
+    for name in _default_client_attributes:
+        setattr(_default_client,name,module_variables[name])
+
+    return _default_client
+
+
+######################################################################################################
+# The series class and methods
+
+class series:
+
+    '''Defines a class for downloading, storing, and manipulating data from FRED.'''
+
+    def __init__(self,series_id=None,observation_date=None,cache=True,units=None,frequency=None,aggregation_method=None,observation_start=None,observation_end=None,client=None):
+
+        '''Initializes an instance of the series class.
+
+        Args:
+            series_id (string):         unique FRED series ID. If series_id equals None, an empty series 
+                                            object is created.
+            observation_date (string):  MM-DD-YYYY or YYYY-MM-DD formatted state string. Indicates the final 
+                                            date at which the series is observed. I.e., excludes revisions made
+                                            after observation_date.
+            cache (bool):               Whether to store a copy of the series for the current session to reduce 
+                                            queries to the FRED API. Default: True
+            units (string):             Transformation computed by the FRED API before download. 'lin' (default,
+                                            no transformation), 'chg', 'ch1', 'pch', 'pc1', 'pca', 'cch', 'cca',
+                                            or 'log'. E.g., units='pc1' is equivalent to calling .apc().
+            frequency (string):         Lower frequency computed by the FRED API before download: 'D', 'W', 'BW',
+                                            'M', 'Q', 'SA', or 'A'. Equivalent to calling .as_frequency().
+            aggregation_method (string):How to aggregate to frequency: 'mean' (default), 'sum', or 'last'.
+            observation_start (string): Date of the first observation to download. Equivalent to calling .window().
+            observation_end (string):   Date of the last observation to download. Equivalent to calling .window().
+            client (FredClient):        Client used for requests and caching. Default: None, use the module-level
+                                            configuration (fredpy.api_key, fredpy.series_cache, etc.)
+
+        Returns:
+            None
+
+        Attributes:
+            data:                       (Pandas Series) data values with dates as index.
+                                            Regular monthly, quarterly, semiannual, and annual series
+                                            are stored with an integer period index and the dates are
+                                            created the first time that data is used.
+            date_range:                 (string) specifies the dates of the first and last observations.
+            frequency:                  (string) data frequency. 'Daily', 'Weekly', 'Monthly', 'Quarterly', 'Semiannual', or 'Annual'.
+            frequency_short:            (string) data frequency. Abbreviated. 'D', 'W', 'M', 'Q', 'SA, or 'A'.
+            last_updated:               (string) date series was last updated.
+            notes:                      (string) details about series. Not available for all series.
+            observation_date:           (string) vintage date at which data are observed. YYYY-MM-DD
+            release:                    (string) statistical release containing data.
+            release_id:                 (int) FRED ID of the statistical release containing data.
+            seasonal_adjustment:        (string) specifies whether the data has been seasonally adjusted.
+            seasonal_adjustment_short:  (string) specifies whether the data has been seasonally adjusted. Abbreviated.
+            series_id:                  (string) unique FRED series ID code.
+            source:                     (string) original source of the data.
+            t:                          (int) number corresponding to frequency: 365 for daily, 52 for weekly, 12 for monthly, 4 for quarterly, and 1 for annual.
+            title:                      (string) title of the data series.
+            units:                      (string) units of the data series.
+            units_short:                (string) units of the data series. Abbreviated.
+        '''
+
+        # Verify API key is stored
+        if type(series_id) == str:
+
+            client = _client(client)
+
+            if client.api_key is None:
+                raise ValueError('fredpy.api_key value not assigned. You need to provide your key for the FRED API.')
+
+        # Observation date for request
+        vintage = observation_date
+
+        if observation_date is None:
+
+            observation_date = _today()
+
+        else:
+
+            observation_date = pd.to_datetime(observation_date).strftime('%Y-%m-%d')
+
+        if type(series_id) == str:
+
+            options = _fetch_options(units=units,frequency=frequency,aggregation_method=aggregation_method,
+                                     observation_start=observation_start,observation_end=observation_end)
+
+            if vintage is not None:
+                vintage = observation_date
+
+            key = _cache_key(series_id,vintage,options)
+
+            cached = None
+            stale = False
+
+            if cache:
+                cached = client._cache_get(key)
+
+            if cached is None:
+
+                def download():
+
+                    # Check whether an expired copy is still current before downloading observations
+                    if cache and vintage is None and key in client.stale_cache.keys():
+
+                        revalidated = client._revalidate(key,client._last_updated(series_id))
+
+                        if revalidated is not None:
+                            return revalidated
+
+                    downloaded = series()
+                    downloaded._download(series_id,observation_date,options,client)
+
+                    if cache:
+                        client._cache_set(key,downloaded,vintage)
+
+                    return downloaded
+
+                try:
+
+                    # Concurrent requests for the same series share one download
+                    cached = client._single_flight(key,download,cache).copy()
+
+                except CircuitOpenError:
+
+                    # Serve an expired copy of the series while requests to the FRED API are failing
+                    if client.serve_stale and key in client.stale_cache.keys():
+                        cached = client.stale_cache[key].copy()
+                        stale = True
+                        warnings.warn('FRED API unavailable. Using cached copy of '+series_id+' that may be out of date.')
+                    else:
+                        raise
+
+            if cached is not None:
+
+                self.date_range = cached.date_range
+                self._data = cached._data
+                self._values = cached._values
+                self._period = cached._period
+                self.frequency = cached.frequency
+                self.frequency_short = cached.frequency_short
+                self.last_updated = cached.last_updated
+                self.notes = cached.notes
+                self.observation_date = datetime.datetime.strptime(observation_date,"%Y-%m-%d").strftime('%B %d, %Y')
+                self.release = cached.release
+                self.release_id = cached.release_id
+                self.seasonal_adjustment = cached.seasonal_adjustment
+                self.seasonal_adjustment_short = cached.seasonal_adjustment_short
+                self.series_id = cached.series_id
+                self.source = cached.source
+                self.t = cached.t
+                self.title = cached.title
+                self.units = cached.units
+                self.units_short = cached.units_short
+
+                if stale:
+                    self.observation_date = cached.observation_date
+
+        else:
+
+            self.date_range = ''
+            self.data = pd.Series([],pd.to_datetime([]),dtype=np.float64)
+            self.frequency = ''
+            self.frequency_short = ''
+            self.last_updated = ''
+            self.notes = ''
+            self.observation_date = ''
+            self.release = ''
+            self.release_id = ''
+            self.seasonal_adjustment = ''
+            self.seasonal_adjustment_short = ''
+            self.series_id = ''
+            self.source = ''
+            self.t = 0
+            self.title = ''
+            self.units = ''
+            self.units_short = ''
+
+
+    def __getstate__(self):
+
+        '''Returns the attributes of the series for pickling with the data stored as numpy arrays, which
+        are faster to pickle and smaller than a Pandas Series.'''
+
+        state = dict(self.__dict__)
+        data = state.pop('_data')
+
+        # Series with monthly, quarterly, or annual data are pickled with an integer period index instead of dates
+        if data is not None:
+
+            periods = self._periods() if data.name is None else None
+
+            if periods is not None:
+                state['_period'] = periods[:2]
+                state['_values'] = np.asarray(periods[2])
+            else:
+                state['_values'] = np.asarray(data.values)
+                state['_dates'] = np.asarray(data.index.values)
+                state['_freq'] = data.index.freqstr
+                state['_name'] = data.name
+
+        # Compact encoding of series with many missing values
+        if state['_values'].dtype.kind == 'f' and len(state['_values'])>0:
+
+            missing = np.isnan(state['_values'])
+
+            if np.count_nonzero(missing) > compact_nan_fraction*len(missing):
+                state['_values'] = state['_values'][~missing]
+                state['_missing'] = (np.packbits(missing),len(missing))
+
+        return state
+
+
+    def __setstate__(self,state):
+
+        '''Restores the attributes of the series from the state returned by __getstate__.'''
+
+        state = dict(state)
+        values = state.pop('_values')
+        period = state.pop('_period',None)
+
+        if '_missing' in state.keys():
+
+            packed, n_obs = state.pop('_missing')
+            missing = np.unpackbits(packed,count=n_obs).astype(bool)
+
+            observed = values
+            values = np.full(n_obs,np.nan,dtype=observed.dtype)
+            values[~missing] = observed
+
+        if period is not None:
+            self.__dict__.update(state)
+            self._set_periods(period[0],period[1],values)
+        else:
+            dates = state.pop('_dates')
+            freq = state.pop('_freq',None)
+            name = state.pop('_name')
+            self.__dict__.update(state)
+            self.data = pd.Series(values,pd.DatetimeIndex(dates,freq=freq,copy=False),name=name,copy=False)
+
+
+    @property
+    def data(self):
+
+        '''Pandas Series of data values with dates as index. For series with an integer period index, the
+        dates are created the first time that data is used. Concurrent readers get the same object.'''
+
+        if self._data is None:
+
+            with _data_lock:
+
+                if self._data is None:
+
+                    start, step = self._period
+
+                    # The values may be shared with other series so they are copied. _data is set before
+                    # _period and _values are cleared so that readers without the lock see one or the other
+                    self._data = pd.Series(np.array(self._values),_period_dates(start,step,len(self._values)),copy=False)
+                    self._period = None
+                    self._values = None
+
+        return self._data
+
+
+    @data.setter
+    def data(self,data):
+
+        self._data = data
+        self._values = None
+        self._period = None
+
+
+    def _download(self,series_id,observation_date,options,client=None):
+
+        '''Downloads the metadata and observations of a series from the FRED API.'''
+
+        client = _client(client)
+
+        path = 'fred/series'
+
+        parameters = {'series_id':series_id,
+          'realtime_start':observation_date,
+          'realtime_end':observation_date,
+          'file_type':'json'
+         }
+
+        r = client.request(path,parameters)
+        results = r.json()
+
+        self._set_metadata(results['seriess'][0],observation_date)
+        self.series_id = series_id
+
+
+        path = 'fred/series/observations'
+
+        parameters = {'series_id':series_id,
+          'realtime_start':observation_date,
+          'realtime_end':observation_date,
+          'file_type':'json'
+         }
+        parameters.update(options)
+
+        r = client.request(path,parameters)
+        results = r.json()
+
+        self._set_observations(results['observations'],options)
+
+
+        path = 'fred/series/release'
+
+        parameters = {'series_id':series_id,
+          'realtime_start':observation_date,
+          'realtime_end':observation_date,
+          'file_type':'json'
+         }
+
+        r = client.request(path,parameters)
+        results = r.json()
+
+        self.release = results['releases'][0]['name']
+        self.release_id = results['releases'][0]['id']
+
+
+        path = 'fred/release/sources'
+
+        parameters = {'series_id':series_id,
+          'release_id':self.release_id,
+          'file_type':'json'
+         }
+
+        r = client.request(path,parameters)
+        results = r.json()
+
+        self.source = results['sources'][0]['name']
+
+
+    def _observations(self):
+
+        '''Returns the values of the series as a numpy array without creating dates.'''
+
+        periods = self._periods()
+
+        if periods is not None:
+            return periods[2]
+        else:
+            return self.data.to_numpy()
+
+
+    def _periods(self):
+
+        '''Returns (start, step, values) for a series with an integer period index: the month of the first 
+        observation in months since January 1970, the number of months between observations, and a numpy 
+        array of the values. Series with a monthly, quarterly, or annual frequency in data.index are 
+        converted without copying. Returns None for other series.'''
+
+        # Read in the reverse of the order in which the data property clears them
+        values = self._values
+        period = self._period
+
+        if values is not None and period is not None:
+            return period[0], period[1], values
+
+        data = self._data
+        step = _period_step(data.index)
+
+        if step is None:
+            return None
+
+        start = int(data.index[:1].values.astype('datetime64[M]').astype(np.int64)[0])
+
+        return start, step, data.to_numpy()
+
+
+    def _set_metadata(self,record,observation_date):
+
+        '''Sets metadata attributes from a series record returned by the FRED API (e.g., an element of
+        'seriess' from the fred/series or fred/release/series paths).'''
+
+        self.series_id = record['id']
+        self.title = record['title']
+        self.frequency = record['frequency']
+        self.frequency_short = record['frequency_short']
+        self.observation_date = datetime.datetime.strptime(observation_date,"%Y-%m-%d").strftime('%B %d, %Y')
+        self.units = record['units']
+        self.units_short = record['units_short']
+        self.seasonal_adjustment = record['seasonal_adjustment']
+        self.seasonal_adjustment_short = record['seasonal_adjustment_short']
+        self.last_updated = record['last_updated']
+
+        try:
+            self.notes = record['notes']
+        except:
+            self.notes = ''
+
+        try:
+            self.t = obs_per_year[self.frequency_short]
+        except:
+            self.t = np.nan
+
+
+    def _set_observations(self,observations,options):
+
+        '''Sets data from observations returned by the fred/series/observations path and updates
+        metadata for transformations computed by the FRED API.'''
+
+        start_time = time.perf_counter()
+
+        data = pd.DataFrame(observations,columns =['date','value'])
+        data = data.replace('.', np.nan)
+        data['date'] = pd.to_datetime(data['date'])
+        
+        data = data.set_index('date')['value'].astype(float).astype(storage_dtype)
+
+        # Update metadata for transformations computed by the FRED API
+        if 'frequency' in options.keys():
+            self.frequency_short = options['frequency'].upper()
+            self.frequency = fred_frequencies[self.frequency_short]
+            try:
+                self.t = obs_per_year[self.frequency_short]
+            except:
+                self.t = np.nan
+
+        if 'units' in options.keys():
+            units_long, units_short, title_prefix = fred_units[options['units']]
+            if options['units'] == 'log':
+                self.units = units_long+self.units
+                self.units_short = units_short+self.units_short
+            elif units_long is not None:
+                self.units = units_long
+                self.units_short = units_short
+                data = data.dropna()
+            else:
+                data = data.dropna()
+            self.title = title_prefix+self.title
+
+        # Observations on the first days of months that are evenly spaced are stored with an integer 
+        # period index. Otherwise try to infer frequency
+        dates = data.index.values
+        months = dates.astype('datetime64[M]')
+        steps = np.diff(months.astype(np.int64))
+
+        if len(dates)>1 and steps[0]>0 and np.all(steps == steps[0]) and np.all(months.astype(dates.dtype) == dates):
+
+            self._set_periods(int(months[0].astype(np.int64)),int(steps[0]),data.to_numpy())
+            self.date_range = 'Range: '+str(dates[0])[:10]+' to '+str(dates[-1])[:10]
+
+        else:
+
+            try:
+                data = data.asfreq(pd.infer_freq(data.index))
+            except:
+                pass
+
+            self.data = data
+            self.date_range = 'Range: '+str(self.data.index[0])[:10]+' to '+str(self.data.index[-1])[:10]
+
+        _record_event('parse',series_id=self.series_id,seconds=time.perf_counter()-start_time,n_obs=len(observations))
+
+    
+    def _set_values(self,values,source):
+
+        '''Sets the data to the values that are not NaN in values, a numpy array with one value for each
+        observation of source. The result has an integer period index if source does and the missing 
+        values are only at the beginning and end.'''
+
+        observed = ~np.isnan(values)
+        periods = source._periods()
+
+        if periods is not None:
+
+            positions = np.flatnonzero(observed)
+
+            if len(positions)>0 and positions[-1]-positions[0]+1 == len(positions):
+
+                start = periods[0]+periods[1]*positions[0]
+                self._set_periods(start,periods[1],values[positions[0]:positions[-1]+1])
+                self.date_range = _period_date_range(start,periods[1],len(positions))
+
+                return
+
+        self.data = pd.Series(values[observed],source.data.index[observed],name=source.data.name)
+        self.date_range = 'Range: '+str(self.data.index[0])[:10]+' to '+str(self.data.index[-1])[:10]
+
+
+    def _set_periods(self,start,step,values):
+
+        '''Sets the data to values with an integer period index that begins in month start (months since
+        January 1970) with step months between observations.'''
+
+        self._data = None
+        self._values = values
+        self._period = (int(start),int(step))
+
+    
+    def apc(self,log=False,backward=True):
+
+        '''Computes the percentage change in the data over one year.
+
+        Args:
+            log (bool):      If True, computes the percentage change as 100⋅log[x(t)/x(t-k)], where k is
+                                 the number of observations per year.
+                             If False (default), compute the percentage change as 100⋅[(x(t)/x(k−1)−1].
+            backward (bool): If True (default), compute percentage change from the previous year. 
+                                 If False, compute percentage change from current to next year.
+
+        Returns:
+            fredpy series
+        '''
+
+        new_series = self.copy()
+
+        values = self._observations()
+        new_values = _percent_change(values[np.newaxis],self.t,log=log,backward=backward)[0].astype(values.dtype)
+
+        new_series._set_values(new_values,self)
+                               
+        new_series.units = 'Percent'
+        new_series.units_short = '%'
+        new_series.title = 'Annual Percentage Change in '+self.title
+
+        return new_series
+
+    
+    def as_frequency(self,freq=None,method='mean'):
+
+        '''Convert a fredpy series to a lower frequency.
+
+        Args:
+            freq (string):      Abbreviation of desired frequency: 'D','W','M','Q','A'
+            method (string):    How to resample the data: 'first', 'last', 'mean' (default), 'median',
+                                    'min', 'max', 'sum'
+        Returns:
+            fredpy series
+        '''
+
+        new_series = self.copy()
+
+        obs_per_year = {'D':365,'W':52,'M':12,'Q':4,'A':1}
+        map_of_freqency_abbreviations = {'D':'Daily','W':'Weekly','M':'Monthly','Q':'Quarterly','A':'Annual'}
+
+
+        try:
+            new_series.t = obs_per_year[freq]
+            new_series.frequency_short=freq
+            new_series.frequency=map_of_freqency_abbreviations[freq]
+
+        except:
+            raise ValueError("freq must be 'D', 'W', 'M', 'Q', or 'A'")
+
+        if self.t<new_series.t:
+            warnings.warn('Warning: You are converting series to a higher frequency and this method may not behave as you expect.')
+
+        map_to_pandas_frequencies = {'D':'D','W':'W','M':'MS','Q':'QS','A':'YS'}
+
+        periods = self._periods()
+        months = {'M':1,'Q':3,'A':12}
+
+        if periods is not None and freq in months.keys() and months[freq] % periods[1] == 0 and len(periods[2])>0 and method in _aggregation_methods:
+
+            # Observations of series with integer period indexes are arranged in a table with one row for
+            # each period of the new frequency, padded with NaN, and each row is aggregated
+            start, step, values = periods
+            new_step = months[freq]
+            per_row = new_step//step
+
+            new_start = start//new_step*new_step
+            lead = (start-new_start)//step
+            trail = -(lead+len(values)) % per_row
+
+            table = np.concatenate([np.full(lead,np.nan),values,np.full(trail,np.nan)]).reshape(-1,per_row)
+            new_values = _kernel('aggregate')(table,_aggregation_methods.index(method)).astype(values.dtype)
+
+            new_series._set_periods(new_start,new_step,new_values)
+            new_series.date_range = _period_date_range(new_start,new_step,len(new_values))
+
+            return new_series
+
+        if method == 'first':
+
+            new_series.data = self.data.resample(map_to_pandas_frequencies[freq]).first()
+
+        elif method == 'last':
+
+            new_series.data = self.data.resample(map_to_pandas_frequencies[freq]).last()
+
+        elif method == 'mean':
+
+            new_series.data = self.data.resample(map_to_pandas_frequencies[freq]).mean()
+
+        elif method == 'median':
+
+            new_series.data = self.data.resample(map_to_pandas_frequencies[freq]).median()
+
+        elif method == 'min':
+
+            new_series.data = self.data.resample(map_to_pandas_frequencies[freq]).min()
+
+        elif method == 'max':
+
+            new_series.data = self.data.resample(map_to_pandas_frequencies[freq]).max()
+
+        elif method == 'sum':
+
+            new_series.data = self.data.resample(map_to_pandas_frequencies[freq]).sum()
+
+        new_series.date_range = 'Range: '+str(new_series.data.index[0])[:10]+' to '+str(new_series.data.index[-1])[:10]
+
+        return new_series
+
+    
+    def astype(self,dtype):
+
+        '''Converts the data to another data type, e.g., 'float32' to halve the memory used by the 
+        observations or 'float64' for full precision.
+
+        Args:
+            dtype (string or numpy dtype):  data type of the observations.
+
+        Returns:
+            fredpy series
+        '''
+
+        new_series = self.copy()
+        new_series.data = self.data.astype(dtype)
+
+        return new_series
+
+
+    def bp_filter(self,low=None,high=None,K=None):
+
+        '''Computes the bandpass (Baxter-King) filter of the data. Returns two fredpy.series
+        instances containing the cyclical and trend components of the data:
+
+            new_series_cycle,new_series_trend
+
+        .. Note: 
+            In computing the bandpass filter, K observations are lost from each end of the
+            original series to the data are 2K elements shorter than in the original series.
+
+        Args:
+            low (int):  Minimum period for oscillations. Default: None, recommendation used.
+            high (int): Maximum period for oscillations. Default: None, recommendation used.
+            K (int):    Lead-lag length of the filter. Default: None, recommendation used.
+
+        Recommendations:
+
+            Monthly data:   low=24, high=84, K=84
+            Quarterly data: low=6, high=32, K=12
+            Annual data:    low=1.5, high=8, K=3
+
+        Returns:
+            two fredpy.series instances
+        '''
+
+        new_series_cycle = self.copy()
+        new_series_trend = self.copy()
+
+        if all(v is None for v in [low, high, K]) and self.frequency_short=='M':
+            low=24
+            high=84
+            K=84
+
+        elif all(v is None for v in [low, high, K]) and self.frequency_short=='Q':
+            low=6
+            high=32
+            K=12
+
+        elif all(v is None for v in [low, high, K]) and self.frequency_short=='A':
+            low=1.5
+            high=8
+            K=3
+
+
+
+        # if low==6 and high==32 and K==12 and self.t !=4:
+        #     print('Warning: data frequency is not quarterly!')
+        # elif low==3 and high==8 and K==1.5 and self.t !=1:
+        #     print('Warning: data frequency is not annual!')
+            
+        # Computed in float64 and stored with the data type of the series
+        data = self.data.astype(np.float64)
+
+        cycle = tsa.filters.bkfilter(data,low=low,high=high,K=K)
+        actual = data.iloc[K:-K]
+        trend = (actual - cycle).astype(self.data.dtype)
+        cycle = cycle.astype(self.data.dtype)
+        
+        new_series_cycle.data = cycle
+        new_series_cycle.units = 'Deviation relative to trend'
+        new_series_cycle.units_short = 'Dev. rel. to trend'
+        new_series_cycle.title = self.title+' - deviation relative to trend (bandpass filtered)'
+        new_series_cycle.date_range = 'Range: '+str(new_series_cycle.data.index[0])[:10]+' to '+str(new_series_cycle.data.index[-1])[:10]
+
+        new_series_trend.data = trend
+        new_series_trend.title = self.title+' - trend (bandpass filtered)'
+        new_series_trend.date_range = 'Range: '+str(new_series_trend.data.index[0])[:10]+' to '+str(new_series_trend.data.index[-1])[:10]
+
+        return new_series_cycle,new_series_trend
+
+
+    def cf_filter(self,low=None,high=None):
+
+        '''Computes the Christiano-Fitzgerald (CF) filter of the data. Returns two fredpy.series
+        instances containing the cyclical and trend components of the data:
+
+            new_series_cycle,new_series_trend
+
+        Args:
+            low (int):  Minimum period for oscillations. Default: None. 18 for monthly data, 6 for quarterly 
+                        data, and 2 for annual data.
+            high (int): Maximum period for oscillations. Default: None. 96 for monthly data, 32 for quarterly 
+                        data, and 8 for annual data.
+
+        Recommendations:
+
+            Monthly data:   low=18, high=96
+            Quarterly data: low=6, high=32
+            Annual data:    low=2, high=8
+
+        Returns:
+            two fredpy.series instances
+        '''
+
+        new_series_cycle = self.copy()
+        new_series_trend = self.copy()
+
+        if all(v is None for v in [low, high]) and self.frequency_short=='M':
+            low=18
+            high=96
+
+        elif all(v is None for v in [low, high]) and self.frequency_short=='Q':
+            low=6
+            high=32
+
+        elif all(v is None for v in [low, high]) and self.frequency_short=='A':
+            low=2
+            high=8
+
+        # if low==6 and high==32 and self.t !=4:
+        #     print('Warning: data frequency is not quarterly!')
+        # elif low==1.5 and high==8 and self.t !=4:
+        #     print('Warning: data frequency is not quarterly!')
+
+        # Computed in float64 and stored with the data type of the series
+        cycle, trend = tsa.filters.cffilter(self.data.astype(np.float64),low=low, high=high, drift=False)
+        cycle = cycle.astype(self.data.dtype)
+        trend = trend.astype(self.data.dtype)
+
+        new_series_cycle.data = cycle
+        new_series_cycle.units = 'Deviation relative to trend'
+        new_series_cycle.units_short = 'Dev. rel. to trend'
+        new_series_cycle.title = self.title+' - deviation relative to trend (CF filtered)'
+
+        new_series_trend.data = trend
+        new_series_trend.title = self.title+' - trend (CF filtered)'
+
+        return new_series_cycle,new_series_trend
+
+    
+    def copy(self):
+
+        '''Returns a copy of a series object.
+
+        Args:
+
+        Returs:
+            fredpy series
+        '''
+
+        new_series = series()
+
+        # Values of series with integer period indexes are never modified in place so they are shared
+        values = self._values
+        period = self._period
+
+        if values is not None and period is not None:
+            new_series._set_periods(period[0],period[1],values)
+        else:
+            new_series.data = self.data.copy()
+        new_series.date_range = self.date_range
+        new_series.frequency = self.frequency
+        new_series.frequency_short = self.frequency_short
+        new_series.last_updated = self.last_updated
+        new_series.notes = self.notes
+        new_series.observation_date = self.observation_date
+        new_series.release = self.release
+        new_series.release_id = self.release_id
         new_series.seasonal_adjustment = self.seasonal_adjustment
         new_series.seasonal_adjustment_short = self.seasonal_adjustment_short
         new_series.series_id = self.series_id
@@ -554,461 +2438,2092 @@ class series:
         new_series.units = self.units
         new_series.units_short = self.units_short
 
-        return new_series
+        return new_series
+
+
+    def diff_filter(self):
+
+        '''Computes the first difference filter of original series. Returns two fredpy.series
+        instances containing the cyclical and trend components of the data:
+
+            new_series_cycle,new_series_trend
+
+        Note:
+            In computing the first difference filter, the first observation from the original series is
+            lost so data are 1 element shorter than in the original series.
+
+        Args:
+
+        Returns:
+            two fredpy.series instances
+        '''
+
+        new_series_cycle = self.copy()
+        new_series_trend = self.copy()
+
+        values = self._observations()
+        cycle, trend = _difference_filter(values[np.newaxis])
+
+        new_series_cycle._set_values(cycle[0].astype(values.dtype),self)
+        new_series_cycle.units = 'Deviation relative to trend'
+        new_series_cycle.units_short = 'Dev. rel. to trend'
+
+        new_series_trend._set_values(trend[0].astype(values.dtype),self)
+        new_series_trend.title = self.title+' - trend (first difference filtered)'
+
+        return new_series_cycle,new_series_trend
+
+    
+    def divide(self,object2):
+
+        '''Divides the data from the current fredpy series by the data from object2.
+
+        Args:
+            object2 (int, float, numpy ndarray, or similar or fredpy series)
+
+        Note:
+            You are responsibile for making sure that dividing the series makes sense.
+
+        Returns:
+            fredpy series
+        '''
+
+        return divide(self,object2)
+
+    def drop_nan(self):
+
+        '''Removes missing (NaN) values.
+
+        Args:
+
+        Returns:
+            fredpy series
+        '''
+
+        new_series = self.copy()
+        
+        new_series.data = new_series.data.dropna()
+        new_series.date_range = 'Range: '+str(new_series.data.index[0])[:10]+' to '+str(new_series.data.index[-1])[:10]
+
+        return new_series
+
+
+    def hp_filter(self,lamb=None,two_sided=True):
+
+        '''Computes the Hodrick-Prescott (HP) filter of the data. Returns two fredpy.series
+        instances containing the cyclical and trend components of the data:
+
+            new_series_cycle,new_series_trend
+
+        Args:
+            lamb (int): The Hodrick-Prescott smoothing parameter. Default: None. Recommendations: 
+
+                            104976000000 for daily data.
+                            129600 for monthly data,
+                            1600 for quarterly data,
+                            6.25 for annual data,
+                        
+                        In general, set lambda to: 1600*[number of observations per quarter]**4
+            two_sided (bool)    Whether to compute the two-sided HP filter or the one-sided filter 
+                                used in STock and Watson (1999).
+            
+        Returns:
+            two fredpy.series instances
+        '''
+
+        new_series_cycle = self.copy()
+        new_series_trend = self.copy()
+
+
+        if lamb is None and self.frequency_short=='M':
+            lamb = 129600
+
+        elif lamb is None and self.frequency_short=='Q':
+            lamb = 1600
+
+        elif lamb is None and self.frequency_short=='A':
+            lamb = 6.25
+
+        elif lamb is None and self.frequency_short=='D':
+            lamb = 104976000000
+
+        # if lamb==1600 and self.t !=4:
+        #     print('Warning: data frequency is not quarterly!')
+        # elif lamb==129600 and self.t !=12:
+        #     print('Warning: data frequency is not monthly!')
+        # elif lamb==6.25 and self.t !=1:
+        #     print('Warning: data frequency is not annual!')
+            
+        
+        # Computed in float64 and stored with the data type of the series
+        data = self.data.astype(np.float64)
+
+        if two_sided:
+            cycle, trend = tsa.filters.hpfilter(data,lamb=lamb)
+        else:
+
+            trend = pd.Series(_kernel('hp_one_sided')(data.to_numpy()[np.newaxis],float(lamb))[0],data.index)
+
+            cycle = data-trend
+            cycle.iloc[:2] = 0
+
+        cycle = cycle.astype(self.data.dtype)
+        trend = trend.astype(self.data.dtype)
+
+
+        new_series_cycle.data = cycle
+        new_series_cycle.units = 'Deviation relative to trend'
+        new_series_cycle.units_short = 'Dev. rel. to trend'
+        new_series_cycle.title = self.title+' - deviation relative to trend (HP filtered)'
+
+        new_series_trend.title = self.title+' - trend (HP filtered)'
+        new_series_trend.data = trend
+
+        return new_series_cycle,new_series_trend
+
+    
+    def linear_filter(self):
+
+        '''Computes a simple linear filter of the data using OLS. Returns two fredpy.series
+        instances containing the cyclical and trend components of the data:
+
+            new_series_cycle,new_series_trend
+
+        Args:
+
+        Returns:
+            two fredpy.series instances
+        '''
+
+        new_series_cycle = self.copy()
+        new_series_trend = self.copy()
+
+        # Computed in float64 and stored with the data type of the series
+        y = self.data.astype(np.float64)
+        time = np.arange(len(self.data))
+        x = np.column_stack([time])
+        x = sm.add_constant(x)
+        model = sm.OLS(y,x)
+        result= model.fit()
+        pred  = result.predict(x)
+        
+        cycle= (y-pred).astype(self.data.dtype)
+        trend= pd.Series(pred,index=self.data.index).astype(self.data.dtype)
+
+        new_series_cycle.data = cycle
+        new_series_cycle.units = 'Deviation relative to trend'
+        new_series_cycle.units_short = 'Dev. rel. to trend'
+        new_series_cycle.title = self.title+' - deviation relative to trend (linearly filtered via OLS)'
+
+        new_series_trend.title = self.title+' - trend (linearly filtered via OLS)'
+        new_series_trend.data = trend
+
+        return new_series_cycle,new_series_trend
+
+    
+    def log(self):
+        
+        '''Computes the natural log of the data
+
+        Args:
+
+        Returns:
+            fredpy series
+        '''
+
+        new_series = self.copy()
+
+        new_series.data = np.log(new_series.data)
+        new_series.units = 'Log '+new_series.units
+        new_series.units_short = 'Log '+new_series.units_short
+        new_series.title = 'Log '+new_series.title
+
+        return new_series
+
+    def ma(self,length,center=False):
+
+        '''Computes a moving average with window equal to length. If center is True, then the 
+        two-sided moving average is computed. Otherwise, the moving average will be one-sided.
+
+        Args:
+            length (int): window length of the one-sided moving average.
+            center (bool): False (default) - one-sided MA. True - two-sided MA.
+
+        Returns:
+            fredpy series
+        '''
+
+        new_series = self.copy()
+
+        values = self._observations()
+        new_values = _kernel('rolling_mean')(np.asarray(values[np.newaxis],dtype=np.float64),length)[0].astype(values.dtype)
+
+        # The centered average is the trailing average moved back by (length-1)//2 observations
+        if center:
+            offset = (length-1)//2
+            new_values = np.r_[new_values[offset:],np.full(offset,np.nan,dtype=new_values.dtype)]
+
+        new_series._set_values(new_values,self)
+        if center:
+            new_series.title = self.title+' (: one-sided moving average)'
+        else:
+            new_series.title = self.title+' (: two-sided moving average)'
+
+        return new_series
+
+    
+    def minus(self,object2):
+
+        '''Subtracts the data from object2 from the data from the current fredpy series.
+
+        Args:
+            object2 (int, float, numpy ndarray, or similar or fredpy series)
+
+        Note:
+            You are responsibile for making sure that adding the series makes sense.
+
+        Returns:
+            fredpy series
+        '''
+
+        return minus(self,object2)
+
+
+    def online_filter(self,method='hp',lamb=None,length=None):
+
+        '''Returns a fredpy.online_filter initialized with the data of the series. New observations are
+        added with its .update() method at a cost that does not depend on the length of the series.
+
+        Args:
+            method (string):    'hp' (default) for the one-sided HP filter, 'linear' for the recursive 
+                                    linear trend, or 'ma' for the moving average.
+            lamb (float):       The HP smoothing parameter. Default: None, as in .hp_filter()
+            length (int):       Window length of the moving average. Required for method 'ma'.
+
+        Returns:
+            fredpy online_filter
+        '''
+
+        return online_filter(self,method=method,lamb=lamb,length=length)
+
+
+    def pc(self,log=False,backward=True,annualized=False):
+
+        '''Computes the percentage change in the data from the preceding period.
+
+        Args:
+            log (bool):        If True, computes the percentage change as 100⋅log[x(t)/x(t-1)]. 
+                                   If False (default), compute the percentage change as 100⋅[x(t)/x(t−1)−1].
+            backward (bool):   If True (default), compute percentage change from the previous period. 
+                                   If False, compute percentage change from current to next period.
+            annualized (bool): Default: False: If True, percentage change is computed at an annual rate. 
+                                    E.g., if the data were monthly and log==True, then the annualized
+                                    percentage change would be:
+                                   
+                                       100⋅12⋅log[x(t)/x(t−1)].
+
+        Returns:
+            fredpy series
+        '''
+
+        new_series = self.copy()
+        
+        if annualized:
+            t = self.t
+        else:
+            t = 1
+
+        values = self._observations()
+        new_values = _percent_change(values[np.newaxis],1,exponent=t,log=log,backward=backward)[0].astype(values.dtype)
+
+        new_series._set_values(new_values,self)
+
+        new_series.units = 'Percent'
+        new_series.units_short = '%'
+        new_series.title = 'Percentage Change in '+self.title
+
+        return new_series
+
+    
+    def per_capita(self,civ_pop = True):
+
+        '''Transforms the data into per capita terms by dividing by a measure of the
+            total population of the United States:
+
+        Args:
+            civ_pop (string): If civ_pop == True, use Civilian noninstitutional population defined as 
+                                persons 16 years of age and older (Default). Else, use the total US 
+                                population.
+
+        Returns:
+            fredpy series
+        '''
+
+        new_series = self.copy()
+
+        if civ_pop ==True:
+            population= series('CNP16OV').as_frequency(new_series.frequency_short)
+        else:
+            population= series('POP').as_frequency(new_series.frequency_short)
+    
+        new_series,population = window_equalize([new_series,population])
+
+        new_series.data = new_series.data/population.data
+
+        new_series.title = new_series.title+' Per Capita'
+        new_series.units = new_series.units+' Per Thousand People'
+        new_series.units_short = new_series.units_short+' Per Thousand People'
+        new_series.date_range = 'Range: '+str(new_series.data.index[0])[:10]+' to '+str(new_series.data.index[-1])[:10]
+
+        return new_series
+
+    
+    def plot(self,downsample=None,n_buckets=None,**kwargs):
+
+        '''Equivalent to calling .plot() method on the self.data Pandas Series object. Long series can be
+        downsampled before plotting to reduce rendering time and file size.
+
+        Args:
+            downsample (NoneType or string):    None (default) to plot every observation, 'lttb' to plot 
+                                                    n_buckets points selected with the largest triangle
+                                                    three buckets algorithm, or 'minmax' to plot the 
+                                                    minimum and maximum in each of n_buckets buckets.
+            n_buckets (NoneType or int):        Number of buckets. Default: width of the axis in pixels
+            kwargs:                             Keyword arguments for the .plot() method of the Pandas 
+                                                    Series object.
+
+        Returns:
+            matplotlib.axes.Axes
+        '''
+
+        if downsample is None:
+            return self.data.plot(**kwargs)
+
+        if kwargs.get('ax') is None:
+            kwargs['ax'] = plt.gca()
+
+        return _downsample(self.data,downsample,n_buckets,kwargs['ax']).plot(**kwargs)
+
+
+    def plus(self,object2):
+
+        '''Adds the data from the current fredpy series to the data from object2.
+
+        Args:
+            object2 (int, float, numpy ndarray, or similar or fredpy series)
+
+        Note:
+            You are responsibile for making sure that adding the series makes sense.
+
+        Returns:
+            fredpy series
+        '''
+
+        return plus(self,object2)
+
+    
+    def recent(self,N):
+
+        '''Restrict the data to the most recent N observations.
+
+        Args:
+            N (int): Number of periods to include in the data window.
+
+        Returns:
+            fredpy series
+        '''
+
+        new_series = self.copy()
+
+        periods = self._periods()
+
+        if periods is not None:
+
+            start, step, values = periods
+            new_values = values[-N:]
+            new_series._set_periods(start+step*(len(values)-len(new_values)),step,new_values)
+            new_series.date_range = _period_date_range(start+step*(len(values)-len(new_values)),step,len(new_values))
+
+        else:
+
+            new_series.data  =new_series.data.iloc[-N:]
+            new_series.date_range = 'Range: '+str(new_series.data.index[0])[:10]+' to '+str(new_series.data.index[-1])[:10]
+
+        return new_series
+
+    
+    def recession_indicator(self,fractional=False):
+
+        '''Returns a recession indicator at the frequency of the series like the FRED series USREC. As for 
+        USREC, a recession begins in the period after the NBER peak and ends at the end of the period of
+        the trough. The period of an observation starts on its date and has the length in 
+        fredpy.period_lengths for the frequency of the series.
+
+        Args:
+            fractional (bool):  If False, the indicator is 1 for periods that are in a recession for any
+                                    length of time and 0 otherwise. If True, the indicator is the fraction
+                                    of each period in a recession. Default: False
+
+        Returns:
+            fredpy series
+        '''
+
+        new_series = self.copy()
+
+        _recession_intervals()
+        peaks = pd.DatetimeIndex(_recession_cache['peaks'])
+        troughs = pd.DatetimeIndex(_recession_cache['troughs'])
+
+        # Recessions in nanoseconds from the start of the month after the peak to the end of the trough month
+        recession_starts = np.asarray((peaks + pd.DateOffset(months=1)).values,dtype='datetime64[ns]').astype(np.int64)
+        recession_ends = np.asarray((troughs + pd.DateOffset(months=1)).values,dtype='datetime64[ns]').astype(np.int64)
+
+        # Recession time before the start of each recession
+        lengths = recession_ends - recession_starts
+        before = np.r_[0,np.cumsum(lengths)[:-1]]
+
+        def recession_time(t):
+
+            # Total recession time before each time in t
+            k = np.searchsorted(recession_starts,t,side='right')-1
+            k_clipped = np.maximum(k,0)
+            time_in = np.clip(t - recession_starts[k_clipped],0,lengths[k_clipped])
+
+            return np.where(k>=0,before[k_clipped] + time_in,0)
+
+        if self.frequency_short not in period_lengths.keys():
+            raise ValueError("frequency_short must be one of: "+", ".join("'"+f+"'" for f in period_lengths.keys()))
+
+        period_starts = np.asarray(self.data.index.values,dtype='datetime64[ns]')
+        period_ends = np.asarray((self.data.index + period_lengths[self.frequency_short]).values,dtype='datetime64[ns]')
+
+        period_starts = period_starts.astype(np.int64)
+        period_ends = period_ends.astype(np.int64)
+
+        fraction = (recession_time(period_ends) - recession_time(period_starts))/(period_ends - period_starts)
+
+        if fractional:
+            new_series.data = pd.Series(fraction,self.data.index)
+            new_series.units = 'Fraction of period in recession'
+            new_series.units_short = 'Fraction'
+        else:
+            new_series.data = pd.Series((fraction>0).astype(np.float64),self.data.index)
+            new_series.units = '+1 or 0'
+            new_series.units_short = '+1 or 0'
+
+        new_series.title = 'NBER based Recession Indicators for the United States'
+
+        return new_series
+
+
+    def recessions(self,ax=None,color='0.5',alpha=0.5):
+        
+        '''Creates recession bars for plots. Unless 'ax' is specified, be used after 
+        a plot has been made but before either (1) a new plot is created or (2) a 
+        show command is issued.
+
+        Args:
+            ax (matplotlib.axes._subplots.AxesSubplot): Matplotlib axis object to plot recession bars. Default: None
+            color (string):                             Color of the bars. Default: '0.5'
+            alpha (float):                              Transparency of the recession bars. Must be between 0 and 1 
+                                                        Default: 0.5
+
+        Returns:
+            matplotlib.collections.PolyCollection
+        '''
+
+        start = self.data.index[0]
+        end = self.data.index[-1]
+
+        return recessions(start=start,end=end,ax=ax,color=color,alpha=alpha)
+
+        # for k in range(len(cycle_dates)):
+            
+        #     if cycle_dates['peaks'].loc[k]<date_begin and date_begin < cycle_dates['troughs'].loc[k]:
+        #         series_peaks.append(date_begin)
+        #         series_troughs.append(cycle_dates['troughs'].loc[k])
+            
+                
+        #     elif date_begin < cycle_dates['peaks'].loc[k] and date_end > cycle_dates['troughs'].loc[k]:
+        #         series_peaks.append(cycle_dates['peaks'].loc[k])
+        #         series_troughs.append(cycle_dates['troughs'].loc[k])
+                
+        #     elif cycle_dates['peaks'].loc[k]<date_end and cycle_dates['troughs'].loc[k] > date_end:
+        #         series_peaks.append(cycle_dates['peaks'].loc[k])
+        #         series_troughs.append(date_end)
+
+        # for k in range(len(series_peaks)):
+        #     plt.axvspan(series_peaks[k], series_troughs[k], edgecolor= color, facecolor=color, alpha=alpha)
+
+    
+    def times(self,object2):
+
+        '''Multiplies the data from the current fredpy series with the data from object2.
+
+        Args:
+            object2 (int, float, numpy ndarray, or similar or fredpy series)
+
+        Note:
+            You are responsibile for making sure that adding the series makes sense.
+
+        Returns:
+            fredpy series
+        '''
+
+        return times(self,object2)
+
+
+    def to_arrow(self):
+
+        '''Returns the series as a pyarrow Table with columns series_id, date, and value. Metadata are stored
+        in the schema. See fredpy.to_arrow(). Requires pyarrow.
+
+        Args:
+
+        Returns:
+            pyarrow Table
+        '''
+
+        return to_arrow([self])
+
+
+    def to_parquet(self,path):
+
+        '''Writes the series to a Parquet file. See fredpy.to_parquet(). Requires pyarrow.
+
+        Args:
+            path (string):  Location of the Parquet file.
+
+        Returns:
+            None
+        '''
+
+        to_parquet([self],path)
+
+
+    def window(self,start_end):
+
+        '''Restricts the data to a specified date window.
+
+        Args:
+
+            start_end (list):   is an ordered pair: start_end = [start, end]
+
+                                    start is the date of the minimum date
+                                    end is the date of the maximum date
+        
+                                both are strings in either 'yyyy-mm-dd' or 'mm-dd-yyyy' format
+
+        Returns:
+            fredpy series
+        '''
+
+        new_series = self.copy()
+
+        periods = self._periods()
+
+        if periods is not None:
+
+            start, step, values = periods
+
+            # Bounds given as strings like '2000' or '2000-06' include the whole year or month as with .loc
+            bounds = []
+            for bound,attribute in zip(start_end[:2],['start_time','end_time']):
+                if bound is None:
+                    bounds.append(None)
+                elif isinstance(bound,str):
+                    bounds.append(getattr(pd.Period(bound),attribute))
+                else:
+                    bounds.append(pd.Timestamp(bound))
+
+            first = 0
+            last = len(values)-1
+
+            # Months since January 1970 of the first observation on or after the start and the last
+            # observation on or before the end
+            if bounds[0] is not None:
+                month = (bounds[0].year-1970)*12+bounds[0].month-1
+                if bounds[0] != pd.Timestamp(bounds[0].year,bounds[0].month,1):
+                    month+= 1
+                first = max(first,-((start-month)//step))
+
+            if bounds[1] is not None:
+                month = (bounds[1].year-1970)*12+bounds[1].month-1
+                last = min(last,(month-start)//step)
+
+            last = max(last,first-1)
+
+            new_series._set_periods(start+step*first,step,values[first:last+1])
+            new_series.date_range = _period_date_range(start+step*first,step,last+1-first)
+
+            return new_series
+
+        new_series.data = new_series.data.loc[start_end[0]:start_end[1]]
+
+        if len(new_series.data)>0:
+            new_series.date_range = 'Range: '+str(new_series.data.index[0])[:10]+' to '+str(new_series.data.index[-1])[:10]
+        else:
+            new_series.date_range = 'Range: Null'
+
+
+        return new_series
+
+######################################################################################################
+# The release class and methods
+
+class release:
+
+    '''Defines a class for downloading all of the series in a FRED release.'''
+
+    def __init__(self,release_id,observation_date=None,client=None):
+
+        '''Initializes an instance of the release class.
+
+        Args:
+            release_id (int):           unique FRED release ID. E.g., 50 for the Employment Situation.
+            observation_date (string):  MM-DD-YYYY or YYYY-MM-DD formatted state string. Indicates the final 
+                                            date at which the release is observed. Default: None, today's date in St. Louis.
+            client (FredClient):        Client used for requests and caching. Default: None, use the module-level
+                                            configuration (fredpy.api_key, fredpy.series_cache, etc.)
+
+        Returns:
+            None
+
+        Attributes:
+            client:                     (FredClient) client passed to the constructor or None.
+            link:                       (string) URL of the release. Not available for all releases.
+            name:                       (string) name of the release.
+            notes:                      (string) details about release. Not available for all releases.
+            observation_date:           (string) vintage date at which data are observed. YYYY-MM-DD
+            release_id:                 (int) unique FRED release ID.
+            source:                     (string) original source of the data in the release.
+        '''
+
+        # Verify API key is stored
+        if _client(client).api_key is None:
+            raise ValueError('fredpy.api_key value not assigned. You need to provide your key for the FRED API.')
+
+        if observation_date is None:
+            vintage = None
+            observation_date = _today()
+        else:
+            observation_date = pd.to_datetime(observation_date).strftime('%Y-%m-%d')
+            vintage = observation_date
+
+        self.client = client
+        self.release_id = release_id
+        self.observation_date = observation_date
+        self._vintage = vintage
+
+        path = 'fred/release'
+
+        parameters = {'release_id':release_id,
+          'realtime_start':observation_date,
+          'realtime_end':observation_date,
+          'file_type':'json'
+         }
+
+        r = _client(self.client).request(path,parameters)
+        results = r.json()
+
+        self.name = results['releases'][0]['name']
+
+        try:
+            self.link = results['releases'][0]['link']
+        except:
+            self.link = ''
+
+        try:
+            self.notes = results['releases'][0]['notes']
+        except:
+            self.notes = ''
+
+        path = 'fred/release/sources'
+
+        parameters = {'release_id':release_id,
+          'realtime_start':observation_date,
+          'realtime_end':observation_date,
+          'file_type':'json'
+         }
+
+        r = _client(self.client).request(path,parameters)
+        results = r.json()
+
+        self.source = results['sources'][0]['name']
+
+
+    def fetch_all(self,cache=True,max_workers=8,units=None,frequency=None,aggregation_method=None,observation_start=None,observation_end=None):
+
+        '''Downloads every series in the release. Release and source metadata are shared by all of the
+        series so only the observations are downloaded for each series. Observations are downloaded
+        concurrently.
+
+        Args:
+            cache (bool):               Whether to store a copy of each series for the current session. Default: True
+            max_workers (int):          Number of concurrent requests for observations. Default: 8
+            units, frequency, aggregation_method, observation_start, observation_end:
+                                        Options for transformations computed by the FRED API. See fredpy.series.
+
+        Returns:
+            dict of fredpy series with series IDs as keys
+        '''
+
+        client = _client(self.client)
+
+        options = _fetch_options(units=units,frequency=frequency,aggregation_method=aggregation_method,
+                                 observation_start=observation_start,observation_end=observation_end)
+
+        def fetch(record):
+
+            key = _cache_key(record['id'],self._vintage,options)
+
+            if cache:
+                cached = client._cache_get(key)
+                if cached is not None:
+                    return cached
+
+            return client._single_flight(key,lambda: download(record,key),cache).copy()
+
+        def download(record,key):
+
+            new_series = series()
+            new_series._set_metadata(record,self.observation_date)
+            new_series.release = self.name
+            new_series.release_id = self.release_id
+            new_series.source = self.source
+
+            path = 'fred/series/observations'
+
+            parameters = {'series_id':record['id'],
+              'realtime_start':self.observation_date,
+              'realtime_end':self.observation_date,
+              'file_type':'json'
+             }
+            parameters.update(options)
+
+            r = client.request(path,parameters)
+            new_series._set_observations(r.json()['observations'],options)
+
+            if cache:
+                client._cache_set(key,new_series,self._vintage)
+
+            return new_series
+
+        records = self.series_records()
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            fetched = list(executor.map(fetch,records))
+
+        return {s.series_id:s for s in fetched}
+
+
+    def series_records(self):
+
+        '''Returns metadata for every series in the release from the fred/release/series path. Results
+        are requested in pages of 1000 series.
+
+        Args:
+
+        Returns:
+            list of dicts
+        '''
+
+        path = 'fred/release/series'
+
+        records = []
+        offset = 0
+
+        while True:
+
+            parameters = {'release_id':self.release_id,
+              'realtime_start':self.observation_date,
+              'realtime_end':self.observation_date,
+              'limit':1000,
+              'offset':offset,
+              'file_type':'json'
+             }
+
+            r = _client(self.client).request(path,parameters)
+            results = r.json()
+
+            records+= results['seriess']
+            offset+= len(results['seriess'])
+
+            if len(results['seriess'])==0 or offset >= int(results['count']):
+                break
+
+        return records
+
+
+######################################################################################################
+# The metadata_index class and methods
+
+class metadata_index:
+
+    '''Defines a class for storing FRED series metadata in a local SQLite full-text search index.'''
+
+    def __init__(self,path=':memory:'):
+
+        '''Initializes an instance of the metadata_index class. Set fredpy.search_index to an instance
+        to index the metadata returned by fredpy.search(), fredpy.category_series(), and fredpy.tag_series()
+        and to answer repeated searches without querying the FRED API.
+
+        Args:
+            path (string):  Location of the SQLite database file. Default: ':memory:', not saved.
+
+        Returns:
+            None
+
+        Attributes:
+            path:           (string) location of the SQLite database file.
+        '''
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path,check_same_thread=False)
+
+        with self._lock, self._connection:
+
+            self._connection.execute('CREATE TABLE IF NOT EXISTS records (series_id TEXT PRIMARY KEY, record TEXT)')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS queries (query TEXT PRIMARY KEY, series_ids TEXT)')
+
+            try:
+                self._connection.execute('CREATE VIRTUAL TABLE IF NOT EXISTS metadata USING fts5(series_id UNINDEXED, title, notes, units, frequency)')
+            except sqlite3.OperationalError:
+                self._connection.execute('CREATE VIRTUAL TABLE IF NOT EXISTS metadata USING fts4(series_id, title, notes, units, frequency)')
+
+
+    def add(self,records):
+
+        '''Adds series metadata records returned by the FRED API to the index.
+
+        Args:
+            records (list): dicts with at least an 'id' key. E.g., elements of 'seriess' from fred/series/search
+
+        Returns:
+            None
+        '''
+
+        with self._lock, self._connection:
+
+            for record in records:
+
+                self._connection.execute('DELETE FROM metadata WHERE series_id = ?',(record['id'],))
+                self._connection.execute('INSERT OR REPLACE INTO records VALUES (?,?)',(record['id'],json.dumps(record)))
+                self._connection.execute('INSERT INTO metadata VALUES (?,?,?,?,?)',
+                    (record['id'],record.get('title',''),record.get('notes',''),record.get('units',''),record.get('frequency','')))
+
+
+    def search(self,search_text,limit=None):
+
+        '''Searches the titles, notes, units, and frequencies of the indexed series. All words in 
+        search_text must match.
+
+        Args:
+            search_text (string):   words to search for.
+            limit (int):            Maximum number of results. Default: None, no limit.
+
+        Returns:
+            list of dicts
+        '''
+
+        # Quote words so that punctuation is not read as query syntax. Trailing '*' is a prefix search.
+        words = re.findall(r'\w+\*?',search_text)
+
+        if len(words)==0:
+            return []
+
+        query = 'SELECT records.record FROM metadata JOIN records ON metadata.series_id = records.series_id WHERE metadata MATCH ?'
+
+        if limit is not None:
+            query+= ' LIMIT '+str(int(limit))
+
+        with self._lock:
+            rows = self._connection.execute(query,(' '.join('"'+w.rstrip('*')+'"'+w[len(w.rstrip('*')):] for w in words),)).fetchall()
+
+        return [json.loads(row[0]) for row in rows]
+
+
+    def _get_query(self,query):
+
+        '''Returns the records stored for a completed query or None if the query has not been stored.'''
+
+        with self._lock:
+            row = self._connection.execute('SELECT series_ids FROM queries WHERE query = ?',(query,)).fetchone()
+
+            if row is None:
+                return None
+
+            records = []
+            for series_id in json.loads(row[0]):
+                record = self._connection.execute('SELECT record FROM records WHERE series_id = ?',(series_id,)).fetchone()
+                records.append(json.loads(record[0]))
+
+        return records
+
+
+    def _set_query(self,query,series_ids):
+
+        '''Stores the series IDs returned for a completed query.'''
+
+        with self._lock, self._connection:
+            self._connection.execute('INSERT OR REPLACE INTO queries VALUES (?,?)',(query,json.dumps(series_ids)))
+
+
+# Initialize search index. Set to a fredpy.metadata_index instance to index metadata.
+search_index = None
+
+# Time of the most recent fredpy.sync(). Timestamp in US Central time (the time zone of the FRED API)
+sync_watermark = None
+
+
+######################################################################################################
+# The replay_server class and methods
+
+class replay_server:
+
+    '''Defines a local stand-in for the FRED API that serves recorded responses.'''
+
+    def __init__(self,path=None,record=False,latency=0,error_rate=0,error_codes=[429,504],errors=None,seed=None):
+
+        '''Initializes an instance of the replay_server class. Use the instance without a network connection
+        either in-process by setting fredpy.transport to the instance or over HTTP by calling .start() and 
+        setting fredpy.base_url to .url.
+
+        Args:
+            path (string):          Location of a JSON file of recorded responses to load. Default: None
+            record (bool):          If True, requests without a recorded response are forwarded to the FRED API
+                                        and the responses are recorded. Default: False
+            latency (float):        Seconds to wait before each response. Default: 0
+            error_rate (float):     Probability that a request fails with a status code drawn from 
+                                        error_codes. Default: 0
+            error_codes (list):     Status codes for failed requests. Default: [429,504]
+            errors (list):          Status codes returned, in order, by the next requests before error_rate 
+                                        applies. Default: None
+            seed (int):             Seed for the random number generator used with error_rate. Default: None
+
+        Returns:
+            None
+
+        Attributes:
+            latency:                (float) seconds to wait before each response.
+            error_rate:             (float) probability that a request fails.
+            error_codes:            (list) status codes for failed requests.
+            errors:                 (list) status codes returned by the next requests.
+            record:                 (bool) whether to record responses from the FRED API.
+            requests:               (list) paths and parameters of the requests received.
+            responses:              (dict) recorded responses. Keys are request paths with sorted parameters.
+            url:                    (string) base URL of the HTTP server. None until .start() is called.
+        '''
+
+        self.record = record
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_codes = list(error_codes)
+        self.errors = list(errors) if errors is not None else []
+        self.requests = []
+        self.responses = {}
+        self.url = None
+
+        self._random = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self._server = None
+
+        if path is not None:
+            self.load(path)
+
+
+    def __enter__(self):
+
+        return self
+
+
+    def __exit__(self,*args):
+
+        self.stop()
+
+
+    def _key(self,path,parameters):
+
+        '''Returns the key for a request. The API key and the file type are excluded.'''
+
+        items = sorted((k,str(v)) for k,v in parameters.items() if k not in ['api_key','file_type'])
+
+        return path.strip('/')+'?'+urllib.parse.urlencode(items)
+
+
+    def _respond(self,url):
+
+        '''Returns the status code, headers, and body for a request URL.'''
+
+        split_url = urllib.parse.urlsplit(url)
+        path = split_url.path.strip('/')
+        parameters = dict(urllib.parse.parse_qsl(split_url.query))
+
+        with self._lock:
+
+            self.requests.append((path,{k:v for k,v in parameters.items() if k != 'api_key'}))
+
+            if len(self.errors)>0:
+                error = self.errors.pop(0)
+            elif self.error_rate>0 and self._random.random() < self.error_rate:
+                error = self.error_codes[self._random.integers(len(self.error_codes))]
+            else:
+                error = None
+
+        if self.latency>0:
+            time.sleep(self.latency)
+
+        if error is not None:
+            body = json.dumps({'error_code':int(error),'error_message':'Injected error from fredpy.replay_server.'})
+            return int(error),{'Content-Type':'application/json','Retry-After':'1'},body
+
+        key = self._key(path,parameters)
+
+        if key not in self.responses.keys() and self.record:
+
+            upstream_url = 'https://api.stlouisfed.org/'+path+'?'+split_url.query
+            r = requests.get(upstream_url)
+
+            if r.status_code == 200:
+                self.add(path,parameters,r.text)
+
+            return r.status_code,{'Content-Type':'application/json'},r.text
+
+        if key not in self.responses.keys():
+            body = json.dumps({'error_code':404,'error_message':'No recorded response for: '+key})
+            return 404,{'Content-Type':'application/json'},body
+
+        return 200,{'Content-Type':'application/json'},self.responses[key]
+
+
+    def add(self,path,parameters,body):
+
+        '''Records a response.
+
+        Args:
+            path (string):      API path. E.g., 'fred/series/observations'
+            parameters (dict):  Parameters of the request.
+            body (string or dict): Response body. Dicts are converted to JSON.
+
+        Returns:
+            None
+        '''
+
+        if type(body) != str:
+            body = json.dumps(body)
+
+        with self._lock:
+            self.responses[self._key(path,parameters)] = body
+
+
+    def get(self,url,**kwargs):
+
+        '''Returns the response for a request URL. Has the same signature as requests.get so that the 
+        instance can be used as fredpy.transport.
+
+        Args:
+            url (string):   request URL.
+
+        Returns:
+            requests.models.Response
+        '''
+
+        status_code, headers, body = self._respond(url)
+
+        r = requests.models.Response()
+        r.status_code = status_code
+        r.headers.update(headers)
+        r.url = url
+        r.encoding = 'utf-8'
+        r.reason = http.client.responses.get(status_code,'')
+        r._content = body.encode('utf-8')
+
+        return r
+
+
+    def load(self,path):
+
+        '''Loads recorded responses from a JSON file.
+
+        Args:
+            path (string):  Location of the file.
+
+        Returns:
+            None
+        '''
+
+        with open(path,'r') as responses_file:
+            responses = json.load(responses_file)
+
+        with self._lock:
+            self.responses.update(responses)
+
+
+    def save(self,path):
+
+        '''Saves recorded responses to a JSON file. The file does not contain the API key.
+
+        Args:
+            path (string):  Location of the file.
+
+        Returns:
+            None
+        '''
+
+        with self._lock:
+            responses = dict(self.responses)
+
+        with open(path,'w') as responses_file:
+            json.dump(responses,responses_file)
+
+
+    def start(self,host='127.0.0.1',port=0):
+
+        '''Starts an HTTP server for the recorded responses in a background thread.
+
+        Args:
+            host (string):  Host address. Default: '127.0.0.1'
+            port (int):     Port. Default: 0, any free port.
+
+        Returns:
+            string: base URL of the server. Set fredpy.base_url to this value.
+        '''
+
+        server = self
+
+        class handler(http.server.BaseHTTPRequestHandler):
+
+            def do_GET(self):
+
+                status_code, headers, body = server._respond(self.path)
+                body = body.encode('utf-8')
+
+                self.send_response(status_code)
+                for key in headers.keys():
+                    self.send_header(key,headers[key])
+                self.send_header('Content-Length',str(len(body)))
+                self.end_headers()
+
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError,ConnectionResetError):
+                    # Client stopped waiting, e.g., after a timeout
+                    pass
+
+            def log_message(self,*args):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer((host,port),handler)
+        self.url = 'http://'+host+':'+str(self._server.server_address[1])+'/'
+
+        threading.Thread(target=self._server.serve_forever,daemon=True).start()
+
+        return self.url
+
+
+    def stop(self):
+
+        '''Stops the HTTP server.
+
+        Args:
+
+        Returns:
+            None
+        '''
+
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            self.url = None
+
 
+######################################################################################################
+# The watchlist class and methods
 
-    def diff_filter(self):
+class watchlist:
 
-        '''Computes the first difference filter of original series. Returns two fredpy.series
-        instances containing the cyclical and trend components of the data:
+    '''Defines a class that keeps the cached copies of a list of series up to date in a background thread.'''
 
-            new_series_cycle,new_series_trend
+    def __init__(self,series_ids,request_budget=60,budget_period=60,poll_interval=60,max_workers=4,client=None):
 
-        Note:
-            In computing the first difference filter, the first observation from the original series is
-            lost so data are 1 element shorter than in the original series.
+        '''Initializes an instance of the watchlist class. Call .start() to download the series into the 
+        cache and to refresh them in a background thread. A cached series expires on the next scheduled
+        date of its release and is checked every fredpy.release_day_ttl on a release day until the new
+        data are posted, so series are refreshed shortly after each release.
 
         Args:
+            series_ids (list):      unique FRED series IDs to keep in the cache.
+            request_budget (int):   Maximum number of requests to the FRED API per budget_period seconds made
+                                        by the watchlist. Default: 60. None for no limit.
+            budget_period (float):  Length in seconds of the request_budget period. Default: 60
+            poll_interval (float):  Seconds between checks for expired series. Default: 60
+            max_workers (int):      Number of concurrent requests. Default: 4
+            client (FredClient):    Client used for requests and caching. Default: None, use the module-level
+                                        configuration
 
         Returns:
-            two fredpy.series instances
+            None
+
+        Attributes:
+            errors:                 (dict) most recent error for each series that could not be refreshed.
+            refreshed:              (dict) time of the most recent refresh of each series.
+            series_ids:             (list) unique FRED series IDs kept in the cache.
         '''
 
-        new_series_cycle = self.copy()
-        new_series_trend = self.copy()
+        self.series_ids = list(series_ids)
+        self.request_budget = request_budget
+        self.budget_period = budget_period
+        self.poll_interval = poll_interval
+        self.max_workers = max_workers
+        self.client = client
+        self.errors = {}
+        self.refreshed = {}
 
-        new_series_cycle.data = self.data.diff().dropna() - self.data.diff().dropna().mean()
-        new_series_cycle.units = 'Deviation relative to trend'
-        new_series_cycle.units_short = 'Dev. rel. to trend'
-        new_series_cycle.date_range = 'Range: '+str(new_series_cycle.data.index[0])[:10]+' to '+str(new_series_cycle.data.index[-1])[:10]
+        self._tokens = request_budget
+        self._refill_time = time.monotonic()
+        self._budget_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
 
-        new_series_trend.data = self.data.shift(1).dropna()
-        new_series_trend.title = self.title+' - trend (first difference filtered)'
-        new_series_trend.date_range = 'Range: '+str(new_series_trend.data.index[0])[:10]+' to '+str(new_series_trend.data.index[-1])[:10]
 
-        return new_series_cycle,new_series_trend
+    def __enter__(self):
 
-    
-    def divide(self,object2):
+        self.start()
+        return self
 
-        '''Divides the data from the current fredpy series by the data from object2.
+
+    def __exit__(self,*args):
+
+        self.stop()
+
+
+    def _due(self,client):
+
+        '''Returns a list of (series_id, last_updated) for the series that are not cached or have expired. 
+        last_updated is None for series that are not cached.'''
+
+        now = pd.Timestamp.now(tz='America/Chicago')
+        due = []
+
+        with client._lock:
+
+            for series_id in self.series_ids:
+
+                key = _cache_key(series_id)
+
+                if key in client.series_cache.keys():
+                    if key in client.cache_expiration.keys() and now >= client.cache_expiration[key]:
+                        due.append((series_id,client.series_cache[key].last_updated))
+
+                elif key in client.stale_cache.keys():
+                    due.append((series_id,client.stale_cache[key].last_updated))
+
+                else:
+                    due.append((series_id,None))
+
+        return due
+
+
+    def _run(self):
+
+        '''Refreshes the watchlist every poll_interval seconds until .stop() is called.'''
+
+        while not self._stopped.is_set():
+
+            self.refresh()
+            self._stopped.wait(self.poll_interval)
+
+
+    def _spend(self,n):
+
+        '''Waits until n requests are allowed by request_budget. Returns False if the watchlist is stopped
+        while waiting.'''
+
+        if self.request_budget is None:
+            return not self._stopped.is_set()
+
+        with self._budget_lock:
+
+            while not self._stopped.is_set():
+
+                now = time.monotonic()
+                self._tokens = min(self.request_budget,self._tokens + (now - self._refill_time)*self.request_budget/self.budget_period)
+                self._refill_time = now
+
+                # A refresh that costs more than the whole budget runs when the budget is full
+                required = min(n,self.request_budget)
+
+                if self._tokens >= required:
+                    self._tokens-= n
+                    return True
+
+                self._stopped.wait((required - self._tokens)*self.budget_period/self.request_budget)
+
+        return False
+
+
+    def refresh(self):
+
+        '''Downloads the series that are not cached and revalidates the series that have expired. Called
+        periodically by the background thread.
 
         Args:
-            object2 (int, float, numpy ndarray, or similar or fredpy series)
 
-        Note:
-            You are responsibile for making sure that dividing the series makes sense.
+        Returns:
+            list of the series IDs that were refreshed
+        '''
+
+        client = _client(self.client)
+
+        def refresh_series(item):
+
+            series_id, last_updated = item
+
+            # Four requests to download a series and one to revalidate an expired series
+            if not self._spend(4 if last_updated is None else 1):
+                return None
+
+            try:
+
+                cached = series(series_id,client=client)
+
+                # Expired series that had been updated were downloaded again
+                if last_updated is not None and cached.last_updated != last_updated:
+                    self._spend(4)
+
+                self.refreshed[series_id] = pd.Timestamp.now(tz='America/Chicago')
+                self.errors.pop(series_id,None)
+
+                return series_id
+
+            except Exception as error:
+
+                self.errors[series_id] = error
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            refreshed = list(executor.map(refresh_series,self._due(client)))
+
+        return [series_id for series_id in refreshed if series_id is not None]
+
+
+    def start(self):
+
+        '''Starts refreshing the series in a background thread. The first refresh downloads every series
+        that is not already cached.
+
+        Args:
 
         Returns:
-            fredpy series
+            None
         '''
 
-        return divide(self,object2)
+        if self._thread is not None and self._thread.is_alive():
+            return
 
-    def drop_nan(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run,name='fredpy-watchlist',daemon=True)
+        self._thread.start()
 
-        '''Removes missing (NaN) values.
+
+    def stop(self,timeout=None):
+
+        '''Stops the background thread. Requests in progress are completed.
+
+        Args:
+            timeout (float):    Maximum seconds to wait for the thread to stop. Default: None, no limit.
+
+        Returns:
+            None
+        '''
+
+        self._stopped.set()
+
+        if self._thread is not None:
+
+            self._thread.join(timeout)
+
+            if not self._thread.is_alive():
+                self._thread = None
+                self._stopped.clear()
+
+
+######################################################################################################
+# The warehouse class and methods
+
+class warehouse:
+
+    '''Defines a class for reading series from a directory written by fredpy.write_warehouse().'''
+
+    def __init__(self,path):
+
+        '''Initializes an instance of the warehouse class. Only the metadata are read. Observations are
+        memory-mapped when they are first used so the operating system shares one copy of the files among
+        all of the processes that open the warehouse.
+
+        Args:
+            path (string):      Location of the warehouse directory.
+
+        Returns:
+            None
+
+        Attributes:
+            metadata:           (dict) metadata and location of the observations of each series.
+            path:               (string) location of the warehouse directory.
+            series_ids:         (list) unique FRED series IDs of the series in the warehouse.
+        '''
+
+        self.path = path
+
+        with open(os.path.join(path,'metadata.json'),'r') as metadata_file:
+            self.metadata = json.load(metadata_file)
+
+        self.series_ids = list(self.metadata.keys())
+
+        self._arrays = {}
+        self._lock = threading.Lock()
+
+
+    def _group(self,group):
+
+        '''Returns the memory-mapped dates and values of a frequency group.'''
+
+        with self._lock:
+
+            if group not in self._arrays.keys():
+
+                dates = np.load(os.path.join(self.path,'dates_'+group+'.npy'),mmap_mode='r')
+                values = np.load(os.path.join(self.path,'values_'+group+'.npy'),mmap_mode='r')
+
+                self._arrays[group] = (dates,values)
+
+            return self._arrays[group]
+
+
+    def panel(self,series_ids=None):
+
+        '''Returns a DataFrame with one column for each series. Observations are copied and aligned
+        on the union of the dates of the series.
+
+        Args:
+            series_ids (list):  unique FRED series IDs. Default: None, all series in the warehouse.
+
+        Returns:
+            Pandas DataFrame
+        '''
+
+        if series_ids is None:
+            series_ids = self.series_ids
+
+        return pd.DataFrame({series_id:self.series(series_id).data for series_id in series_ids})
+
+
+    def series(self,series_id):
+
+        '''Returns a series from the warehouse. The data of the series are read-only views of the 
+        memory-mapped files and are not copied.
 
         Args:
+            series_id (string): unique FRED series ID.
 
         Returns:
             fredpy series
         '''
 
-        new_series = self.copy()
-        
-        new_series.data = new_series.data.dropna()
-        new_series.date_range = 'Range: '+str(new_series.data.index[0])[:10]+' to '+str(new_series.data.index[-1])[:10]
+        if series_id not in self.metadata.keys():
+            raise ValueError('series_id '+str(series_id)+' not in warehouse.')
+
+        record = self.metadata[series_id]
+        dates, values = self._group(record['group'])
+
+        start, stop = record['offset'], record['offset']+record['length']
+
+        new_series = series()
+        new_series.data = pd.Series(values[start:stop],pd.DatetimeIndex(dates[start:stop],copy=False),copy=False)
+
+        for attribute in _metadata_attributes:
+            setattr(new_series,attribute,record['attributes'][attribute])
 
         return new_series
 
 
-    def hp_filter(self,lamb=None,two_sided=True):
+######################################################################################################
+# The shared_series class and methods
 
-        '''Computes the Hodrick-Prescott (HP) filter of the data. Returns two fredpy.series
-        instances containing the cyclical and trend components of the data:
+class _shared_reference:
 
-            new_series_cycle,new_series_trend
+    '''Reference to one series in a fredpy.shared_series that is sent to worker processes by 
+    fredpy.map_series() instead of the data.'''
+
+    def __init__(self,name,size,record):
+
+        self.name = name
+        self.size = size
+        self.record = record
+
+
+    def series(self):
+
+        '''Returns the series as a view of the shared memory segment.'''
+
+        return _shared_view(_attach_shared_memory(self.name),self.size,self.record)
+
+
+class shared_series:
+
+    '''Defines a class that stores the data of a collection of series in shared memory.'''
+
+    def __init__(self,series_list):
+
+        '''Initializes an instance of the shared_series class. The dates and values of the series are 
+        copied once into a multiprocessing.shared_memory segment. Pickling the instance, e.g., to send it
+        to a worker process, pickles only the name of the segment and the metadata of the series, and 
+        the series in the worker are views of the segment. Pass the instance to fredpy.map_series() to 
+        send each series to a worker without copying its data.
+
+        The process that creates the instance owns the segment. Call .close() or use the instance as a
+        context manager to release the segment. The segment is also released when the instance is 
+        garbage collected or when the process exits.
 
         Args:
-            lamb (int): The Hodrick-Prescott smoothing parameter. Default: None. Recommendations: 
+            series_list (list or dict): fredpy series or a dict with fredpy series as values.
 
-                            104976000000 for daily data.
-                            129600 for monthly data,
-                            1600 for quarterly data,
-                            6.25 for annual data,
-                        
-                        In general, set lambda to: 1600*[number of observations per quarter]**4
-            two_sided (bool)    Whether to compute the two-sided HP filter or the one-sided filter 
-                                used in STock and Watson (1999).
-            
         Returns:
-            two fredpy.series instances
+            None
+
+        Attributes:
+            name:                       (string) name of the shared memory segment.
+            series_ids:                 (list) series IDs (or keys of series_list if series_list is a dict).
         '''
 
-        new_series_cycle = self.copy()
-        new_series_trend = self.copy()
+        if type(series_list) == dict:
+            keys = list(series_list.keys())
+            series_list = list(series_list.values())
+        else:
+            keys = [s.series_id for s in series_list]
 
+        lengths = [len(s.data) for s in series_list]
+        size = int(np.sum(lengths))
+        offsets = np.r_[0,np.cumsum(lengths)[:-1]] if len(lengths)>0 else []
 
-        if lamb is None and self.frequency_short=='M':
-            lamb = 129600
+        self._segment = multiprocessing.shared_memory.SharedMemory(create=True,size=max(16*size,1))
+        self._map = _map_shared_memory(self._segment)
+        self._owner = True
 
-        elif lamb is None and self.frequency_short=='Q':
-            lamb = 1600
+        dates = np.ndarray((size,),dtype='datetime64[ns]',buffer=self._map)
+        values = np.ndarray((size,),dtype=np.float64,buffer=self._map,offset=8*size)
 
-        elif lamb is None and self.frequency_short=='A':
-            lamb = 6.25
+        self._records = []
 
-        elif lamb is None and self.frequency_short=='D':
-            lamb = 104976000000
+        for s,offset,length in zip(series_list,offsets,lengths):
 
-        # if lamb==1600 and self.t !=4:
-        #     print('Warning: data frequency is not quarterly!')
-        # elif lamb==129600 and self.t !=12:
-        #     print('Warning: data frequency is not monthly!')
-        # elif lamb==6.25 and self.t !=1:
-        #     print('Warning: data frequency is not annual!')
-            
-        
-        if two_sided:
-            cycle, trend = tsa.filters.hpfilter(self.data,lamb=lamb)
-        else:
+            dates[offset:offset+length] = s.data.index.values
+            values[offset:offset+length] = s.data.values
+
+            self._records.append({'offset':int(offset),'length':length,
+                                  'attributes':{attribute:getattr(s,attribute) for attribute in _metadata_attributes}})
+
+        del dates, values
+
+        self.name = self._segment.name
+        self.series_ids = keys
+        self._positions = {key:position for position,key in enumerate(keys)}
+        self._size = size
+        self._finalizer = weakref.finalize(self,_release_shared_memory,self._segment)
+
+
+    def __enter__(self):
+
+        return self
+
+
+    def __exit__(self,*args):
+
+        self.close()
+
+
+    def __getstate__(self):
+
+        '''Returns the name of the segment and the metadata for pickling.'''
+
+        return {'name':self.name,'series_ids':self.series_ids,'_size':self._size,'_records':self._records}
+
+
+    def __setstate__(self,state):
+
+        '''Attaches to the segment in the current process.'''
+
+        self.__dict__.update(state)
+        self._positions = {key:position for position,key in enumerate(self.series_ids)}
+        self._map = _attach_shared_memory(self.name)
+        self._owner = False
+        self._finalizer = None
+
+
+    def _references(self):
+
+        '''Returns a list of references to the series for fredpy.map_series().'''
+
+        return [_shared_reference(self.name,self._size,record) for record in self._records]
+
+
+    def close(self):
+
+        '''Releases the shared memory segment if the current process created it. Series that are views of 
+        the segment remain valid and the memory is freed when they are garbage collected.
+
+        Args:
+
+        Returns:
+            None
+        '''
+
+        if self._owner:
+            self._finalizer()
+            self._map = None
+
+
+    def series(self,series_id):
+
+        '''Returns a series with read-only data that are views of the shared memory segment.
+
+        Args:
+            series_id (string): series ID (or key of the dict used to create the instance).
+
+        Returns:
+            fredpy series
+        '''
+
+        if series_id not in self._positions.keys():
+            raise ValueError('series_id '+str(series_id)+' not in shared_series.')
+
+        if self._map is None:
+            raise ValueError('shared_series is closed.')
+
+        return _shared_view(self._map,self._size,self._records[self._positions[series_id]])
+
+
+######################################################################################################
+# The online_filter class and methods
+
+class online_filter:
+
+    '''Defines a class for filters that are updated one observation at a time.'''
+
+    def __init__(self,source=None,method='hp',lamb=None,length=None):
+
+        '''Initializes an instance of the online_filter class with the observations of source. Each 
+        observation added with .update() costs the same regardless of the number of observations before it.
+
+            'hp':       The one-sided HP filter. The trend is the last value of the two-sided HP trend of 
+                            the observations so far, as in .hp_filter(two_sided=False).
+            'linear':   The recursive linear trend. The trend is the last fitted value of an OLS regression of
+                            the observations so far on a constant and a time trend.
+            'ma':       The moving average of the last length observations, as in .ma(length). 
+
+        The cycle is the observation less the trend. Missing values (NaN) do not change the HP filter and 
+        the linear trend and make the moving average NaN while they are in the window. The state of the 
+        filter can be stored, e.g., next to a cached series, with .state() and restored with 
+        fredpy.online_filter.from_state().
+
+        Args:
+            source (fredpy series): Observations used to initialize the filter. Default: None
+            method (string):        'hp' (default), 'linear', or 'ma'
+            lamb (float):           The HP smoothing parameter. Default: None, the default of 
+                                        fredpy.series.hp_filter() for the frequency of source or 1600.
+            length (int):           Window length of the moving average. Required for method 'ma'.
+
+        Returns:
+            None
+
+        Attributes:
+            cycle:                  (float) cycle of the most recent observation.
+            date:                   (string) date of the most recent observation. YYYY-MM-DD
+            length:                 (int) window length of the moving average.
+            lamb:                   (float) HP smoothing parameter.
+            method:                 (string) 'hp', 'linear', or 'ma'.
+            n_obs:                  (int) number of observations added.
+            series_id:              (string) unique FRED series ID of source.
+            step:                   (int) number of months between observations of source if it has an
+                                        integer period index. Used to date observations added without 
+                                        dates. Otherwise None.
+            trend:                  (float) trend of the most recent observation.
+        '''
 
-            n_obs = len(self.data)
+        if method not in ['hp','linear','ma']:
+            raise ValueError("method must be 'hp', 'linear', or 'ma'")
+
+        if method == 'ma' and (length is None or length < 1):
+            raise ValueError("length must be a positive integer for method 'ma'")
+
+        if lamb is None and method == 'hp':
+            lambs = {'M':129600,'Q':1600,'A':6.25,'D':104976000000}
+            lamb = lambs.get(source.frequency_short if source is not None else '',1600)
+
+        self.method = method
+        self.lamb = lamb
+        self.length = length
+        self.n_obs = 0
+        self.date = None
+        self.step = None
+        self.series_id = ''
+        self.cycle = np.nan
+        self.trend = np.nan
+
+        if method == 'hp':
+            self._state = {'n_valid':0,'y':[0.0,0.0],'d':[0.0,0.0],'z':[0.0,0.0],'l1':0.0,'l2':[0.0,0.0]}
+        elif method == 'linear':
+            self._state = {'n_valid':0,'mean_t':0.0,'mean_y':0.0,'c_ty':0.0,'m_tt':0.0}
+        else:
+            self._state = {'window':[np.nan]*length,'total':0.0,'n_missing':length}
 
-            cycle = self.data.copy()
-            cycle.iloc[:2] = 0
-            trend = self.data.copy()
+        if source is not None:
 
-            trend[:2] = self.data.iloc[:2]
+            self.series_id = source.series_id
+            periods = source._periods()
 
-            for i in range(n_obs-2):
-                iter_cycle, iter_trend = tsa.filters.hpfilter(self.data[:2+1+i],lamb=lamb)
-                cycle.iloc[2+i] = iter_cycle.iloc[-1]
-                trend.iloc[2+i] = iter_trend.iloc[-1]
+            if periods is not None:
+                # Observations are dated from the month before the first observation
+                self.step = periods[1]
+                self.date = str(np.datetime64(int(periods[0]-periods[1]),'M').astype('datetime64[D]'))
+                dates = None
+            else:
+                dates = [str(date)[:10] for date in source.data.index]
 
+            self.extend(source._observations(),dates)
 
-        new_series_cycle.data = cycle
-        new_series_cycle.units = 'Deviation relative to trend'
-        new_series_cycle.units_short = 'Dev. rel. to trend'
-        new_series_cycle.title = self.title+' - deviation relative to trend (HP filtered)'
 
-        new_series_trend.title = self.title+' - trend (HP filtered)'
-        new_series_trend.data = trend
+    def _update_hp(self,y):
 
-        return new_series_cycle,new_series_trend
+        '''Adds y to the one-sided HP filter and returns the trend. Extends the L D L' factorization by one
+        row as in _hp_one_sided_loop(). Lists in the state hold values for the two most recent rows with 
+        the most recent last.'''
 
-    
-    def linear_filter(self):
+        state = self._state
+        lamb = self.lamb
 
-        '''Computes a simple linear filter of the data using OLS. Returns two fredpy.series
-        instances containing the cyclical and trend components of the data:
+        state['n_valid']+= 1
+        m = state['n_valid']
 
-            new_series_cycle,new_series_trend
+        y_before, y_last = state['y']
+        state['y'] = [y_last,y]
 
-        Args:
+        if m <= 2:
+            return y
 
-        Returns:
-            two fredpy.series instances
-        '''
+        d_before, d_last = state['d']
+        z_before, z_last = state['z']
+        l1 = state['l1']
+        l2, l2_next = state['l2']
 
-        new_series_cycle = self.copy()
-        new_series_trend = self.copy()
+        # Row m-3 is the same for all longer samples
+        i = m-3
 
-        y = self.data
-        time = np.arange(len(self.data))
-        x = np.column_stack([time])
-        x = sm.add_constant(x)
-        model = sm.OLS(y,x)
-        result= model.fit()
-        pred  = result.predict(x)
-        
-        cycle= y-pred
-        trend= pd.Series(pred,index=self.data.index)
+        a0 = 1+lamb*(1+4*min(i,1)+min(max(i-1,0),1))
+        a1 = -lamb*(2+2*min(i,1))
 
-        new_series_cycle.data = cycle
-        new_series_cycle.units = 'Deviation relative to trend'
-        new_series_cycle.units_short = 'Dev. rel. to trend'
-        new_series_cycle.title = self.title+' - deviation relative to trend (linearly filtered via OLS)'
+        d_i = a0 - l1**2*d_last - l2**2*d_before
+        z_i = y_before - l1*z_last - l2*z_before
+        l2_new = lamb/d_i
+        l1_new = (a1 - l2_next*l1*d_last)/d_i
 
-        new_series_trend.title = self.title+' - trend (linearly filtered via OLS)'
-        new_series_trend.data = trend
+        # Last two rows of the sample of m observations
+        r = m-2
 
-        return new_series_cycle,new_series_trend
+        a0 = 1+lamb*(4*min(r,1)+min(max(r-1,0),1))
+        a1 = -lamb*2*min(r,1)
 
-    
-    def log(self):
-        
-        '''Computes the natural log of the data
+        d_r = a0 - l1_new**2*d_i - l2_next**2*d_last
+        z_r = y_last - l1_new*z_i - l2_next*z_last
+        l1_last = (a1 - l2_new*l1_new*d_i)/d_r
 
-        Args:
+        d_end = 1+lamb - l1_last**2*d_r - l2_new**2*d_i
+        z_end = y - l1_last*z_r - l2_new*z_i
 
-        Returns:
-            fredpy series
-        '''
+        state['d'] = [d_last,d_i]
+        state['z'] = [z_last,z_i]
+        state['l1'] = l1_new
+        state['l2'] = [l2_next,l2_new]
 
-        new_series = self.copy()
+        return z_end/d_end
 
-        new_series.data = np.log(new_series.data)
-        new_series.units = 'Log '+new_series.units
-        new_series.units_short = 'Log '+new_series.units_short
-        new_series.title = 'Log '+new_series.title
 
-        return new_series
+    def _update_linear(self,y):
 
-    def ma(self,length,center=False):
+        '''Adds y to the recursive linear trend and returns the trend. Means and co-moments of time and
+        the observations are updated with Welford's method.'''
 
-        '''Computes a moving average with window equal to length. If center is True, then the 
-        two-sided moving average is computed. Otherwise, the moving average will be one-sided.
+        state = self._state
+        t = self.n_obs-1
 
-        Args:
-            length (int): window length of the one-sided moving average.
-            center (bool): False (default) - one-sided MA. True - two-sided MA.
+        state['n_valid']+= 1
 
-        Returns:
-            fredpy series
-        '''
+        dt = t-state['mean_t']
+        state['mean_t']+= dt/state['n_valid']
+        dy = y-state['mean_y']
+        state['mean_y']+= dy/state['n_valid']
 
-        new_series = self.copy()
+        state['c_ty']+= dt*(y-state['mean_y'])
+        state['m_tt']+= dt*(t-state['mean_t'])
 
-        new_series.data = new_series.data.rolling(window=length,center=center).mean().dropna()
-        new_series.date_range = 'Range: '+str(new_series.data.index[0])[:10]+' to '+str(new_series.data.index[-1])[:10]
-        if center:
-            new_series.title = self.title+' (: one-sided moving average)'
+        if state['m_tt'] > 0:
+            slope = state['c_ty']/state['m_tt']
         else:
-            new_series.title = self.title+' (: two-sided moving average)'
+            slope = 0.0
 
-        return new_series
+        return state['mean_y']+slope*(t-state['mean_t'])
 
-    
-    def minus(self,object2):
 
-        '''Subtracts the data from object2 from the data from the current fredpy series.
+    def _update_ma(self,y):
 
-        Args:
-            object2 (int, float, numpy ndarray, or similar or fredpy series)
+        '''Adds y to the moving average and returns the average. The window is a ring buffer.'''
 
-        Note:
-            You are responsibile for making sure that adding the series makes sense.
+        state = self._state
+        window = state['window']
+        position = (self.n_obs-1) % self.length
 
-        Returns:
-            fredpy series
-        '''
+        if np.isnan(window[position]):
+            state['n_missing']-= 1
+        else:
+            state['total']-= window[position]
 
-        return minus(self,object2)
+        if np.isnan(y):
+            state['n_missing']+= 1
+        else:
+            state['total']+= y
 
+        window[position] = y
 
-    def pc(self,log=False,backward=True,annualized=False):
+        # Recompute the total once per window to prevent rounding errors from accumulating
+        if position == self.length-1:
+            state['total'] = float(sum(value for value in window if not np.isnan(value)))
 
-        '''Computes the percentage change in the data from the preceding period.
+        if state['n_missing'] == 0:
+            return state['total']/self.length
+        else:
+            return np.nan
+
+
+    def extend(self,values,dates=None):
+
+        '''Adds observations to the filter.
 
         Args:
-            log (bool):        If True, computes the percentage change as 100⋅log[x(t)/x(t-1)]. 
-                                   If False (default), compute the percentage change as 100⋅[x(t)/x(t−1)−1].
-            backward (bool):   If True (default), compute percentage change from the previous period. 
-                                   If False, compute percentage change from current to next period.
-            annualized (bool): Default: False: If True, percentage change is computed at an annual rate. 
-                                    E.g., if the data were monthly and log==True, then the annualized
-                                    percentage change would be:
-                                   
-                                       100⋅12⋅log[x(t)/x(t−1)].
+            values (list or numpy ndarray): Observations in order.
+            dates (list):                   Dates of the observations. Default: None
 
         Returns:
-            fredpy series
+            tuple: (cycle, trend) numpy ndarrays with the cycle and trend of each observation.
         '''
 
-        new_series = self.copy()
-        
-        T = len(self.data)
-        if annualized:
-            t = self.t
-        else:
-            t = 1
-        
-        if backward==True:
-            ratio = self.data/self.data.shift(1)
-        else:
-            ratio = self.data.shift(-1)/self.data
-            
-        if log==True:
-            new_series.data = 100*t*np.log(ratio).dropna()
-        else:
-            new_series.data = 100*(ratio**t-1).dropna()
+        if dates is None:
+            dates = [None]*len(values)
 
-        new_series.units = 'Percent'
-        new_series.units_short = '%'
-        new_series.title = 'Percentage Change in '+self.title
-        new_series.date_range = 'Range: '+str(new_series.data.index[0])[:10]+' to '+str(new_series.data.index[-1])[:10]
+        cycle = np.empty(len(values))
+        trend = np.empty(len(values))
 
-        return new_series
+        for k,(value,date) in enumerate(zip(values,dates)):
+            cycle[k], trend[k] = self.update(value,date)
 
-    
-    def per_capita(self,civ_pop = True):
+        return cycle, trend
 
-        '''Transforms the data into per capita terms by dividing by a measure of the
-            total population of the United States:
+
+    @staticmethod
+    def from_state(state):
+
+        '''Returns an online_filter restored from the dictionary returned by .state().
 
         Args:
-            civ_pop (string): If civ_pop == True, use Civilian noninstitutional population defined as 
-                                persons 16 years of age and older (Default). Else, use the total US 
-                                population.
+            state (dict):   State of an online_filter.
 
         Returns:
-            fredpy series
+            fredpy online_filter
         '''
 
-        new_series = self.copy()
+        state = copy.deepcopy(state)
 
-        if civ_pop ==True:
-            population= series('CNP16OV').as_frequency(new_series.frequency_short)
-        else:
-            population= series('POP').as_frequency(new_series.frequency_short)
-    
-        new_series,population = window_equalize([new_series,population])
+        # Missing values are stored as None
+        for attribute in ['cycle','trend']:
+            if state[attribute] is None:
+                state[attribute] = np.nan
 
-        new_series.data = new_series.data/population.data
+        if 'window' in state['state'].keys():
+            state['state']['window'] = [np.nan if value is None else value for value in state['state']['window']]
 
-        new_series.title = new_series.title+' Per Capita'
-        new_series.units = new_series.units+' Per Thousand People'
-        new_series.units_short = new_series.units_short+' Per Thousand People'
-        new_series.date_range = 'Range: '+str(new_series.data.index[0])[:10]+' to '+str(new_series.data.index[-1])[:10]
+        new_filter = online_filter.__new__(online_filter)
+        new_filter._state = state.pop('state')
+        new_filter.__dict__.update(state)
 
-        return new_series
+        return new_filter
 
-    
-    def plot(self,**kwargs):
 
-        '''Equivalent to calling .plot() method on the self.data Pandas Series object.'''
+    def state(self):
 
-        self.data.plot(**kwargs)
+        '''Returns the state of the filter as a dictionary of numbers, strings, and lists that can be 
+        stored as JSON or pickled and restored with fredpy.online_filter.from_state(). Missing values 
+        are None so that the dictionary is valid JSON, e.g., json.dumps(state,allow_nan=False).
 
+        Returns:
+            dict
+        '''
 
-    def plus(self,object2):
+        state = {attribute:getattr(self,attribute) for attribute in ['method','lamb','length','n_obs','date','step','series_id']}
 
-        '''Adds the data from the current fredpy series to the data from object2.
+        for attribute in ['cycle','trend']:
+            value = float(getattr(self,attribute))
+            state[attribute] = None if np.isnan(value) else value
 
-        Args:
-            object2 (int, float, numpy ndarray, or similar or fredpy series)
+        state['state'] = copy.deepcopy(self._state)
 
-        Note:
-            You are responsibile for making sure that adding the series makes sense.
+        if 'window' in state['state'].keys():
+            state['state']['window'] = [None if np.isnan(value) else value for value in state['state']['window']]
 
-        Returns:
-            fredpy series
-        '''
+        return state
 
-        return plus(self,object2)
 
-    
-    def recent(self,N):
+    def update(self,value,date=None):
 
-        '''Restrict the data to the most recent N observations.
+        '''Adds an observation to the filter.
 
         Args:
-            N (int): Number of periods to include in the data window.
+            value (float):              The observation.
+            date (string or Timestamp): Date of the observation. Default: None, the date of the previous
+                                            observation plus step months if step is not None.
 
         Returns:
-            fredpy series
+            tuple: (cycle, trend) of the observation.
         '''
 
-        new_series = self.copy()
+        value = float(value)
+        self.n_obs+= 1
 
-        new_series.data  =new_series.data.iloc[-N:]
-        new_series.date_range = 'Range: '+str(new_series.data.index[0])[:10]+' to '+str(new_series.data.index[-1])[:10]
+        if date is not None:
+            self.date = str(pd.Timestamp(date))[:10]
+        elif self.step is not None and self.date is not None:
+            self.date = str((np.datetime64(self.date,'M')+self.step).astype('datetime64[D]'))
+        else:
+            self.date = None
+
+        if self.method == 'ma':
+            self.trend = self._update_ma(value)
+        elif np.isnan(value):
+            self.trend = np.nan
+        elif self.method == 'hp':
+            self.trend = self._update_hp(value)
+        else:
+            self.trend = self._update_linear(value)
 
-        return new_series
+        if self.method == 'hp' and self._state['n_valid'] <= 2 and not np.isnan(value):
+            self.cycle = 0.0
+        else:
+            self.cycle = value-self.trend
 
-    
-    def recessions(self,ax=None,color='0.5',alpha=0.5):
-        
-        '''Creates recession bars for plots. Unless 'ax' is specified, be used after 
-        a plot has been made but before either (1) a new plot is created or (2) a 
-        show command is issued.
+        return self.cycle, self.trend
 
-        Args:
-            ax (matplotlib.axes._subplots.AxesSubplot): Matplotlib axis object to plot recession bars. Default: None
-            color (string):                             Color of the bars. Default: '0.5'
-            alpha (float):                              Transparency of the recession bars. Must be between 0 and 1 
-                                                        Default: 0.5
 
-        Returns:
-        '''
+######################################################################################################
+# Additional functions
 
-        series_peaks = []
-        series_troughs = []
+def add_hook(event,function):
 
-        start = self.data.index[0]
-        end = self.data.index[-1]
+    '''Registers a function to be called for each recorded event, e.g., to export statistics to a 
+    monitoring system. The function is called as function(event,info) where info is a dict.
 
-        recessions(start=start,end=end,ax=ax,color=color,alpha=alpha)
+    Args:
+        event (string):         'request', 'retry', 'cache_hit', 'cache_miss', 'cache_eviction', 'coalesced',
+                                    'revalidation', 'parse', or '*' for all events.
+        function (callable):    function to call.
+
+    Events:
+        'request':          An HTTP request to the FRED API. info: path, status_code, seconds, bytes
+        'retry':            A request that will be retried. info: path, status_code, sleep
+        'cache_hit':        A series found in fredpy.series_cache. info: key
+        'cache_miss':       A series not found in fredpy.series_cache. info: key
+        'cache_eviction':   An expired series removed from fredpy.series_cache. info: key
+        'coalesced':        A download shared with a concurrent request for the same series. info: key
+        'revalidation':     An expired series checked with its last_updated value. info: key, modified
+        'parse':            Observations parsed into a series. info: series_id, seconds, n_obs
 
-        # for k in range(len(cycle_dates)):
-            
-        #     if cycle_dates['peaks'].loc[k]<date_begin and date_begin < cycle_dates['troughs'].loc[k]:
-        #         series_peaks.append(date_begin)
-        #         series_troughs.append(cycle_dates['troughs'].loc[k])
-            
-                
-        #     elif date_begin < cycle_dates['peaks'].loc[k] and date_end > cycle_dates['troughs'].loc[k]:
-        #         series_peaks.append(cycle_dates['peaks'].loc[k])
-        #         series_troughs.append(cycle_dates['troughs'].loc[k])
-                
-        #     elif cycle_dates['peaks'].loc[k]<date_end and cycle_dates['troughs'].loc[k] > date_end:
-        #         series_peaks.append(cycle_dates['peaks'].loc[k])
-        #         series_troughs.append(date_end)
+    Returns:
+        None
+    '''
 
-        # for k in range(len(series_peaks)):
-        #     plt.axvspan(series_peaks[k], series_troughs[k], edgecolor= color, facecolor=color, alpha=alpha)
+    with _stats_lock:
+        _hooks.setdefault(event,[]).append(function)
 
-    
-    def times(self,object2):
 
-        '''Multiplies the data from the current fredpy series with the data from object2.
+def category_children(category_id=0,recursive=False,client=None):
 
-        Args:
-            object2 (int, float, numpy ndarray, or similar or fredpy series)
+    '''Generator over the child categories of a FRED category. If recursive is True, all categories
+    below category_id are visited breadth first and the children of the next category are requested
+    while the current children are consumed.
 
-        Note:
-            You are responsibile for making sure that adding the series makes sense.
+    Args:
+        category_id (int):      FRED category ID. Default: 0, the root category.
+        recursive (bool):       Whether to visit all categories below category_id. Default: False
+        client (FredClient):    Client used for requests. Default: None, use the module-level configuration
 
-        Returns:
-            fredpy series
-        '''
+    Returns:
+        generator of dicts
+    '''
 
-        return times(self,object2)
+    client = _client(client)
 
+    def get_children(category_id):
 
-    def window(self,start_end):
+        path = 'fred/category/children'
 
-        '''Restricts the data to a specified date window.
+        parameters = {'category_id':category_id,
+          'file_type':'json'
+         }
 
-        Args:
+        r = client.request(path,parameters)
+        return r.json()['categories']
 
-            start_end (list):   is an ordered pair: start_end = [start, end]
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
 
-                                    start is the date of the minimum date
-                                    end is the date of the maximum date
-        
-                                both are strings in either 'yyyy-mm-dd' or 'mm-dd-yyyy' format
+    try:
 
-        Returns:
-            fredpy series
-        '''
+        pending = []
+        future = executor.submit(get_children,category_id)
 
-        new_series = self.copy()
+        while future is not None:
 
-        new_series.data = new_series.data.loc[start_end[0]:start_end[1]]
+            children = future.result()
 
-        if len(new_series.data)>0:
-            new_series.date_range = 'Range: '+str(new_series.data.index[0])[:10]+' to '+str(new_series.data.index[-1])[:10]
-        else:
-            new_series.date_range = 'Range: Null'
+            if recursive:
+                pending+= [child['id'] for child in children]
 
+            if len(pending)>0:
+                future = executor.submit(get_children,pending.pop(0))
+            else:
+                future = None
 
-        return new_series
+            for child in children:
+                yield child
+
+    finally:
+        executor.shutdown(wait=False,cancel_futures=True)
+
+
+def category_series(category_id,client=None):
+
+    '''Generator over metadata for the series in a FRED category. The next page of results is 
+    requested while the current page is consumed.
+
+    Args:
+        category_id (int):      FRED category ID.
+        client (FredClient):    Client used for requests. Default: None, use the module-level configuration
+
+    Returns:
+        generator of dicts
+    '''
+
+    parameters = {'category_id':category_id}
+
+    return _paged_results('fred/category/series',parameters,'seriess',index=search_index,client=client)
 
-######################################################################################################
-# Additional functions
 
 def divide(object1,object2):
 
@@ -1045,7 +4560,7 @@ def divide(object1,object2):
 
     else:
 
-        if not object1.data.index.equals(object2.data.index):
+        if not _same_dates(object1,object2):
 
             raise ValueError('object1 and object2 do not have the same observation dates')
 
@@ -1083,24 +4598,128 @@ def divide(object1,object2):
                 new_series.release = object1.release +' and '+object2.release
                 
             new_series.series_id = object1.series_id +' and '+object2.series_id
-            new_series.data  = object1.data/object2.data
+            _set_combined_data(new_series,object1,object2,np.divide)
+
+            return new_series
+
+
+
+    
+    
+def event_study(series_list,events='peaks',before=24,after=24,normalize=False):
+
+    '''Aligns series around business cycle peaks or troughs or other events. Observations from before
+    periods before to after periods after each event are gathered for every series in one indexing 
+    operation. An event is matched to the last observation on or before its date, i.e., the observation
+    whose period contains the event.
+
+    Args:
+        series_list (fredpy series, list, dict, or DataFrame):
+                                    fredpy series with the same frequency or a Pandas DataFrame with a 
+                                        DatetimeIndex and one column for each series, e.g., from 
+                                        fredpy.warehouse.panel().
+        events (string or list):    'peaks' (default) or 'troughs' from fredpy.cycle_dates or a list of dates.
+        before (int):               Number of periods before each event. Default: 24
+        after (int):                Number of periods after each event. Default: 24
+        normalize (bool):           Whether to divide by the value at each event and multiply by 100. 
+                                        Default: False
+
+    Returns:
+        tuple: (values, event_dates, offsets, series_ids). values is a numpy ndarray with shape 
+            (len(event_dates), len(offsets), len(series_ids)) with NaN for observations that are not
+            available. offsets are the periods relative to each event from -before to after.
+    '''
+
+    frequency_short = None
+
+    if isinstance(series_list,pd.DataFrame):
+        panel = series_list
+
+    else:
 
-            return new_series
+        if isinstance(series_list,series):
+            series_list = [series_list]
+        elif type(series_list) == dict:
+            series_list = list(series_list.values())
+
+        frequencies = set(s.frequency_short for s in series_list)
+
+        if len(frequencies)>1:
+            raise ValueError('All series must have the same frequency.')
+        elif len(frequencies)==1:
+            frequency_short = frequencies.pop()
+
+        series_ids = [s.series_id for s in series_list]
+        if len(set(series_ids)) < len(series_ids):
+            series_ids = list(range(len(series_list)))
+
+        panel = pd.concat([s.data for s in series_list],axis=1,keys=series_ids)
+
+    if type(events) == str:
+        if events not in ['peaks','troughs']:
+            raise ValueError("events must be 'peaks', 'troughs', or a list of dates.")
+        events = cycle_dates[events]
+
+    event_dates = pd.DatetimeIndex(pd.to_datetime(events))
+    offsets = np.arange(-before,after+1)
+
+    dates = np.asarray(panel.index.values,dtype='datetime64[ns]')
+    values = np.asarray(panel.values,dtype=np.float64)
+    n_obs = len(dates)
+
+    # Observation whose period contains each event
+    positions = np.searchsorted(dates,np.asarray(event_dates.values,dtype='datetime64[ns]'),side='right')-1
+
+    # The period of each observation ends at the next observation. The period of the last observation
+    # has the length of the frequency of the series if it is known and otherwise of the period before it
+    if n_obs==0:
+        next_dates = np.array(['NaT'],dtype='datetime64[ns]')
+    elif frequency_short in period_lengths.keys():
+        next_dates = np.r_[dates[1:],np.asarray((panel.index[-1:] + period_lengths[frequency_short]).values,dtype='datetime64[ns]')]
+    elif n_obs>1:
+        next_dates = np.r_[dates[1:],dates[-1]+(dates[-1]-dates[-2])]
+    elif panel.index.freq is not None:
+        next_dates = np.asarray((panel.index + panel.index.freq).values,dtype='datetime64[ns]')
+    else:
+        next_dates = dates + np.timedelta64(1,'D')
 
+    contained = (positions>=0) & (np.asarray(event_dates.values,dtype='datetime64[ns]') < next_dates[np.maximum(positions,0)])
 
+    # Gather events x offsets x series in one step
+    indices = positions[:,np.newaxis] + offsets[np.newaxis,:]
+    available = contained[:,np.newaxis] & (indices>=0) & (indices<n_obs)
 
-    
-    
-def fred_api_request(api_key,path,parameters):
+    gathered = values[np.clip(indices,0,max(n_obs-1,0))] if n_obs>0 else np.full(indices.shape+(values.shape[1],),np.nan)
+    gathered = np.where(available[:,:,np.newaxis],gathered,np.nan)
+
+    if normalize:
+        gathered = 100*gathered/gathered[:,[before],:]
+
+    return gathered, event_dates, offsets, list(panel.columns)
+
+
+def fred_api_request(api_key,path,parameters,timeout=None,deadline=None):
     
     '''Queries the FRED API. Returns a requests.models.Response object if successful, otherwise will
     raise an error with a message that is hopefully helpful. Reference for API querries: 
 
     https://fred.stlouisfed.org/docs/api/fred/
 
+    Requests that fail with status codes 429 or 504 or that time out are retried up to fredpy.max_retries
+    times. Waits between retries follow the Retry-After header if the FRED API sends one and otherwise
+    double from fredpy.retry_backoff seconds with random jitter. After fredpy.circuit_breaker_threshold
+    consecutive failures, requests raise CircuitOpenError without querying the FRED API for 
+    fredpy.circuit_breaker_reset seconds. Requests that still fail after the retries raise FredAPIError
+    and requests that would take longer than the deadline raise DeadlineExceeded. CircuitOpenError and
+    DeadlineExceeded are subclasses of FredAPIError. Requests are made with the default client
+    configured by the module-level variables. See fredpy.FredClient.request().
+
         Args:
             api_key (string):   32-character alpha-numeric string.
             path (string):      API path.  List of available paths here: 
+            parameters (dict):  Parameters for the API query.
+            timeout (float or tuple): Seconds to wait to connect and to read. Default: None, fredpy.request_timeout
+            deadline (float):   Maximum total seconds including retries. Default: None, fredpy.request_deadline
 
         Returns:
             requests.models.Response
@@ -1109,64 +4728,169 @@ def fred_api_request(api_key,path,parameters):
             None
     '''
     
-    
+    return _client().request(path,parameters,timeout=timeout,deadline=deadline,api_key=api_key)
 
-    status_code = None
-    request_count = 0
 
-    while request_count <= 10:
+def from_arrow(table):
 
-        request_url = 'https://api.stlouisfed.org/'+path+'?'+'api_key='+str(api_key)+'&'
+    '''Creates fredpy series from a pyarrow Table with columns series_id, date, and value like those
+    returned by fredpy.to_arrow(). Metadata are read from the schema. The data of each series are views
+    of the Table's buffers when the value column has no missing values. Requires pyarrow.
 
-        for key in parameters.keys():
-            request_url+=key+'='+str(parameters[key])+'&'
-            
+    Args:
+        table (pyarrow Table):  Table with columns series_id, date, and value.
 
-        r = requests.get(request_url)
+    Returns:
+        dict of fredpy series with series IDs as keys
+    '''
 
-        status_code = r.status_code
+    pa = _import_pyarrow()
 
-        if status_code == 200:
-            break
+    metadata = {}
+    if table.schema.metadata is not None and b'fredpy' in table.schema.metadata.keys():
+        metadata = json.loads(table.schema.metadata[b'fredpy'])
+
+    table = table.combine_chunks()
 
-        elif status_code == 429:
-            print('FRED API error: API limit exceeded in API query (status code: '+str(status_code)+'). Retry in '+str(5+request_count)+' seconds.')
-            time.sleep(5+request_count)
+    # Integer codes for series IDs
+    series_ids = table.column('series_id').chunk(0) if table.num_rows>0 else pa.array([],pa.string())
+    if pa.types.is_dictionary(series_ids.type):
+        codes = series_ids.indices.to_numpy(zero_copy_only=False)
+        names = series_ids.dictionary.to_pylist()
+    else:
+        codes, names = pd.factorize(series_ids.to_numpy(zero_copy_only=False))
+        names = list(names)
 
-        elif status_code == 504:
-            print('FRED API error: Gateway Time-out< in API query (status code: '+str(status_code)+'). Retry in '+str(5+request_count)+' seconds.')
-            time.sleep(5+request_count)
+    # Rows of each series must be contiguous
+    if np.count_nonzero(codes[1:] != codes[:-1])+1 > len(np.unique(codes)):
+        order = np.argsort(codes,kind='stable')
+        table = table.take(order).combine_chunks()
+        codes = codes[order]
 
+    dates = table.column('date').to_numpy()
+    values = table.column('value').to_numpy()
 
-        else:
-            r.raise_for_status()
+    boundaries = np.r_[0,np.flatnonzero(codes[1:] != codes[:-1])+1,len(codes)]
+
+    series_dict = {}
+
+    for start,stop in zip(boundaries[:-1],boundaries[1:]):
+
+        if start == stop:
+            continue
+
+        series_id = names[codes[start]]
+
+        new_series = series()
+        new_series.series_id = series_id
 
-        request_count+=1
+        for attribute,value in metadata.get(series_id,{}).items():
+            setattr(new_series,attribute,value)
 
-    if request_count >10 and status_code != 200:
+        data = pd.Series(values[start:stop],pd.DatetimeIndex(dates[start:stop],copy=False),copy=False)
 
-        raise Exception('Unknown FRED API error. Status code: ',status_code)
+        if not data.index.is_monotonic_increasing:
+            data = data.sort_index()
 
-    return r
+        new_series.data = data
 
+        # The stored date range is that of the series that was written, not of the rows that were read
+        new_series.date_range = 'Range: '+str(data.index[0])[:10]+' to '+str(data.index[-1])[:10]
 
-def get_vintage_dates(series_id):
+        series_dict[series_id] = new_series
+
+    return series_dict
+
+
+def get_vintage_dates(series_id,client=None):
 
     '''Returns vintage dates for series available from ALFRED.
 
     Args:
-        series_id (string): unique FRED series ID.
+        series_id (string):     unique FRED series ID.
+        client (FredClient):    Client used for requests. Default: None, use the module-level configuration
 
     Returns:
         list'''
 
-    request_url = 'https://api.stlouisfed.org/fred/series/vintagedates?series_id=GDPDEF&api_key='+api_key+'&file_type=json'
-    r = requests.get(request_url)
+    path = 'fred/series/vintagedates'
+
+    parameters = {'series_id':series_id,
+      'file_type':'json'
+     }
+
+    r = _client(client).request(path,parameters)
     results = r.json()
 
     return results['vintage_dates']
 
 
+def map_series(function,series_list,executor='thread',max_workers=None,chunksize=1):
+
+    '''Applies function to each series in series_list in parallel, e.g., a recipe like 
+    lambda s: s.hp_filter()[1].apc().window(['2000-01-01','2019-12-31']). Use executor='process' for
+    CPU-bound functions like the filters, which hold the GIL. With processes, function must be defined at
+    the top level of a module and series are sent to the workers as numpy arrays with their metadata.
+    An error raised for one series does not stop the others.
+
+    Args:
+        function (callable):        function that takes a fredpy series.
+        series_list (list or dict): fredpy series, a dict with fredpy series as values, or a 
+                                        fredpy.shared_series. Processes attach to the shared memory of a 
+                                        fredpy.shared_series instead of receiving copies of the data.
+        executor (string):          'thread' (default), 'process', or a concurrent.futures.Executor instance,
+                                        which is not shut down.
+        max_workers (int):          Number of threads or processes. Default: None, the concurrent.futures
+                                        default.
+        chunksize (int):            Number of series sent to a process at a time. Ignored for threads. 
+                                        Default: 1
+
+    Returns:
+        tuple: (results, errors). results has the values returned by function in the order of series_list
+            (a dict with the same keys if series_list is a dict or a fredpy.shared_series) with None for 
+            series that raised an error.
+            errors is a dict of the exceptions raised with positions (or keys) of series_list as keys.
+    '''
+
+    if type(series_list) == dict:
+        keys = list(series_list.keys())
+        items = list(series_list.values())
+    elif isinstance(series_list,shared_series):
+        keys = list(series_list.series_ids)
+    else:
+        keys = list(range(len(series_list)))
+        items = list(series_list)
+
+    if executor == 'thread':
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    elif executor == 'process':
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+    elif isinstance(executor,concurrent.futures.Executor):
+        pool = executor
+    else:
+        raise ValueError("executor must be 'thread', 'process', or a concurrent.futures.Executor")
+
+    if isinstance(series_list,shared_series):
+        if isinstance(pool,concurrent.futures.ProcessPoolExecutor):
+            items = series_list._references()
+        else:
+            items = [series_list.series(key) for key in keys]
+
+    try:
+        outcomes = list(pool.map(functools.partial(_map_item,function),items,chunksize=chunksize))
+    finally:
+        if pool is not executor:
+            pool.shutdown()
+
+    results = [result if succeeded else None for succeeded,result in outcomes]
+    errors = {key:result for key,(succeeded,result) in zip(keys,outcomes) if not succeeded}
+
+    if type(series_list) == dict or isinstance(series_list,shared_series):
+        results = dict(zip(keys,results))
+
+    return results, errors
+
+
 def minus(object1,object2):
 
     '''Subtracts the data from object2 from the data from object1.
@@ -1202,7 +4926,7 @@ def minus(object1,object2):
 
     else:
 
-        if not object1.data.index.equals(object2.data.index):
+        if not _same_dates(object1,object2):
 
             raise ValueError('object1 and object2 do not have the same observation dates')
 
@@ -1240,11 +4964,44 @@ def minus(object1,object2):
                 new_series.release = object1.release +' and '+object2.release
                 
             new_series.series_id = object1.series_id +' and '+object2.series_id
-            new_series.data  = object1.data-object2.data
+            _set_combined_data(new_series,object1,object2,np.subtract)
 
             return new_series
 
 
+def plot(series_list,downsample=None,n_buckets=None,ax=None,**kwargs):
+
+    '''Plots several series on one axis. Each line is labeled with the series_id of the series.
+
+    Args:
+        series_list (list or dict):         fredpy series
+        downsample (NoneType or string):    None (default), 'lttb', or 'minmax'. See fredpy.series.plot()
+        n_buckets (NoneType or int):        Number of buckets for downsampling. Default: width of the axis 
+                                                in pixels
+        ax (matplotlib.axes.Axes):          Axis to plot on. Default: None
+        kwargs:                             Keyword arguments for the .plot() method of each Pandas Series
+                                                object.
+
+    Returns:
+        matplotlib.axes.Axes
+    '''
+
+    if type(series_list) == dict:
+        series_list = list(series_list.values())
+
+    if ax is None:
+        ax = plt.gca()
+
+    for s in series_list:
+
+        line_kwargs = dict(kwargs)
+        line_kwargs.setdefault('label',s.series_id)
+
+        s.plot(downsample=downsample,n_buckets=n_buckets,ax=ax,**line_kwargs)
+
+    return ax
+
+
 def plus(object1,object2):
 
     '''Adds the data from object1 to the data from object2.
@@ -1280,7 +5037,7 @@ def plus(object1,object2):
 
     else:
 
-        if not object1.data.index.equals(object2.data.index):
+        if not _same_dates(object1,object2):
 
             raise ValueError('object1 and object2 do not have the same observation dates')
 
@@ -1318,13 +5075,47 @@ def plus(object1,object2):
                 new_series.release = object1.release +' and '+object2.release
                 
             new_series.series_id = object1.series_id +' and '+object2.series_id
-            new_series.data  = object1.data+object2.data
+            _set_combined_data(new_series,object1,object2,np.add)
 
             return new_series
 
+def read_parquet(path,series_ids=None,start=None,end=None):
+
+    '''Reads series from a Parquet file written by fredpy.to_parquet() or by other tools with columns
+    series_id, date, and value. Filters on series IDs and dates are pushed down to the Parquet reader so
+    that row groups without matching rows are skipped. Requires pyarrow.
+
+    Args:
+        path (string):          Location of the Parquet file or dataset directory.
+        series_ids (list):      unique FRED series IDs to read. Default: None, all series.
+        start (string):         Date of the first observation to read. Default: None
+        end (string):           Date of the last observation to read. Default: None
+
+    Returns:
+        dict of fredpy series with series IDs as keys
+    '''
+
+    pa = _import_pyarrow()
+
+    filters = []
+
+    if series_ids is not None:
+        filters.append(('series_id','in',list(series_ids)))
+
+    if start is not None:
+        filters.append(('date','>=',pd.to_datetime(start)))
+
+    if end is not None:
+        filters.append(('date','<=',pd.to_datetime(end)))
+
+    table = pa.parquet.read_table(path,columns=['series_id','date','value'],filters=filters if len(filters)>0 else None)
+
+    return from_arrow(table)
+
+
 def recessions(start=None,end=None,ax=None,color='0.5',alpha=0.5):
         
-    '''Creates recession bars for time series plots.
+    '''Creates recession bars for time series plots. All of the bars are drawn as one collection.
     
     Args:
         start (NoneType, string, or Timestamp):     Starting date. Default: None
@@ -1334,43 +5125,302 @@ def recessions(start=None,end=None,ax=None,color='0.5',alpha=0.5):
         alpha (float):                              Transparency of the recession bars. Must be between 0 and 1 
                                                         Default: 0.5
     Returns:
+        matplotlib.collections.PolyCollection
     '''
 
-    series_peaks = []
-    series_troughs = []
+    if ax is None:
+        ax = plt.gca()
 
-    if start is None:
-        start = cycle_dates.iloc[0]['peaks']
-        
-    elif type(start) == str:
-        start = pd.to_datetime(start)
-        
-    if end is None:
-        end = pd.to_datetime('today')
-        
-    elif type(end) == str:
-        end = pd.to_datetime(end)
+    recession_starts, recession_ends = _recession_intervals(start,end)
 
-    for k in range(len(cycle_dates)):
+    return _recession_bars(ax,recession_starts,recession_ends,color=color,alpha=alpha)
 
-        if cycle_dates['peaks'].loc[k]<start and start < cycle_dates['troughs'].loc[k]:
-            series_peaks.append(start)
-            series_troughs.append(cycle_dates['troughs'].loc[k])
 
+def remove_hook(event,function):
 
-        elif start < cycle_dates['peaks'].loc[k] and end > cycle_dates['troughs'].loc[k]:
-            series_peaks.append(cycle_dates['peaks'].loc[k])
-            series_troughs.append(cycle_dates['troughs'].loc[k])
+    '''Removes a function registered with fredpy.add_hook().
 
-        elif cycle_dates['peaks'].loc[k]<end and cycle_dates['troughs'].loc[k] > end:
-            series_peaks.append(cycle_dates['peaks'].loc[k])
-            series_troughs.append(end)
+    Args:
+        event (string):         event name used with fredpy.add_hook().
+        function (callable):    function to remove.
+
+    Returns:
+        None
+    '''
+
+    with _stats_lock:
+        _hooks[event].remove(function)
+
+
+def render(charts,directory,executor='process',max_workers=None,chunksize=1,recession_bars=True,downsample=None,n_buckets=None,figsize=(6.4,4.8),dpi=100,file_format='png',**kwargs):
+
+    '''Renders charts to files in directory in parallel. Each chart is drawn on its own Agg figure 
+    without the pyplot state machine and recession bars are computed from peaks and troughs that are 
+    converted once and sent to the workers. Charts are rendered with fredpy.map_series() so an error for
+    one chart does not stop the others.
+
+    Args:
+        charts (list or dict):      fredpy series or dicts with key 'series' (a fredpy series or a list of 
+                                        fredpy series to plot together) and optional keys 'filename', 
+                                        'title', and 'ylabel'. Defaults are the series_id with the 
+                                        file_format extension, the title, and the units_short of the 
+                                        first series. A fredpy.shared_series is also accepted.
+        directory (string):         Directory for the files. Created if it does not exist.
+        executor (string):          'process' (default), 'thread', or a concurrent.futures.Executor 
+                                        instance. See fredpy.map_series()
+        max_workers (int):          Number of processes or threads. Default: None
+        chunksize (int):            Number of charts sent to a process at a time. Default: 1
+        recession_bars (bool):      Whether to draw recession bars. Default: True
+        downsample (NoneType or string):
+                                    None (default), 'lttb', or 'minmax'. See fredpy.series.plot()
+        n_buckets (NoneType or int):Number of buckets for downsampling. Default: width of the axis in pixels
+        figsize (tuple):            Figure size in inches. Default: (6.4,4.8)
+        dpi (int):                  Resolution in dots per inch. Default: 100
+        file_format (string):       Format of the files, e.g., 'png', 'svg', or 'pdf'. Default: 'png'
+        kwargs:                     Keyword arguments for the .plot() method of each Pandas Series object.
+
+    Returns:
+        tuple: (paths, errors). See fredpy.map_series()
+    '''
+
+    os.makedirs(directory,exist_ok=True)
+
+    # Workers receive the unclipped peaks and troughs so that they don't need cycle_dates
+    if recession_bars:
+        _recession_intervals()
+        peaks, troughs = _recession_cache['peaks'], _recession_cache['troughs']
+    else:
+        peaks, troughs = None, None
+
+    options = {'directory':directory,'recession_bars':recession_bars,'peaks':peaks,'troughs':troughs,
+               'downsample':downsample,'n_buckets':n_buckets,'figsize':figsize,'dpi':dpi,
+               'file_format':file_format,'plot_kwargs':kwargs}
+
+    return map_series(functools.partial(_render_chart,options),charts,executor=executor,max_workers=max_workers,chunksize=chunksize)
+
+
+def reset_stats():
+
+    '''Resets the counters and timing histograms returned by fredpy.stats().
+
+    Args:
+
+    Returns:
+        None
+    '''
+
+    with _stats_lock:
+        _stats.clear()
+
+
+def revalidate(series_ids=None,force=False,max_workers=8,client=None):
+
+    '''Checks whether expired series in fredpy.series_cache have been updated on FRED using one request
+    for the last_updated value of each series. Series that have not been updated are kept in the cache
+    with a new expiration time so that only the observations of updated series are downloaded again.
+    Expired series are also checked this way when they are requested with fredpy.series.
+
+    Args:
+        series_ids (list):      unique FRED series IDs to check. Default: None, all cached series.
+        force (bool):           Whether to also check series that have not expired. Default: False
+        max_workers (int):      Number of concurrent requests. Default: 8
+        client (FredClient):    Client used for requests and caching. Default: None, use the module-level
+                                    configuration
+
+    Returns:
+        dict with series_cache keys as keys and 'not_modified' or 'updated' as values
+    '''
+
+    return _client(client).revalidate(series_ids=series_ids,force=force,max_workers=max_workers)
+
+
+def search(search_text,search_type='full_text',offline=False,client=None):
+
+    '''Generator over metadata for the series matching a search of FRED. The next page of results is 
+    requested while the current page is consumed. If fredpy.search_index is set, results are added
+    to the index and a repeated search is answered from the index without querying the FRED API.
+
+    Args:
+        search_text (string):   words to search for.
+        search_type (string):   'full_text' (default) to search series attributes or 'series_id' to 
+                                    search series IDs. '*' is a wildcard for 'series_id' searches.
+        offline (bool):         If True, search fredpy.search_index only. Default: False
+        client (FredClient):    Client used for requests. Default: None, use the module-level configuration
+
+    Returns:
+        generator of dicts
+    '''
+
+    if offline:
+
+        if search_index is None:
+            raise ValueError('fredpy.search_index value not assigned. Offline search requires a fredpy.metadata_index.')
+
+        for record in search_index.search(search_text):
+            yield record
+
+        return
+
+    query = search_type+':'+search_text
+
+    if search_index is not None:
+
+        records = search_index._get_query(query)
+
+        if records is not None:
+
+            for record in records:
+                yield record
+
+            return
+
+    parameters = {'search_text':search_text,
+      'search_type':search_type
+     }
+
+    series_ids = []
+
+    for record in _paged_results('fred/series/search',parameters,'seriess',index=search_index,client=client):
+        series_ids.append(record['id'])
+        yield record
+
+    if search_index is not None:
+        search_index._set_query(query,series_ids)
+
+
+def stats():
+
+    '''Returns counters and timing histograms for requests to the FRED API, fredpy.series_cache, and 
+    parsing of observations since the module was imported or fredpy.reset_stats() was called:
+
+        {'requests':    {path: {'count','bytes','status_codes','retries','sleep','latency'}},
+         'cache':       {'hits','misses','evictions','coalesced','revalidations','not_modified'},
+         'parse':       {'observations','time'}}
+
+    Timing histograms ('latency' and 'time') are dicts with keys 'count', 'sum' (seconds), and 'buckets'.
+    'buckets' maps the upper bound of each bucket in fredpy.histogram_buckets to the number of times 
+    in the bucket. 'sleep' is the number of seconds spent waiting to retry after status codes 429 and 504.
+    'not_modified' counts revalidations that found an expired series unchanged.
+
+    Args:
+
+    Returns:
+        dict
+    '''
+
+    with _stats_lock:
+
+        if len(_stats)==0:
+            _stats.update(_empty_stats())
+
+        return copy.deepcopy(_stats)
+
+
+def sync(series_ids,path=None,max_workers=8,client=None):
+
+    '''Re-downloads the series in series_ids that have been updated on FRED since the previous sync and
+    stores them in fredpy.series_cache. Updated series are found with the fred/series/updates path when
+    the previous sync was less than two weeks ago and otherwise with the last_updated value from the
+    fred/series path. Every series is downloaded on the first sync. The time of the sync is recorded
+    in fredpy.sync_watermark or, if client is given, in client.sync_watermark.
+
+    Args:
+        series_ids (list):  unique FRED series IDs to keep up to date.
+        path (string):      Location of a text file used to load and save the sync time between sessions.
+                                Default: None, the file is not used.
+        max_workers (int):  Number of concurrent requests. Default: 8
+        client (FredClient):Client used for requests and caching. Default: None, use the module-level 
+                                configuration
+
+    Returns:
+        dict of fredpy series with series IDs as keys
+    '''
+
+    global sync_watermark
+
+    default = client is None
+    client = _client(client)
+
+    if path is not None and os.path.exists(path):
+        with open(path,'r') as watermark_file:
+            client.sync_watermark = pd.to_datetime(watermark_file.readline().strip())
+
+    watermark = client.sync_watermark
+
+    now = pd.Timestamp.now(tz='America/Chicago').floor('min')
+
+    if watermark is None:
+
+        updated = list(series_ids)
+
+    elif now - watermark < pd.Timedelta(days=14):
+
+        parameters = {'filter_value':'all',
+          'start_time':watermark.strftime('%Y%m%d%H%M'),
+          'end_time':now.strftime('%Y%m%d%H%M')
+         }
+
+        updated_ids = set(record['id'] for record in _paged_results('fred/series/updates',parameters,'seriess',client=client))
+        updated = [series_id for series_id in series_ids if series_id in updated_ids]
+
+    else:
+
+        def last_updated(series_id):
+
+            parameters = {'series_id':series_id,
+              'file_type':'json'
+             }
+
+            r = client.request('fred/series',parameters)
+            return pd.to_datetime(r.json()['seriess'][0]['last_updated'])
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            last_updated_times = list(executor.map(last_updated,series_ids))
+
+        updated = [series_id for series_id,t in zip(series_ids,last_updated_times) if t >= watermark]
+
+    def download(series_id):
+
+        new_series = series(series_id,cache=False,client=client)
+        client._cache_set(_cache_key(series_id),new_series)
+
+        return new_series
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        downloaded = list(executor.map(download,updated))
+
+    client.sync_watermark = now
+
+    if default:
+        sync_watermark = now
+
+    if path is not None:
+        with open(path,'w') as watermark_file:
+            watermark_file.write(now.isoformat())
+
+    return {s.series_id:s for s in downloaded}
+
+
+def tag_series(tag_names,client=None):
+
+    '''Generator over metadata for the series matching all of a list of FRED tags. The next page of 
+    results is requested while the current page is consumed.
+
+    Args:
+        tag_names (list or string): FRED tag names. E.g., ['usa','gdp']
+        client (FredClient):        Client used for requests. Default: None, use the module-level configuration
+
+    Returns:
+        generator of dicts
+    '''
+
+    if type(tag_names) == str:
+        tag_names = [tag_names]
+
+    parameters = {'tag_names':';'.join(tag_names)}
+
+    return _paged_results('fred/tags/series',parameters,'seriess',index=search_index,client=client)
 
-    for k in range(len(series_peaks)):
-        if ax is None:
-            plt.axvspan(series_peaks[k], series_troughs[k], edgecolor= color, facecolor=color, alpha=alpha)
-        else:
-            ax.axvspan(series_peaks[k], series_troughs[k], edgecolor= color, facecolor=color, alpha=alpha)
 
 def times(object1,object2):
 
@@ -1408,7 +5458,7 @@ def times(object1,object2):
 
     else:
 
-        if not object1.data.index.equals(object2.data.index):
+        if not _same_dates(object1,object2):
 
             raise ValueError('object1 and object2 do not have the same observation dates')
 
@@ -1446,11 +5496,79 @@ def times(object1,object2):
                 new_series.release = object1.release +' and '+object2.release
                 
             new_series.series_id = object1.series_id +' and '+object2.series_id
-            new_series.data  = object1.data*object2.data
+            _set_combined_data(new_series,object1,object2,np.multiply)
 
             return new_series
 
 
+def to_arrow(series_list):
+
+    '''Returns a pyarrow Table in long format with columns series_id (dictionary encoded), date, and 
+    value, one row per observation. The metadata of each series (title, units, frequency, etc.) are 
+    stored as JSON in the schema metadata under the key 'fredpy'. Requires pyarrow.
+
+    Args:
+        series_list (list or dict): fredpy series or a dict with fredpy series as values.
+
+    Returns:
+        pyarrow Table
+    '''
+
+    pa = _import_pyarrow()
+
+    if type(series_list) == dict:
+        series_list = list(series_list.values())
+
+    lengths = [len(s.data) for s in series_list]
+
+    codes = np.repeat(np.arange(len(series_list),dtype=np.int32),lengths)
+    series_ids = pa.DictionaryArray.from_arrays(pa.array(codes),pa.array([s.series_id for s in series_list],pa.string()))
+
+    # Values are float32 if the data of every series are float32 and float64 otherwise
+    dtype = np.result_type(np.float32,*[s.data.dtype for s in series_list])
+
+    # A single series is not copied
+    if len(series_list)==1:
+        dates = np.asarray(series_list[0].data.index.values)
+        values = np.asarray(series_list[0].data.values,dtype=dtype)
+    elif len(series_list)>1:
+        dates = np.concatenate([np.asarray(s.data.index.values) for s in series_list])
+        values = np.concatenate([np.asarray(s.data.values,dtype=dtype) for s in series_list])
+    else:
+        dates = np.array([],dtype='datetime64[ns]')
+        values = np.array([],dtype=np.float64)
+
+    metadata = {s.series_id:{attribute:getattr(s,attribute) for attribute in _metadata_attributes} for s in series_list}
+
+    table = pa.table({'series_id':series_ids,'date':pa.array(dates),'value':pa.array(values)})
+
+    return table.replace_schema_metadata({'fredpy':json.dumps(metadata,default=str)})
+
+
+def to_parquet(series_list,path,row_group_size=None):
+
+    '''Writes series to a Parquet file in the format of fredpy.to_arrow(). Rows are sorted by series ID
+    so that readers can skip row groups using the series_id statistics. Requires pyarrow.
+
+    Args:
+        series_list (list or dict): fredpy series or a dict with fredpy series as values.
+        path (string):              Location of the Parquet file.
+        row_group_size (int):       Maximum number of rows in each row group. Default: None, pyarrow default
+
+    Returns:
+        None
+    '''
+
+    pa = _import_pyarrow()
+
+    if type(series_list) == dict:
+        series_list = list(series_list.values())
+
+    table = to_arrow(sorted(series_list,key=lambda s: s.series_id))
+
+    pa.parquet.write_table(table,path,row_group_size=row_group_size)
+
+
 def to_fred_series(data,dates,frequency='',frequency_short='',last_updated='',notes='',release='',seasonal_adjustment='',seasonal_adjustment_short='',series_id='',source='',t=0,title='',units='',units_short=''):
     
     '''Create a FRED object from a set of data obtained from a different source.
@@ -1544,8 +5662,17 @@ def window_equalize(series_list):
     minimums = []
     maximums = []
     for s in series_list:
-        minimums.append(s.data.index[0])
-        maximums.append(s.data.index[-1])
+
+        # Dates of the first and last observations of series with integer period indexes are computed
+        periods = s._periods()
+
+        if periods is not None:
+            start, step, values = periods
+            minimums.append(pd.Timestamp(np.datetime64(start,'M')))
+            maximums.append(pd.Timestamp(np.datetime64(start+step*(len(values)-1),'M')))
+        else:
+            minimums.append(s.data.index[0])
+            maximums.append(s.data.index[-1])
 
     start_end = [np.max(minimums),np.min(maximums)]
 
@@ -1555,3 +5682,61 @@ def window_equalize(series_list):
         new_list.append(s.window(start_end))
 
     return new_list
+
+
+def write_warehouse(series_list,path):
+
+    '''Writes series to a directory that can be opened with fredpy.warehouse. The observations of the
+    series with the same frequency and data type (float32 or float64) are stored in one contiguous 
+    array of values and one of dates. 
+    The metadata of each series and the location of its observations are stored in metadata.json.
+    Existing files in the directory are replaced.
+
+    Args:
+        series_list (list or dict): fredpy series or a dict with fredpy series as values, e.g., from
+                                        fredpy.release.fetch_all().
+        path (string):              Location of the warehouse directory.
+
+    Returns:
+        None
+    '''
+
+    if type(series_list) == dict:
+        series_list = list(series_list.values())
+
+    os.makedirs(path,exist_ok=True)
+
+    groups = {}
+    lengths = {}
+    metadata = {}
+
+    for s in series_list:
+
+        if s.series_id in metadata.keys() or s.series_id == '':
+            raise ValueError('Each series must have a unique series_id.')
+
+        group = s.frequency_short if s.frequency_short != '' else 'none'
+
+        # float32 series are stored in their own group
+        if s.data.dtype == np.float32:
+            group+= '_float32'
+
+        groups.setdefault(group,[]).append(s)
+
+        offset = lengths.get(group,0)
+        lengths[group] = offset+len(s.data)
+
+        metadata[s.series_id] = {'group':group,'offset':offset,'length':len(s.data),
+                                 'attributes':{attribute:getattr(s,attribute) for attribute in _metadata_attributes}}
+
+    for group in groups.keys():
+
+        dates = np.concatenate([np.asarray(s.data.index.values,dtype='datetime64[ns]') for s in groups[group]])
+        dtype = np.float32 if group.endswith('_float32') else np.float64
+        values = np.concatenate([np.asarray(s.data.values,dtype=dtype) for s in groups[group]])
+
+        np.save(os.path.join(path,'dates_'+group+'.npy'),dates)
+        np.save(os.path.join(path,'values_'+group+'.npy'),values)
+
+    with open(os.path.join(path,'metadata.json'),'w') as metadata_file:
+        json.dump(metadata,metadata_file,default=str)
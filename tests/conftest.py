@@ -0,0 +1,87 @@
+'''Shared setup for the fredpy tests. Every test runs offline: series are synthetic, business cycle
+dates are read from the repository, and API requests are served by fredpy.replay_server.'''
+
+import os
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
+import pytest
+import fredpy
+
+# Business cycle dates stored in the repository so that fredpy.recessions() works offline
+cycle_dates = pd.read_csv(os.path.join(os.path.dirname(__file__),'..','business cycle dates','business_cycle_dates.csv'))
+cycle_dates['peaks'] = pd.to_datetime(cycle_dates.peaks)
+cycle_dates['troughs'] = pd.to_datetime(cycle_dates.troughs)
+fredpy.cycle_dates = cycle_dates
+
+fredpy.api_key = 'test'
+
+frequencies = {'D':('Daily','D'),'M':('Monthly','MS'),'Q':('Quarterly','QS'),'A':('Annual','YS')}
+
+
+def make_series(n_obs,frequency,start='1950-01-01',seed=0,missing=()):
+
+    '''Returns a synthetic fredpy series with n_obs observations at frequency 'D', 'M', 'Q', or 'A'. 
+    Observations at the positions in missing are NaN.'''
+
+    dates = pd.date_range(start,periods=n_obs,freq=frequencies[frequency][1])
+
+    rng = np.random.default_rng(seed)
+    data = 100*np.exp(np.cumsum(rng.normal(0.002,0.01,n_obs)))
+    data[list(missing)] = np.nan
+
+    return fredpy.to_fred_series(data=data,dates=dates,frequency=frequencies[frequency][0],series_id='SYN'+frequency,
+                                 title='Synthetic series',units='Index',units_short='Index',source='fredpy tests')
+
+
+@pytest.fixture(autouse=True)
+def restore_configuration():
+
+    '''Empties the caches and closes the circuit breaker before each test and restores module-level configuration changed by a test.'''
+
+    names = ['transport','base_url','max_retries','circuit_breaker_threshold','circuit_breaker_reset','serve_stale',
+             'storage_dtype','use_numba']
+    saved = {name:getattr(fredpy,name) for name in names}
+
+    for cache in [fredpy.series_cache,fredpy.cache_expiration,fredpy.stale_cache,fredpy.release_calendar]:
+        cache.clear()
+
+    fredpy._default_client._circuit = {'failures':0,'opened':None}
+
+    yield
+
+    for name in names:
+        setattr(fredpy,name,saved[name])
+
+
+def make_server(series_list,observation_date):
+
+    '''Returns a fredpy.replay_server with API payloads for synthetic series observed on observation_date
+    and published in release 1.'''
+
+    server = fredpy.replay_server()
+    release_parameters = {'release_id':1,'realtime_start':observation_date,'realtime_end':observation_date}
+
+    server.add('fred/release',release_parameters,{'releases':[{'id':1,'name':'Synthetic Release','notes':''}]})
+    server.add('fred/release/sources',release_parameters,{'sources':[{'id':1,'name':'fredpy tests'}]})
+
+    records = []
+
+    for s in series_list:
+
+        parameters = {'series_id':s.series_id,'realtime_start':observation_date,'realtime_end':observation_date}
+        record = {'id':s.series_id,'title':s.title,'frequency':s.frequency,'frequency_short':s.frequency_short,
+                  'units':s.units,'units_short':s.units_short,'seasonal_adjustment':'Not Seasonally Adjusted',
+                  'seasonal_adjustment_short':'NSA','last_updated':'2020-01-01 07:45:00-06','notes':''}
+        records.append(record)
+
+        server.add('fred/series',parameters,{'seriess':[record]})
+        server.add('fred/series/observations',parameters,{'observations':[{'realtime_start':observation_date,'realtime_end':observation_date,
+            'date':d.strftime('%Y-%m-%d'),'value':'%.3f' % v} for d,v in s.data.items()]})
+        server.add('fred/series/release',parameters,{'releases':[{'id':1,'name':'Synthetic Release'}]})
+        server.add('fred/release/sources',{'series_id':s.series_id,'release_id':1},{'sources':[{'id':1,'name':'fredpy tests'}]})
+
+    server.add('fred/release/series',dict(release_parameters,limit=1000,offset=0),{'count':len(records),'seriess':records})
+
+    return server
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+import fredpy
+from conftest import make_series
+
+pytest.importorskip('pyarrow')
+
+
+def test_read_parquet_window_date_range(tmp_path):
+
+    s = make_series(300,'M')
+    path = str(tmp_path/'series.parquet')
+    fredpy.to_parquet([s],path)
+
+    window = fredpy.read_parquet(path,start='1960-01-01',end='1961-01-01')['SYNM']
+
+    assert len(window.data) == 13
+    assert window.date_range == 'Range: 1960-01-01 to 1961-01-01'
+    assert window.title == s.title
+    assert np.array_equal(window.data.values,s.window(['1960-01-01','1961-01-01']).data.values)
+
+
+def test_from_arrow_round_trip():
+
+    series_list = [make_series(300,'M'),make_series(100,'Q',missing=[3,4])]
+    restored = fredpy.from_arrow(fredpy.to_arrow(series_list))
+
+    for s in series_list:
+        assert restored[s.series_id].date_range == s.date_range
+        assert np.array_equal(restored[s.series_id].data.values,s.data.values,equal_nan=True)
+        assert restored[s.series_id].data.index.equals(s.data.index)
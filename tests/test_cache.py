@@ -0,0 +1,266 @@
+import json
+import threading
+import numpy as np
+import pytest
+import pandas as pd
+import fredpy
+from conftest import make_series, make_server
+
+
+def test_release_dates_failure_expires_at_end_of_day():
+
+    s = make_series(120,'M')
+    today = fredpy._today()
+    fredpy.transport = make_server([s],today)
+
+    downloaded = fredpy.series('SYNM')
+
+    # fred/release/dates is not recorded so the request fails with status code 404
+    expiration = fredpy.cache_expiration[fredpy._cache_key('SYNM')]
+
+    assert np.allclose(downloaded.data.values,s.data.values,atol=1e-3)
+    assert expiration == pd.Timestamp(today,tz='America/Chicago') + pd.Timedelta(days=1)
+    assert downloaded.observation_date == pd.Timestamp(today).strftime('%B %d, %Y')
+
+
+def test_release_calendar_uses_date_in_st_louis():
+
+    s = make_series(120,'M')
+    today = fredpy._today()
+    server = make_server([s],today)
+    server.add('fred/release/dates',{'release_id':1,'realtime_start':today,'realtime_end':'9999-12-31',
+        'include_release_dates_with_no_data':'true','sort_order':'asc','limit':3},{'release_dates':[{'release_id':1,'date':'2200-01-01'}]})
+    fredpy.transport = server
+
+    fredpy.series('SYNM')
+
+    assert fredpy.cache_expiration[fredpy._cache_key('SYNM')] == pd.Timestamp('2200-01-01',tz='America/Chicago')
+
+
+def test_release_dates_exhausted_retries_expire_at_end_of_day(monkeypatch):
+
+    monkeypatch.setattr(fredpy.time,'sleep',lambda seconds: None)
+
+    s = make_series(120,'M')
+    today = fredpy._today()
+    server = make_server([s],today)
+
+    class transport:
+
+        # Every request for release dates is rate limited
+        def get(self,url,timeout=None):
+            if 'fred/release/dates' in url:
+                server.errors.append(429)
+            return server.get(url,timeout=timeout)
+
+    fredpy.transport = transport()
+    fredpy.max_retries = 2
+
+    downloaded = fredpy.series('SYNM')
+
+    release_dates_requests = [path for path,parameters in server.requests if path == 'fred/release/dates']
+
+    assert len(release_dates_requests) == 3
+    assert np.allclose(downloaded.data.values,s.data.values,atol=1e-3)
+    assert fredpy._cache_key('SYNM') in fredpy.series_cache
+    assert fredpy.cache_expiration[fredpy._cache_key('SYNM')] == pd.Timestamp(today,tz='America/Chicago') + pd.Timedelta(days=1)
+
+
+def test_stale_series_keeps_observation_date():
+
+    s = make_series(120,'M')
+    today = fredpy._today()
+    server = make_server([s],today)
+    fredpy.transport = server
+    fredpy.max_retries = 0
+    fredpy.circuit_breaker_threshold = 1
+    fredpy.circuit_breaker_reset = 60
+
+    downloaded = fredpy.series('SYNM')
+    fredpy.cache_expiration[fredpy._cache_key('SYNM')] = pd.Timestamp('2000-01-01',tz='America/Chicago')
+
+    # The first failed request opens the circuit and the next request is answered from stale_cache
+    server.errors = [500]
+
+    try:
+        fredpy.series('SYNM')
+    except Exception:
+        pass
+
+    with pytest.warns(UserWarning,match='FRED API unavailable'):
+        stale = fredpy.series('SYNM')
+
+    assert stale.observation_date == downloaded.observation_date != ''
+    assert np.array_equal(stale.data.values,downloaded.data.values)
+
+
+def test_hooks_run_without_the_cache_lock():
+
+    s = make_series(120,'M')
+    fredpy.transport = make_server([s],fredpy._today())
+    fredpy.series('SYNM')
+
+    key = fredpy._cache_key('SYNM')
+    client = fredpy._client()
+    finished = []
+
+    # Another thread can use the cache while a hook runs, e.g., a hook that waits for an exporter thread
+    def hook(event,info):
+        thread = threading.Thread(target=client._cache_get,args=('missing',),daemon=True)
+        thread.start()
+        thread.join(2)
+        finished.append((event,not thread.is_alive()))
+
+    fredpy.add_hook('cache_hit',hook)
+    fredpy.add_hook('cache_eviction',hook)
+
+    try:
+        client._cache_get(key)
+        fredpy.cache_expiration[key] = pd.Timestamp('2000-01-01',tz='America/Chicago')
+        client._cache_get(key)
+        fredpy.series_cache[key] = s
+        fredpy.cache_expiration[key] = pd.Timestamp('2000-01-01',tz='America/Chicago')
+        client.revalidate(series_ids=[])
+    finally:
+        fredpy.remove_hook('cache_hit',hook)
+        fredpy.remove_hook('cache_eviction',hook)
+
+    assert finished == [('cache_hit',True),('cache_eviction',True),('cache_eviction',True)]
+
+
+def test_single_flight_leader_checks_cache_again(monkeypatch):
+
+    s = make_series(120,'M')
+    server = make_server([s],fredpy._today())
+    fredpy.transport = server
+    downloaded = fredpy.series('SYNM')
+    n_requests = len(server.requests)
+
+    # A request that missed the cache just before another request stored the series
+    client = fredpy._client()
+    monkeypatch.setattr(client,'_cache_get',lambda key: None)
+
+    again = fredpy.series('SYNM')
+
+    assert len(server.requests) == n_requests
+    assert np.array_equal(again.data.values,downloaded.data.values)
+
+    fredpy.series('SYNM',cache=False)
+
+    assert len(server.requests) > n_requests
+
+
+def test_concurrent_downloads_are_coalesced():
+
+    s = make_series(120,'M')
+    server = make_server([s],fredpy._today())
+    started = threading.Event()
+    release = threading.Event()
+
+    class transport:
+
+        # Hold the first download until the second request is waiting for it
+        def get(self,url,timeout=None):
+            if 'fred/series/observations' in url:
+                started.set()
+                release.wait(5)
+            return server.get(url,timeout=timeout)
+
+    fredpy.transport = transport()
+    coalesced = []
+    hook = lambda event,info: (coalesced.append(info['key']),release.set())
+    fredpy.add_hook('coalesced',hook)
+
+    results = []
+
+    try:
+        first = threading.Thread(target=lambda: results.append(fredpy.series('SYNM')))
+        first.start()
+        started.wait(5)
+        results.append(fredpy.series('SYNM'))
+        first.join(5)
+    finally:
+        fredpy.remove_hook('coalesced',hook)
+
+    observation_requests = [path for path,parameters in server.requests if path == 'fred/series/observations']
+
+    assert coalesced == [fredpy._cache_key('SYNM')]
+    assert len(observation_requests) == 1
+    assert len(results) == 2
+    assert np.array_equal(results[0].data.values,results[1].data.values)
+
+
+def add_last_updated(server,series_id,last_updated):
+
+    '''Records last_updated for series_id in the metadata requested by revalidation and by downloads.'''
+
+    server.add('fred/series',{'series_id':series_id},{'seriess':[{'id':series_id,'last_updated':last_updated}]})
+
+    today = fredpy._today()
+    parameters = {'series_id':series_id,'realtime_start':today,'realtime_end':today}
+    results = json.loads(server.responses[server._key('fred/series',parameters)])
+    results['seriess'][0]['last_updated'] = last_updated
+    server.add('fred/series',parameters,results)
+
+
+def observation_requests(server):
+
+    return [parameters['series_id'] for path,parameters in server.requests if path == 'fred/series/observations']
+
+
+def test_expired_series_is_revalidated_before_download():
+
+    s = make_series(120,'M')
+    server = make_server([s],fredpy._today())
+    fredpy.transport = server
+    key = fredpy._cache_key('SYNM')
+
+    downloaded = fredpy.series('SYNM')
+
+    revalidations = []
+    hook = lambda event,info: revalidations.append(info['modified'])
+    fredpy.add_hook('revalidation',hook)
+
+    try:
+
+        # Not updated on FRED: the expired copy is kept without downloading observations
+        add_last_updated(server,'SYNM',downloaded.last_updated)
+        fredpy.cache_expiration[key] = pd.Timestamp('2000-01-01',tz='America/Chicago')
+        kept = fredpy.series('SYNM')
+
+        assert observation_requests(server) == ['SYNM']
+        assert np.array_equal(kept.data.values,downloaded.data.values)
+        assert fredpy.cache_expiration[key] > pd.Timestamp.now(tz='America/Chicago')
+
+        # Updated on FRED: observations are downloaded again
+        add_last_updated(server,'SYNM','2030-01-01 07:45:00-06')
+        fredpy.cache_expiration[key] = pd.Timestamp('2000-01-01',tz='America/Chicago')
+        fredpy.series('SYNM')
+
+        assert observation_requests(server) == ['SYNM','SYNM']
+
+    finally:
+        fredpy.remove_hook('revalidation',hook)
+
+    assert revalidations == [False,True]
+
+
+def test_revalidate_checks_expired_series():
+
+    today = fredpy._today()
+    server = make_server([make_series(120,'M'),make_series(40,'Q')],today)
+    fredpy.transport = server
+
+    monthly = fredpy.series('SYNM')
+    fredpy.series('SYNQ')
+
+    add_last_updated(server,'SYNM',monthly.last_updated)
+    add_last_updated(server,'SYNQ','2030-01-01 07:45:00-06')
+
+    assert fredpy.revalidate() == {}
+
+    fredpy.cache_expiration[fredpy._cache_key('SYNM')] = pd.Timestamp('2000-01-01',tz='America/Chicago')
+
+    assert fredpy.revalidate() == {fredpy._cache_key('SYNM'):'not_modified'}
+    assert fredpy.revalidate(force=True) == {fredpy._cache_key('SYNM'):'not_modified',fredpy._cache_key('SYNQ'):'updated'}
+    assert observation_requests(server) == ['SYNM','SYNQ','SYNQ']
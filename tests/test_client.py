@@ -0,0 +1,118 @@
+import pytest
+import fredpy
+from conftest import make_series, make_server
+
+
+def client_for(server,**kwargs):
+
+    return fredpy.FredClient(api_key='test',transport=server,circuit_breaker_threshold=100,**kwargs)
+
+
+def test_exhausted_retries_raise_fred_api_error(monkeypatch,capsys):
+
+    monkeypatch.setattr(fredpy.time,'sleep',lambda seconds: None)
+
+    server = make_server([make_series(24,'M')],'2020-01-01')
+    server.errors = [429]*3
+    client = client_for(server,max_retries=2)
+
+    retries = []
+    hook = lambda event,info: retries.append(info['status_code'])
+    fredpy.add_hook('retry',hook)
+
+    try:
+        with pytest.raises(fredpy.FredAPIError) as error:
+            client.request('fred/series',{'series_id':'SYNM','realtime_start':'2020-01-01','realtime_end':'2020-01-01','file_type':'json'})
+    finally:
+        fredpy.remove_hook('retry',hook)
+
+    assert error.value.status_code == 429
+    assert 'after 2 retries' in str(error.value)
+    assert retries == [429,429]
+    assert capsys.readouterr().out == ''
+
+
+def test_deadline_exceeded():
+
+    server = make_server([make_series(24,'M')],'2020-01-01')
+    server.errors = [504]*5
+    client = client_for(server,request_deadline=0.5)
+
+    # replay_server asks clients to retry after one second
+    with pytest.raises(fredpy.DeadlineExceeded) as error:
+        client.request('fred/series',{'series_id':'SYNM','realtime_start':'2020-01-01','realtime_end':'2020-01-01','file_type':'json'})
+
+    assert isinstance(error.value,fredpy.FredAPIError)
+    assert error.value.status_code == 504
+
+
+def test_transport_receives_timeout():
+
+    server = make_server([make_series(24,'M')],'2020-01-01')
+    timeouts = []
+
+    class transport:
+
+        def get(self,url,timeout=None):
+            timeouts.append(timeout)
+            return server.get(url)
+
+    client = fredpy.FredClient(api_key='test',transport=transport(),request_timeout=(1,2))
+    s = client.series('SYNM',observation_date='2020-01-01')
+
+    assert len(s.data) == 24
+    assert set(timeouts) == {(1,2)}
+
+
+def test_clients_are_isolated():
+
+    today = fredpy._today()
+    monthly = make_series(24,'M')
+    quarterly = make_series(12,'Q',seed=1)
+    monthly_server = make_server([monthly],today)
+    quarterly_server = make_server([quarterly],today)
+    api_keys = []
+
+    class transport:
+
+        def __init__(self,server):
+            self.server = server
+
+        def get(self,url,timeout=None):
+            api_keys.append(fredpy.urllib.parse.parse_qs(fredpy.urllib.parse.urlsplit(url).query)['api_key'][0])
+            return self.server.get(url,timeout=timeout)
+
+    first = fredpy.FredClient(api_key='first',transport=transport(monthly_server))
+    second = fredpy.FredClient(api_key='second',transport=transport(quarterly_server))
+
+    s = first.series('SYNM')
+    api_keys_first = set(api_keys)
+    api_keys.clear()
+    r = second.release(1)
+    fetched = r.fetch_all()
+
+    assert len(s.data) == 24
+    assert list(fetched.keys()) == ['SYNQ']
+    assert api_keys_first == {'first'} and set(api_keys) == {'second'}
+    assert list(first.series_cache.keys()) == [fredpy._cache_key('SYNM')]
+    assert list(second.series_cache.keys()) == [fredpy._cache_key('SYNQ')]
+    assert len(fredpy.series_cache) == 0
+
+
+def test_circuit_breaker_is_per_client():
+
+    today = fredpy._today()
+    failing_server = make_server([make_series(24,'M')],today)
+    failing_server.errors = [500]
+    failing = fredpy.FredClient(api_key='test',transport=failing_server,max_retries=0,circuit_breaker_threshold=1)
+    working = fredpy.FredClient(api_key='test',transport=make_server([make_series(24,'M')],today),max_retries=0,circuit_breaker_threshold=1)
+    fredpy.transport = make_server([make_series(24,'M')],today)
+
+    with pytest.raises(fredpy.requests.exceptions.HTTPError):
+        failing.series('SYNM')
+
+    with pytest.raises(fredpy.CircuitOpenError):
+        failing.series('SYNM')
+
+    assert len(working.series('SYNM').data) == 24
+    assert len(fredpy.series('SYNM').data) == 24
@@ -0,0 +1,106 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+import fredpy
+from conftest import make_series
+
+
+def reference_lttb(x,y,n_out):
+
+    '''Largest triangle three buckets computed one point at a time as in Steinarsson (2013).'''
+
+    n_obs = len(x)
+    bucket_size = (n_obs-2)/(n_out-2)
+    positions = [0]
+    a = 0
+
+    for i in range(n_out-2):
+
+        start = int(i*bucket_size)+1
+        end = int((i+1)*bucket_size)+1
+
+        next_start = end
+        next_end = min(int((i+2)*bucket_size)+1,n_obs-1) if i < n_out-3 else n_obs
+
+        x_mean = np.mean(x[next_start:next_end])
+        y_mean = np.mean(y[next_start:next_end])
+
+        areas = [abs((x[a]-x_mean)*(y[j]-y[a])-(x[a]-x[j])*(y_mean-y[a])) for j in range(start,end)]
+        a = start+int(np.argmax(areas))
+        positions.append(a)
+
+    return np.array(positions+[n_obs-1])
+
+
+def test_lttb_matches_reference():
+
+    rng = np.random.default_rng(0)
+
+    for n_obs, n_out in [(100,10),(1000,37),(257,256),(50,3)]:
+
+        x = np.cumsum(rng.uniform(0.5,1.5,n_obs))
+        y = np.cumsum(rng.normal(size=n_obs))
+
+        positions = fredpy._lttb(x,y,n_out)
+
+        assert len(positions) == n_out
+        assert np.array_equal(positions,reference_lttb(x,y,n_out))
+
+    assert np.array_equal(fredpy._lttb(x[:5],y[:5],10),np.arange(5))
+
+
+def test_minmax_keeps_extremes_of_each_bucket():
+
+    rng = np.random.default_rng(1)
+    x = np.arange(1000,dtype=float)
+    y = rng.normal(size=1000)
+
+    positions = fredpy._minmax(x,y,20)
+    buckets = np.minimum((x/x[-1]*20).astype(int),19)
+
+    assert positions[0] == 0 and positions[-1] == 999
+    assert np.all(np.diff(positions)>0)
+
+    for b in range(20):
+        in_bucket = np.flatnonzero(buckets==b)
+        assert in_bucket[np.argmin(y[in_bucket])] in positions
+        assert in_bucket[np.argmax(y[in_bucket])] in positions
+
+    assert len(positions) <= 2*20+2
+    assert np.array_equal(fredpy._minmax(x[:30],y[:30],20),np.arange(30))
+
+
+def test_downsampling_keeps_spikes_and_drops_missing_values():
+
+    data = pd.Series(np.zeros(5000),pd.date_range('1990-01-01',periods=5000,freq='D'))
+    data.iloc[1234] = 10
+    data.iloc[4321] = -10
+    data.iloc[100:110] = np.nan
+
+    for method in ['lttb','minmax']:
+
+        downsampled = fredpy._downsample(data,method,n_buckets=50)
+
+        assert len(downsampled) <= 102
+        assert downsampled.notna().all()
+        assert downsampled.index[0] == data.index[0] and downsampled.index[-1] == data.index[-1]
+        assert downsampled.max() == 10 and downsampled.min() == -10
+
+    with pytest.raises(ValueError):
+        fredpy._downsample(data,'mean',n_buckets=50)
+
+
+def test_plot_downsamples_to_axis_width():
+
+    s = make_series(5000,'D')
+    fig, ax = plt.subplots(figsize=(2,1),dpi=100)
+
+    try:
+        s.plot(downsample='lttb',ax=ax)
+        width = int(ax.get_window_extent().width)
+        n_points = len(ax.get_lines()[0].get_xdata())
+    finally:
+        plt.close(fig)
+
+    assert n_points == width < 5000
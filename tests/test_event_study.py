@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+import fredpy
+from conftest import make_series
+
+
+def counting_series(n_obs,frequency,start='1950-01-01'):
+
+    '''Returns a synthetic series whose values are the positions of the observations.'''
+
+    s = make_series(n_obs,frequency,start=start)
+    s.data = pd.Series(np.arange(n_obs,dtype=np.float64),s.data.index)
+
+    return s
+
+
+def test_events_are_aligned_to_the_periods_that_contain_them():
+
+    monthly = counting_series(120,'M')
+    quarterly = counting_series(40,'Q')
+
+    values, event_dates, offsets, series_ids = fredpy.event_study(monthly,events=['1951-03-01','1952-06-30'],before=2,after=3)
+
+    assert values.shape == (2,6,1)
+    assert list(offsets) == [-2,-1,0,1,2,3]
+    assert series_ids == ['SYNM']
+    assert list(event_dates) == [pd.Timestamp('1951-03-01'),pd.Timestamp('1952-06-30')]
+    assert np.array_equal(values[:,:,0],[[12,13,14,15,16,17],[27,28,29,30,31,32]])
+
+    values = fredpy.event_study(quarterly,events=['1951-08-15'],before=1,after=1)[0]
+
+    assert np.array_equal(values[0,:,0],[5,6,7])
+
+    with pytest.raises(ValueError):
+        fredpy.event_study([monthly,quarterly])
+
+
+def test_events_outside_the_sample():
+
+    monthly = counting_series(120,'M')
+
+    # Before the first observation, within the period of the last observation, after the sample
+    events = ['1949-12-31','1959-12-31','1960-01-01']
+    values = fredpy.event_study(monthly,events=events,before=1,after=1)[0]
+
+    assert np.all(np.isnan(values[0]))
+    assert np.array_equal(values[1,:,0],[118,119,np.nan],equal_nan=True)
+    assert np.all(np.isnan(values[2]))
+
+    # Offsets that run past either end of the sample are NaN
+    values = fredpy.event_study(monthly,events=['1950-01-01','1959-12-01'],before=2,after=2)[0]
+
+    assert np.array_equal(values[:,:,0],[[np.nan,np.nan,0,1,2],[117,118,119,np.nan,np.nan]],equal_nan=True)
+
+
+def test_one_observation_panel():
+
+    monthly = counting_series(1,'M',start='2000-01-01')
+    panel = pd.DataFrame({'A':[5.0]},index=pd.date_range('2000-01-01',periods=1,freq='MS'))
+    no_frequency = pd.DataFrame({'A':[5.0]},index=pd.DatetimeIndex(['2000-01-01']))
+
+    values = fredpy.event_study(monthly,events=['2000-01-20','2000-02-01'],before=1,after=1)[0]
+
+    assert np.array_equal(values[:,:,0],[[np.nan,0,np.nan],[np.nan,np.nan,np.nan]],equal_nan=True)
+    assert fredpy.event_study(panel,events=['2000-01-20'],before=0,after=0)[0][0,0,0] == 5
+    assert np.isnan(fredpy.event_study(no_frequency,events=['2000-01-20'],before=0,after=0)[0][0,0,0])
+    assert fredpy.event_study(no_frequency,events=['2000-01-01'],before=0,after=0)[0][0,0,0] == 5
+
+    empty = fredpy.event_study(panel.iloc[:0],events=['2000-01-01'],before=1,after=1)[0]
+
+    assert empty.shape == (1,3,1) and np.all(np.isnan(empty))
+
+
+def test_normalize():
+
+    monthly = counting_series(120,'M')
+    monthly.data = monthly.data + 1
+    other = make_series(120,'M',missing=[14])
+    other.series_id = 'OTHER'
+
+    values = fredpy.event_study([monthly,other],events=['1951-03-01','1951-04-01'],before=1,after=1,normalize=True)[0]
+
+    assert np.allclose(values[:,:,0],[[1400/15,100,1600/15],[1500/16,100,1700/16]])
+
+    # The event value of the second series is missing for the first event
+    assert np.all(np.isnan(values[0,:,1]))
+    assert np.isclose(values[1,1,1],100) and np.isnan(values[1,0,1])
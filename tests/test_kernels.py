@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.api as sm
+import fredpy
+from conftest import make_series
+
+# Numbers of observations with more than one year of data at each frequency
+lengths = {'D':800,'M':240,'Q':120,'A':60}
+
+
+@pytest.fixture(params=['numpy','loop'])
+def kernels(request,monkeypatch):
+
+    '''Runs the series methods with the numpy kernels or with the _*_loop kernels as plain Python, i.e., 
+    as if the loops had been compiled with Numba.'''
+
+    if request.param == 'numpy':
+        monkeypatch.setattr(fredpy,'use_numba',False)
+    else:
+        monkeypatch.setattr(fredpy,'use_numba',True)
+        monkeypatch.setattr(fredpy,'_numba_kernels',{name:getattr(fredpy,'_'+name+'_loop') for name in ['aggregate','hp_one_sided','rolling_mean']})
+
+    return request.param
+
+
+def assert_same(new_series,expected):
+
+    assert new_series.data.index.equals(expected.index)
+    assert np.allclose(new_series.data.values,expected.values,rtol=1e-10,atol=1e-10,equal_nan=True)
+
+
+def test_kernel_selection(monkeypatch):
+
+    monkeypatch.setattr(fredpy,'use_numba',False)
+
+    assert fredpy._kernel('aggregate') is fredpy._aggregate_numpy
+    assert fredpy._kernel('rolling_mean') is fredpy._rolling_mean_numpy
+    assert fredpy._kernel('hp_one_sided') is fredpy._hp_one_sided_loop
+
+
+def test_aggregate_loop_and_numpy():
+
+    rng = np.random.default_rng(0)
+    table = rng.normal(size=(50,7))
+    table[rng.random(table.shape)<0.3] = np.nan
+    table[3] = np.nan
+
+    for method in range(len(fredpy._aggregation_methods)):
+        assert np.allclose(fredpy._aggregate_loop(table,method),fredpy._aggregate_numpy(table,method),equal_nan=True)
+
+    # Rows without values are NaN except for the sum
+    assert np.isnan(fredpy._aggregate_loop(table,2)[3])
+    assert fredpy._aggregate_loop(table,6)[3] == 0
+
+
+def test_rolling_mean_loop_and_numpy():
+
+    rng = np.random.default_rng(1)
+    values = rng.normal(size=(3,100))
+    values[0,[10,11,50]] = np.nan
+
+    for length in [1,4,12,100,101]:
+
+        expected = pd.DataFrame(values.T).rolling(window=length).mean().to_numpy().T
+
+        assert np.allclose(fredpy._rolling_mean_loop(values,length),expected,equal_nan=True)
+        assert np.allclose(fredpy._rolling_mean_numpy(values,length),expected,equal_nan=True)
+
+
+def test_hp_one_sided_loop():
+
+    values = make_series(80,'Q').data.to_numpy()
+
+    expected = values.copy()
+    for i in range(2,len(values)):
+        expected[i] = sm.tsa.filters.hpfilter(values[:i+1],lamb=1600)[1][-1]
+
+    assert np.allclose(fredpy._hp_one_sided_loop(values[np.newaxis],1600.0)[0],expected,rtol=1e-10)
+
+
+@pytest.mark.parametrize('frequency',['D','M','Q','A'])
+@pytest.mark.parametrize('missing',[(),(20,21,35)])
+def test_percent_change(kernels,frequency,missing):
+
+    s = make_series(lengths[frequency],frequency,missing=missing)
+    data = s.data
+
+    for log in [False,True]:
+        for backward in [True,False]:
+
+            ratio = data/data.shift(1) if backward else data.shift(-1)/data
+            annual_ratio = data/data.shift(s.t) if backward else data.shift(-s.t)/data
+
+            if log:
+                expected_pc, expected_annualized, expected_apc = 100*np.log(ratio), 100*s.t*np.log(ratio), 100*np.log(annual_ratio)
+            else:
+                expected_pc, expected_annualized, expected_apc = 100*(ratio-1), 100*(ratio**s.t-1), 100*(annual_ratio-1)
+
+            assert_same(s.pc(log=log,backward=backward),expected_pc.dropna())
+            assert_same(s.pc(log=log,backward=backward,annualized=True),expected_annualized.dropna())
+            assert_same(s.apc(log=log,backward=backward),expected_apc.dropna())
+
+
+@pytest.mark.parametrize('frequency',['D','M','Q','A'])
+@pytest.mark.parametrize('missing',[(),(20,21,35)])
+def test_ma(kernels,frequency,missing):
+
+    s = make_series(lengths[frequency],frequency,missing=missing)
+
+    for length in [1,4,5,12]:
+        for center in [False,True]:
+            assert_same(s.ma(length,center=center),s.data.rolling(window=length,center=center).mean().dropna())
+
+
+# With the large smoothing parameters used for daily data, the HP system is badly conditioned and both 
+# solutions differ from the exact trend by about 1e-7 relative to the data
+@pytest.mark.parametrize('frequency,lamb,rtol',[('D',1600*30**4,1e-6),('M',129600,1e-8),('Q',1600,1e-8),('A',6.25,1e-8)])
+def test_hp_filter_one_sided(kernels,frequency,lamb,rtol):
+
+    s = make_series(60,frequency)
+    data = s.data
+
+    trend = data.copy()
+    for i in range(2,len(data)):
+        trend.iloc[i] = sm.tsa.filters.hpfilter(data.iloc[:i+1],lamb=lamb)[1].iloc[-1]
+
+    cycle = data-trend
+
+    new_cycle, new_trend = s.hp_filter(lamb=lamb,two_sided=False)
+
+    assert np.allclose(new_trend.data.values,trend.values,rtol=rtol)
+    assert np.allclose(new_cycle.data.values,cycle.values,atol=100*rtol)
+    assert new_trend.data.index.equals(data.index)
+
+
+@pytest.mark.parametrize('frequency,new_frequency',[('M','M'),('M','Q'),('M','A'),('Q','A'),('A','A'),('D','M'),('D','Q')])
+@pytest.mark.parametrize('missing',[(),(20,21,22,35)])
+def test_as_frequency(kernels,frequency,new_frequency,missing):
+
+    s = make_series(lengths[frequency],frequency,start='1950-02-01',missing=missing)
+    rule = {'M':'MS','Q':'QS','A':'YS'}[new_frequency]
+
+    for method in fredpy._aggregation_methods:
+        assert_same(s.as_frequency(new_frequency,method=method),getattr(s.data.resample(rule),method)())
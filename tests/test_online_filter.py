@@ -0,0 +1,51 @@
+import json
+import numpy as np
+import pytest
+import fredpy
+from conftest import make_series
+
+
+def test_hp_matches_one_sided_hp_filter():
+
+    s = make_series(80,'Q')
+    head = s.window(['1950-01-01','1959-12-31'])
+
+    online = head.online_filter()
+    cycle, trend = online.extend(s.data.values[len(head.data):])
+    expected_cycle, expected_trend = s.hp_filter(two_sided=False)
+
+    assert online.lamb == 1600
+    assert online.date == '1969-10-01'
+    assert np.allclose(trend,expected_trend.data.values[len(head.data):])
+    assert np.allclose(cycle,expected_cycle.data.values[len(head.data):])
+
+
+def test_linear_and_ma():
+
+    s = make_series(120,'M')
+
+    linear = s.online_filter('linear')
+    ma = s.online_filter('ma',length=4)
+
+    assert np.isclose(linear.trend,s.linear_filter()[1].data.iloc[-1])
+    assert np.isclose(ma.trend,s.ma(length=4).data.iloc[-1])
+
+    with pytest.raises(ValueError):
+        s.online_filter('ma')
+
+
+def test_state_is_valid_json():
+
+    s = make_series(40,'M',missing=[39])
+
+    for method in ['hp','linear','ma']:
+
+        online = s.online_filter(method,length=4)
+        assert np.isnan(online.trend)
+
+        state = json.loads(json.dumps(online.state(),allow_nan=False))
+        restored = fredpy.online_filter.from_state(state)
+
+        assert np.isnan(restored.trend) and np.isnan(restored.cycle)
+        assert np.allclose(restored.extend([101.0,102.0]),online.extend([101.0,102.0]),equal_nan=True)
+        assert restored.date == online.date == '1953-06-01'
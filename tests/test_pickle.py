@@ -0,0 +1,65 @@
+import pickle
+import numpy as np
+import fredpy
+from conftest import make_series
+
+
+def test_pickle_keeps_frequency():
+
+    for frequency in ['D','M','Q','A']:
+
+        s = make_series(60,frequency,missing=[5])
+        s.data
+        restored = pickle.loads(pickle.dumps(s))
+
+        # Quarterly and annual frequencies can be inferred with a different anchor month, e.g., QS-OCT
+        assert restored.data.index.freq is not None
+        assert fredpy._period_step(restored.data.index) == fredpy._period_step(s.data.index)
+        assert restored.data.index.equals(s.data.index)
+        assert np.array_equal(restored.data.values,s.data.values,equal_nan=True)
+        assert restored.date_range == s.date_range
+
+
+def test_pickle_restores_period_index():
+
+    s = make_series(120,'M')
+
+    # A series whose data have been materialized as a Pandas Series is pickled in the period form
+    s.data
+    restored = pickle.loads(pickle.dumps(s))
+
+    assert restored._periods()[:2] == s._periods()[:2]
+    assert restored._data is None
+
+    # Irregular dates
+    s.data = s.data.iloc[[0,1,5,9]]
+    restored = pickle.loads(pickle.dumps(s))
+
+    assert restored.data.index.equals(s.data.index)
+    assert restored.data.index.freq is None
+
+
+def test_pickle_compact_missing_values():
+
+    s = make_series(120,'M',missing=range(0,120,3))
+    s.data = s.data.where(np.arange(120) % 2 == 0)
+    restored = pickle.loads(pickle.dumps(s))
+
+    assert '_missing' in s.__getstate__().keys()
+    assert np.array_equal(restored.data.values,s.data.values,equal_nan=True)
+    assert restored.data.index.equals(s.data.index)
+
+
+def window_1955_1958(s):
+
+    return s.window(['1955-01-01','1958-12-31'])
+
+
+def test_map_process_executor_keeps_frequency():
+
+    series_list = [make_series(120,'M'),make_series(40,'Q',missing=[1,2,3])]
+    results, errors = fredpy.map_series(window_1955_1958,series_list,executor='process',max_workers=2)
+
+    assert not errors
+    for s, result in zip(series_list,results):
+        assert result._periods()[1] == s._periods()[1]
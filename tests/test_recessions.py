@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import make_series
+
+
+def indicator(frequency,start,n_obs,fractional=False):
+
+    return make_series(n_obs,frequency,start=start).recession_indicator(fractional=fractional).data
+
+
+def test_recession_indicator_matches_usrec():
+
+    # Recession from the month after the December 2007 peak through the June 2009 trough
+    monthly = indicator('M','2007-10-01',24)
+
+    assert monthly['2007-12-01'] == 0 and monthly['2008-01-01'] == 1
+    assert monthly['2009-06-01'] == 1 and monthly['2009-07-01'] == 0
+    assert monthly.sum() == 18
+
+    quarterly = indicator('Q','2007-01-01',16)
+
+    assert list(quarterly['2007-10-01':'2009-10-01']) == [0,1,1,1,1,1,1,0,0]
+
+    daily = indicator('D','2007-12-30',4)
+
+    assert list(daily) == [0,0,1,1]
+
+
+def test_fractional_recession_indicator():
+
+    # Recession from April 1 to November 30, 2001
+    quarterly = indicator('Q','2001-01-01',4,fractional=True)
+    annual = indicator('A','2000-01-01',3,fractional=True)
+
+    assert np.allclose(quarterly,[0,1,1,61/92])
+    assert np.allclose(annual,[0,244/365,0])
+
+    indicator_series = make_series(4,'Q',start='2001-01-01').recession_indicator(fractional=True)
+
+    assert indicator_series.units_short == 'Fraction'
+    assert indicator_series.title == 'NBER based Recession Indicators for the United States'
+
+
+def test_recession_indicator_requires_known_frequency():
+
+    s = make_series(12,'M')
+    s.frequency_short = 'X'
+
+    with pytest.raises(ValueError):
+        s.recession_indicator()
+
+    assert indicator('M','1950-01-01',12).index.equals(pd.date_range('1950-01-01',periods=12,freq='MS'))
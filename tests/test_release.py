@@ -0,0 +1,29 @@
+import numpy as np
+import fredpy
+from conftest import make_series, make_server
+
+
+def test_fetch_all_keeps_observation_date():
+
+    series_list = [make_series(120,'M'),make_series(40,'Q')]
+    fredpy.transport = make_server(series_list,'2020-01-01')
+
+    r = fredpy.release(1,observation_date='2020-01-01')
+
+    # The second call is answered from the cache
+    for fetched in [r.fetch_all(),r.fetch_all()]:
+
+        assert sorted(fetched.keys()) == ['SYNM','SYNQ']
+
+        for s in series_list:
+            assert fetched[s.series_id].observation_date == 'January 01, 2020'
+            assert fetched[s.series_id].release == 'Synthetic Release'
+            assert np.allclose(fetched[s.series_id].data.values,s.data.values,atol=1e-3)
+
+
+def test_copy_keeps_observation_date():
+
+    s = make_series(24,'M')
+    s.observation_date = 'January 01, 2020'
+
+    assert s.copy().observation_date == 'January 01, 2020'
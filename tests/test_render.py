@@ -0,0 +1,37 @@
+import os
+import fredpy
+from conftest import make_series
+
+
+def test_render_draws_recession_bars(tmp_path,monkeypatch):
+
+    drawn = []
+    recession_bars = fredpy._recession_bars
+
+    def record(ax,recession_starts,recession_ends,**kwargs):
+        bars = recession_bars(ax,recession_starts,recession_ends,**kwargs)
+        drawn.append(bars)
+        return bars
+
+    monkeypatch.setattr(fredpy,'_recession_bars',record)
+
+    s = make_series(300,'M')
+    paths, errors = fredpy.render([s],str(tmp_path),executor='thread')
+
+    assert not errors
+    assert os.path.exists(paths[0])
+
+    expected, _ = fredpy._recession_intervals(s.data.index[0],s.data.index[-1])
+
+    assert len(expected) == 5
+    assert len(drawn) == 1
+    assert len(drawn[0].get_paths()) == len(expected)
+
+
+def test_render_process_executor(tmp_path):
+
+    s = make_series(120,'Q')
+    paths, errors = fredpy.render([s,{'series':[s,s.ma(length=4)],'filename':'ma.png'}],str(tmp_path),executor='process',max_workers=2)
+
+    assert not errors
+    assert [os.path.basename(path) for path in paths] == ['SYNQ.png','ma.png']
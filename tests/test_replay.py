@@ -0,0 +1,59 @@
+import numpy as np
+import fredpy
+from conftest import make_series, make_server
+
+
+def test_record_and_replay(tmp_path,monkeypatch):
+
+    s = make_series(60,'Q')
+    upstream = make_server([s],fredpy._today())
+    upstream_urls = []
+
+    def get(url,**kwargs):
+        upstream_urls.append(url)
+        return upstream.get(url)
+
+    # Requests without a recorded response are forwarded to the FRED API
+    monkeypatch.setattr(fredpy.requests,'get',get)
+    monkeypatch.setattr(fredpy,'api_key','SECRETKEY')
+
+    recorder = fredpy.replay_server(record=True)
+    fredpy.transport = recorder
+    recorded = fredpy.series('SYNQ')
+
+    path = str(tmp_path/'responses.json')
+    recorder.save(path)
+
+    with open(path,'r') as responses_file:
+        assert 'SECRETKEY' not in responses_file.read()
+
+    assert len(upstream_urls) > 0 and all(url.startswith('https://api.stlouisfed.org/') for url in upstream_urls)
+
+    # Replay offline from the saved file
+    monkeypatch.setattr(fredpy.requests,'get',None)
+    fredpy.series_cache.clear()
+    fredpy.transport = fredpy.replay_server(path=path)
+    replayed = fredpy.series('SYNQ')
+
+    assert np.array_equal(replayed.data.values,recorded.data.values)
+    assert replayed.title == recorded.title == 'Synthetic series'
+
+
+def test_http_server_and_unrecorded_requests():
+
+    s = make_series(24,'M')
+    today = fredpy._today()
+
+    with make_server([s],today) as server:
+
+        fredpy.base_url = server.start()
+        fredpy.transport = None
+
+        downloaded = fredpy.series('SYNM')
+
+        r = fredpy.requests.get(server.url+'fred/series?series_id=MISSING&api_key=SECRETKEY&file_type=json')
+
+    assert np.allclose(downloaded.data.values,s.data.values,atol=1e-3)
+    assert r.status_code == 404
+    assert server.requests[-1] == ('fred/series',{'series_id':'MISSING','file_type':'json'})
+    assert ('fred/series/observations',{'series_id':'SYNM','realtime_start':today,'realtime_end':today,'file_type':'json'}) in server.requests
@@ -0,0 +1,108 @@
+import pytest
+import fredpy
+
+
+def record(series_id,title):
+
+    return {'id':series_id,'title':title,'notes':'','units':'Percent','frequency':'Monthly'}
+
+
+def test_search_text_is_url_encoded():
+
+    search_text = 'S&P 500 +returns #1'
+    server = fredpy.replay_server()
+    server.add('fred/series/search',{'search_text':search_text,'search_type':'full_text','limit':1000,'offset':0},
+        {'count':1,'seriess':[record('SP500','S&P 500')]})
+    fredpy.transport = server
+
+    results = list(fredpy.search(search_text))
+
+    assert [r['id'] for r in results] == ['SP500']
+    assert server.requests[0][1]['search_text'] == search_text
+
+
+def add_pages(server,path,parameters,records,page_size):
+
+    for offset in range(0,len(records),page_size):
+        page_parameters = dict(parameters,limit=1000,offset=offset)
+        server.add(path,page_parameters,{'count':len(records),'seriess':records[offset:offset+page_size]})
+
+
+def test_search_requests_pages_until_count():
+
+    records = [record('SYN'+str(i),'Synthetic series '+str(i)) for i in range(5)]
+    server = fredpy.replay_server()
+    add_pages(server,'fred/series/search',{'search_text':'synthetic','search_type':'full_text'},records,2)
+    fredpy.transport = server
+
+    results = list(fredpy.search('synthetic'))
+
+    assert [r['id'] for r in results] == [r['id'] for r in records]
+    assert [int(parameters['offset']) for path,parameters in server.requests] == [0,2,4]
+
+
+def test_category_and_tag_series_are_paged():
+
+    records = [record('SYN'+str(i),'Synthetic series '+str(i)) for i in range(3)]
+    server = fredpy.replay_server()
+    add_pages(server,'fred/category/series',{'category_id':32991},records,2)
+    add_pages(server,'fred/tags/series',{'tag_names':'usa;monthly'},records,1)
+    fredpy.transport = server
+
+    assert [r['id'] for r in fredpy.category_series(32991)] == ['SYN0','SYN1','SYN2']
+    assert [r['id'] for r in fredpy.tag_series(['usa','monthly'])] == ['SYN0','SYN1','SYN2']
+
+
+def test_category_children_recursive():
+
+    server = fredpy.replay_server()
+    server.add('fred/category/children',{'category_id':0},{'categories':[{'id':1,'name':'A'},{'id':2,'name':'B'}]})
+    server.add('fred/category/children',{'category_id':1},{'categories':[{'id':3,'name':'C'}]})
+    server.add('fred/category/children',{'category_id':2},{'categories':[]})
+    server.add('fred/category/children',{'category_id':3},{'categories':[]})
+    fredpy.transport = server
+
+    assert [c['id'] for c in fredpy.category_children()] == [1,2]
+    assert [c['id'] for c in fredpy.category_children(recursive=True)] == [1,2,3]
+
+
+def test_repeated_search_is_answered_from_index(monkeypatch):
+
+    monkeypatch.setattr(fredpy,'search_index',fredpy.metadata_index())
+
+    records = [record('UNRATE','Unemployment Rate'),record('PAYEMS','All Employees, Total Nonfarm')]
+    server = fredpy.replay_server()
+    add_pages(server,'fred/series/search',{'search_text':'employment','search_type':'full_text'},records,1)
+    fredpy.transport = server
+
+    first = list(fredpy.search('employment'))
+    n_requests = len(server.requests)
+    second = list(fredpy.search('employment'))
+
+    assert first == second == records
+    assert len(server.requests) == n_requests == 2
+
+
+def test_offline_search():
+
+    index = fredpy.metadata_index()
+    index.add([record('UNRATE','Unemployment Rate'),record('PAYEMS','All Employees, Total Nonfarm')])
+
+    assert [r['id'] for r in index.search('unemploy*')] == ['UNRATE']
+    assert [r['id'] for r in index.search('employees nonfarm')] == ['PAYEMS']
+    assert index.search('employees rate') == []
+    assert index.search('&&') == []
+
+
+def test_offline_search_requires_index(monkeypatch):
+
+    monkeypatch.setattr(fredpy,'search_index',None)
+
+    with pytest.raises(ValueError):
+        list(fredpy.search('unemployment',offline=True))
+
+    index = fredpy.metadata_index()
+    index.add([record('UNRATE','Unemployment Rate')])
+    monkeypatch.setattr(fredpy,'search_index',index)
+
+    assert [r['id'] for r in fredpy.search('unemployment',offline=True)] == ['UNRATE']
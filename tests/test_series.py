@@ -0,0 +1,89 @@
+import concurrent.futures
+import threading
+import numpy as np
+import pytest
+import fredpy
+from conftest import make_series, make_server
+
+
+def period_series(n_obs,frequency,**kwargs):
+
+    '''Returns a synthetic series with an integer period index.'''
+
+    s = make_series(n_obs,frequency,**kwargs)
+    s._set_periods(*s._periods())
+
+    return s
+
+
+def test_data_is_created_once_for_concurrent_readers():
+
+    for trial in range(20):
+
+        s = period_series(600,'M')
+
+        barrier = threading.Barrier(8)
+
+        def read(i):
+            barrier.wait()
+            return s.data
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(read,range(8)))
+
+        assert all(result is results[0] for result in results)
+        assert s._values is None and s._period is None
+
+
+def test_copy_and_periods_of_period_series():
+
+    s = period_series(120,'Q',missing=[7])
+    c = s.copy()
+
+    assert c._values is s._values
+    assert c._periods()[:2] == s._periods()[:2]
+
+    c.data.iloc[0] = 0.0
+
+    assert s._periods()[2][0] != 0.0
+    assert np.array_equal(c._periods()[2][1:],s._periods()[2][1:],equal_nan=True)
+
+
+def test_transformations_are_computed_by_the_api():
+
+    s = make_series(120,'M')
+    today = fredpy._today()
+    server = make_server([s],today)
+
+    options = {'units':'pch','frequency':'q','aggregation_method':'avg','observation_start':'1950-01-01','observation_end':'1950-12-31'}
+    parameters = dict(options,series_id='SYNM',realtime_start=today,realtime_end=today)
+    observations = [{'date':date,'value':value} for date,value in [('1950-01-01','.'),('1950-04-01','1.5'),('1950-07-01','-0.5'),('1950-10-01','2.0')]]
+    server.add('fred/series/observations',parameters,{'observations':observations})
+    fredpy.transport = server
+
+    transformed = fredpy.series('SYNM',units='pch',frequency='Q',aggregation_method='mean',observation_start='1950-01-01',observation_end='December 31, 1950')
+
+    observation_requests = [p for path,p in server.requests if path == 'fred/series/observations']
+
+    assert observation_requests == [dict(parameters,file_type='json')]
+    assert transformed.frequency == 'Quarterly' and transformed.frequency_short == 'Q' and transformed.t == 4
+    assert transformed.units == 'Percent' and transformed.units_short == '%'
+    assert transformed.title == 'Percentage Change in Synthetic series'
+    assert list(transformed.data.values) == [1.5,-0.5,2.0]
+    assert fredpy._cache_key('SYNM',None,options) in fredpy.series_cache
+    assert fredpy._cache_key('SYNM') not in fredpy.series_cache
+
+
+def test_invalid_transformations_raise():
+
+    with pytest.raises(ValueError):
+        fredpy.series('SYNM',units='percent')
+
+    with pytest.raises(ValueError):
+        fredpy.series('SYNM',frequency='hourly')
+
+    with pytest.raises(ValueError):
+        fredpy.series('SYNM',aggregation_method='mean')
+
+    with pytest.raises(ValueError):
+        fredpy.series('SYNM',frequency='Q',aggregation_method='median')
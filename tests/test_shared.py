@@ -0,0 +1,43 @@
+import gc
+import pickle
+import numpy as np
+import fredpy
+from conftest import make_series
+
+
+def window_mean(s):
+
+    return float(s.data.values.mean())
+
+
+def test_shared_series_map():
+
+    series_list = [make_series(120,'M'),make_series(40,'Q')]
+
+    with fredpy.shared_series(series_list) as shared:
+
+        results, errors = fredpy.map_series(window_mean,shared,executor='process',max_workers=2)
+
+        assert not errors
+        assert results == {s.series_id:window_mean(s) for s in series_list}
+
+
+def test_workers_release_memory_maps():
+
+    s = make_series(120,'M')
+
+    with fredpy.shared_series([s]) as shared:
+
+        # Unpickling in the creating process attaches to the segment like a worker process
+        attached = pickle.loads(pickle.dumps(shared))
+        view = attached.series('SYNM')
+        view_again = pickle.loads(pickle.dumps(shared)).series('SYNM')
+
+        assert fredpy._shared_segments[shared.name] is attached._map
+        assert np.array_equal(view.data.values,s.data.values)
+        assert np.array_equal(view_again.data.values,s.data.values)
+
+        del attached, view, view_again
+        gc.collect()
+
+        assert shared.name not in fredpy._shared_segments.keys()
@@ -0,0 +1,85 @@
+import urllib.parse
+import pandas as pd
+import fredpy
+from conftest import make_series, make_server
+
+
+def sync_server(updated_ids):
+
+    '''Returns a transport for two synthetic series that answers fred/series/updates for any time range
+    with the series in updated_ids.'''
+
+    server = make_server([make_series(24,'M'),make_series(8,'Q')],fredpy._today())
+
+    class transport:
+
+        def get(self,url,timeout=None):
+
+            split_url = urllib.parse.urlsplit(url)
+
+            if split_url.path.endswith('fred/series/updates'):
+                parameters = dict(urllib.parse.parse_qsl(split_url.query))
+                records = [{'id':series_id} for series_id in updated_ids]
+                server.add('fred/series/updates',parameters,{'count':len(records),'seriess':records})
+
+            return server.get(url,timeout=timeout)
+
+    return server,transport()
+
+
+def test_first_sync_downloads_every_series(tmp_path,monkeypatch):
+
+    monkeypatch.setattr(fredpy,'sync_watermark',None)
+
+    path = str(tmp_path/'watermark.txt')
+    server,transport = sync_server([])
+    client = fredpy.FredClient(api_key='test',transport=transport)
+
+    downloaded = fredpy.sync(['SYNM','SYNQ'],path=path,client=client)
+
+    with open(path,'r') as watermark_file:
+        saved = pd.to_datetime(watermark_file.readline().strip())
+
+    assert sorted(downloaded.keys()) == ['SYNM','SYNQ']
+    assert fredpy._cache_key('SYNQ') in client.series_cache
+    assert saved == client.sync_watermark
+    assert fredpy.sync_watermark is None
+    assert not any(path == 'fred/series/updates' for path,parameters in server.requests)
+
+
+def test_recent_watermark_uses_series_updates(tmp_path):
+
+    path = str(tmp_path/'watermark.txt')
+    watermark = pd.Timestamp.now(tz='America/Chicago').floor('min') - pd.Timedelta(days=2)
+
+    with open(path,'w') as watermark_file:
+        watermark_file.write(watermark.isoformat())
+
+    server,transport = sync_server(['SYNQ','OTHER'])
+    client = fredpy.FredClient(api_key='test',transport=transport)
+
+    downloaded = fredpy.sync(['SYNM','SYNQ'],path=path,client=client)
+
+    updates = [parameters for path,parameters in server.requests if path == 'fred/series/updates']
+
+    assert list(downloaded.keys()) == ['SYNQ']
+    assert updates[0]['start_time'] == watermark.strftime('%Y%m%d%H%M')
+    assert client.sync_watermark > watermark
+
+
+def test_old_watermark_uses_last_updated(monkeypatch):
+
+    server,transport = sync_server([])
+    server.add('fred/series',{'series_id':'SYNM'},{'seriess':[{'id':'SYNM','last_updated':'1999-12-31 07:45:00-06'}]})
+    server.add('fred/series',{'series_id':'SYNQ'},{'seriess':[{'id':'SYNQ','last_updated':'2020-01-01 07:45:00-06'}]})
+
+    monkeypatch.setattr(fredpy,'sync_watermark',pd.Timestamp('2000-01-01',tz='America/Chicago'))
+    fredpy.transport = transport
+
+    downloaded = fredpy.sync(['SYNM','SYNQ'])
+
+    assert list(downloaded.keys()) == ['SYNQ']
+    assert fredpy._cache_key('SYNQ') in fredpy.series_cache
+    assert fredpy._cache_key('SYNM') not in fredpy.series_cache
+    assert fredpy.sync_watermark > pd.Timestamp('2000-01-01',tz='America/Chicago')
+    assert not any(path == 'fred/series/updates' for path,parameters in server.requests)
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+import fredpy
+from conftest import make_series
+
+
+def warehouse_series():
+
+    monthly = make_series(120,'M',missing=[5])
+    other = make_series(60,'M',start='1960-01-01',seed=1)
+    other.series_id = 'SYNM2'
+    quarterly = make_series(40,'Q')
+    daily = make_series(200,'D')
+    daily.data = daily.data.astype(np.float32)
+
+    return [monthly,other,quarterly,daily]
+
+
+def test_warehouse_round_trip(tmp_path):
+
+    series_list = warehouse_series()
+    fredpy.write_warehouse({s.series_id:s for s in series_list},str(tmp_path))
+
+    w = fredpy.warehouse(str(tmp_path))
+
+    assert w.series_ids == ['SYNM','SYNM2','SYNQ','SYND']
+    assert w.metadata['SYNM2']['group'] == 'M' and w.metadata['SYNM2']['offset'] == 120
+    assert w.metadata['SYND']['group'] == 'D_float32'
+
+    for s in series_list:
+
+        loaded = w.series(s.series_id)
+
+        assert loaded.data.index.equals(s.data.index)
+        assert np.array_equal(loaded.data.values,s.data.values,equal_nan=True)
+        assert loaded.data.dtype == s.data.dtype
+        assert (loaded.title,loaded.frequency_short,loaded.units,loaded.date_range) == (s.title,s.frequency_short,s.units,s.date_range)
+
+
+def test_warehouse_series_are_memory_mapped(tmp_path):
+
+    fredpy.write_warehouse(warehouse_series(),str(tmp_path))
+
+    w = fredpy.warehouse(str(tmp_path))
+    values = w.series('SYNM2').data.values
+
+    assert w._arrays.keys() == {'M'}
+    assert isinstance(w._group('M')[1],np.memmap)
+    assert np.shares_memory(values,w._group('M')[1])
+    assert not values.flags.writeable
+
+
+def test_warehouse_panel(tmp_path):
+
+    fredpy.write_warehouse(warehouse_series(),str(tmp_path))
+
+    panel = fredpy.warehouse(str(tmp_path)).panel(['SYNM','SYNM2'])
+
+    assert list(panel.columns) == ['SYNM','SYNM2']
+    assert panel.index[0] == pd.Timestamp('1950-01-01') and panel.index[-1] == pd.Timestamp('1964-12-01')
+    assert panel['SYNM2'].first_valid_index() == pd.Timestamp('1960-01-01')
+
+
+def test_warehouse_errors(tmp_path):
+
+    series_list = warehouse_series()
+    fredpy.write_warehouse(series_list,str(tmp_path))
+
+    with pytest.raises(ValueError):
+        fredpy.warehouse(str(tmp_path)).series('MISSING')
+
+    series_list[1].series_id = 'SYNM'
+
+    with pytest.raises(ValueError):
+        fredpy.write_warehouse(series_list,str(tmp_path))
@@ -0,0 +1,72 @@
+import threading
+import time
+import pandas as pd
+import fredpy
+from conftest import make_series, make_server
+
+
+def observation_requests(server):
+
+    return [parameters['series_id'] for path,parameters in server.requests if path == 'fred/series/observations']
+
+
+def test_refresh_downloads_missing_and_revalidates_expired_series():
+
+    server = make_server([make_series(120,'M'),make_series(40,'Q')],fredpy._today())
+    server.add('fred/series',{'series_id':'SYNM'},{'seriess':[{'id':'SYNM','last_updated':'2020-01-01 07:45:00-06'}]})
+    fredpy.transport = server
+    fredpy.max_retries = 0
+
+    w = fredpy.watchlist(['SYNM','SYNQ','MISSING'],request_budget=None)
+
+    assert sorted(w.refresh()) == ['SYNM','SYNQ']
+    assert sorted(observation_requests(server)) == ['SYNM','SYNQ']
+    assert list(w.errors.keys()) == ['MISSING']
+    assert fredpy._cache_key('SYNQ') in fredpy.series_cache
+
+    # Only the expired series and the series that failed are due
+    fredpy.cache_expiration[fredpy._cache_key('SYNM')] = pd.Timestamp('2000-01-01',tz='America/Chicago')
+
+    assert w.refresh() == ['SYNM']
+    assert sorted(observation_requests(server)) == ['SYNM','SYNQ']
+    assert fredpy.cache_expiration[fredpy._cache_key('SYNM')] > pd.Timestamp.now(tz='America/Chicago')
+
+
+def test_background_thread_fills_the_cache():
+
+    fredpy.transport = make_server([make_series(120,'M')],fredpy._today())
+
+    with fredpy.watchlist(['SYNM'],poll_interval=60) as w:
+
+        for i in range(100):
+            if 'SYNM' in w.refreshed.keys():
+                break
+            time.sleep(0.05)
+
+    assert w._thread is None
+    assert fredpy._cache_key('SYNM') in fredpy.series_cache
+
+
+def test_request_budget():
+
+    fredpy.transport = make_server([make_series(120,'M'),make_series(40,'Q')],fredpy._today())
+
+    # Each download costs four requests so the second waits for the budget to refill
+    w = fredpy.watchlist(['SYNM','SYNQ'],request_budget=4,budget_period=0.3,max_workers=1)
+
+    start = time.monotonic()
+    refreshed = w.refresh()
+
+    assert sorted(refreshed) == ['SYNM','SYNQ']
+    assert time.monotonic() - start >= 0.25
+
+    # Stopping the watchlist ends a wait for the budget
+    w = fredpy.watchlist([],request_budget=2,budget_period=100)
+
+    assert w._spend(2)
+
+    threading.Timer(0.1,w._stopped.set).start()
+    start = time.monotonic()
+
+    assert not w._spend(1)
+    assert time.monotonic() - start < 5